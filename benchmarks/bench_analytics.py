@@ -0,0 +1,92 @@
+"""Compare computing indicators and daily candles from a year of minute candles with
+questradeist.analytics, over columns, against looping over Candle objects.
+
+    python -m benchmarks.bench_analytics [--days N] [--window N]
+"""
+import argparse
+import datetime
+import math
+import time
+from fakeserver import candle
+from questradeist import analytics
+from questradeist.columnar import columns
+from questradeist.types import Candle
+
+
+def year(days: int):
+    """Raw minute candles for the trading hours of days weekdays."""
+    rows = []
+    day = datetime.datetime(2020, 1, 2)
+    minute = datetime.timedelta(minutes=1)
+    while days:
+        if day.weekday() < 5:
+            opening = day + datetime.timedelta(hours=9, minutes=30)
+            rows += [candle(7, opening + n * minute, minute) for n in range(390)]
+            days -= 1
+        day += datetime.timedelta(days=1)
+    return rows
+
+
+def looped(candles: list, window: int):
+    """The indicators, and daily candles, computed one Candle at a time."""
+    close = [c.CLOSE for c in candles]
+    rets = [math.nan] + [close[i] / close[i - 1] - 1 for i in range(1, len(close))]
+    ma = [math.nan] * (window - 1) + [sum(close[i - window + 1:i + 1]) / window for i in range(window - 1, len(close))]
+
+    vwap = [math.nan] * (window - 1)
+    for i in range(window - 1, len(candles)):
+        w = candles[i - window + 1:i + 1]
+        vwap.append(sum(c.VWAP * c.VOLUME for c in w) / sum(c.VOLUME for c in w))
+
+    logs = [0.0] + [math.log(close[i] / close[i - 1]) for i in range(1, len(close))]
+    vol = [math.nan] * window
+    for i in range(window, len(logs)):
+        w = logs[i - window + 1:i + 1]
+        mean = sum(w) / window
+        vol.append(math.sqrt(sum((x - mean) ** 2 for x in w) / (window - 1)))
+
+    days = {}
+    for c in candles:
+        day = c.START[:10]
+        d = days.get(day)
+        if d is None:
+            days[day] = [c.OPEN, c.HIGH, c.LOW, c.CLOSE, c.VOLUME]
+        else:
+            d[1], d[2], d[3], d[4] = max(d[1], c.HIGH), min(d[2], c.LOW), c.CLOSE, d[4] + c.VOLUME
+    return rets, ma, vwap, vol, days
+
+
+def vectorized(cols: dict, window: int):
+    return (analytics.returns(cols), analytics.sma(cols["CLOSE"], window), analytics.rolling_vwap(cols, window),
+            analytics.volatility(cols, window), analytics.resample(cols, "OneDay"))
+
+
+def timed(f, *args):
+    start = time.perf_counter()
+    f(*args)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--days", type=int, default=252)
+    parser.add_argument("--window", type=int, default=390)
+    args = parser.parse_args()
+
+    rows = year(args.days)
+    start = time.perf_counter()
+    candles = Candle.from_list(rows)
+    objects = time.perf_counter() - start
+    start = time.perf_counter()
+    cols = columns(rows, Candle)
+    columnar = time.perf_counter() - start
+
+    print("%d minute candles, window of %d" % (len(rows), args.window))
+    print("%-24s %10.1f ms" % ("Candle.from_list", objects * 1000))
+    print("%-24s %10.1f ms" % ("columnar.columns", columnar * 1000))
+    print("%-24s %10.1f ms" % ("looped over Candles", timed(looped, candles, args.window) * 1000))
+    print("%-24s %10.1f ms" % ("analytics", timed(vectorized, cols, args.window) * 1000))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""Measure the throughput, p50/p99 latency and peak memory of Symbol and Account calls at
+realistic sizes, against a local stand-in server, and catch regressions against a saved run.
+
+    python -m benchmarks.bench_calls [--repeat N] [--scenario NAME ...] [--latency S] [--jitter S]
+                                     [--error-rate F] [--rate-limit N] [--replay FILE]
+                                     [--save FILE] [--compare FILE] [--tolerance F]
+
+With --compare, scenarios slower, or using more memory, than the saved run by more than
+the tolerance are listed, and the exit status is 1.
+"""
+import argparse
+import datetime
+import json
+import sys
+import time
+import tracemalloc
+from fakeserver import FakeQuestrade
+from questradeist import Account, Symbol
+from questradeist.auth import QuestradeAuth
+from questradeist.ratelimit import RateLimiter
+from questradeist.retry import RetryPolicy
+
+START = datetime.datetime(2020, 1, 1)
+
+
+def scenarios(sym: Symbol, acct: Account, account: int):
+    """The calls measured: a name, and a callable returning the number of rows it fetched."""
+    return {
+        # 5k quotes, in 50 chunks
+        "quotes": lambda: len(sym.quotes(list(range(1, 5001)))),
+        # 100k minute candles, a request per day
+        "candles": lambda: len(sym.history(7, START, START + datetime.timedelta(days=70), interval="OneMinute")),
+        "candles_columnar": lambda: len(sym.history(7, START, START + datetime.timedelta(days=70), interval="OneMinute", format="columnar")["CLOSE"]),
+        # five years of activities and executions, in windows of Account.WINDOW (30 days)
+        "activities": lambda: len(acct.activities(account, START, START + datetime.timedelta(days=5 * 365))),
+        "executions": lambda: len(acct.executions(account, START, START + datetime.timedelta(days=5 * 365))),
+        "snapshot": lambda: len(acct.snapshot().holdings()),
+    }
+
+
+def percentile(values: list, q: float):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def measure(call: callable, repeat: int, server: FakeQuestrade):
+    call()
+    times, rows, failures = [], 0, 0
+    requests = server.requests
+    for _ in range(repeat):
+        start = time.perf_counter()
+        try:
+            rows = call()
+        except Exception:
+            failures += 1
+        times.append(time.perf_counter() - start)
+    requests = (server.requests - requests) / repeat
+
+    tracemalloc.start()
+    try:
+        call()
+    except Exception:
+        pass
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return {
+        "rows": rows,
+        "requests": requests,
+        "failures": failures,
+        "p50": percentile(times, 0.5),
+        "p99": percentile(times, 0.99),
+        "rows_per_second": rows * len(times) / sum(times),
+        "peak_mb": peak / 1e6,
+    }
+
+
+def regressions(results: dict, baseline: dict, tolerance: float):
+    """Returns a line for every measure of a scenario worse than in baseline by more than tolerance."""
+    found = []
+    for name, r in results.items():
+        before = baseline.get(name)
+        if before is None:
+            continue
+        for measure in ("p50", "p99", "peak_mb"):
+            if r[measure] > before[measure] * (1 + tolerance):
+                found.append("%s %s: %.4g -> %.4g (+%.0f%%)" % (name, measure, before[measure], r[measure], (r[measure] / before[measure] - 1) * 100))
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--scenario", nargs="*", help="the scenarios to run, by default all of them")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds the server takes to answer")
+    parser.add_argument("--jitter", type=float, default=0.0, help="random seconds added to the latency")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests failing with a 500")
+    parser.add_argument("--rate-limit", type=int, default=None, help="requests per second the server allows, and the client paces to")
+    parser.add_argument("--replay", help="serve the responses recorded by a RecordingTransport to this file")
+    parser.add_argument("--save", help="write the results to this file")
+    parser.add_argument("--compare", help="compare the results with those saved to this file")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args()
+
+    rate = args.rate_limit or 10000
+    with FakeQuestrade(latency=args.latency, jitter=args.jitter, error_rate=args.error_rate, rate_limit=args.rate_limit, seed=1) as server:
+        if args.replay:
+            server.replay(args.replay)
+        QuestradeAuth.LOGIN_URL = server.login_url
+        limiter = RateLimiter(account_rate=rate, market_rate=rate)
+        retry = RetryPolicy(backoff=0.01)
+        sym = Symbol(refresh_token="bench", rate_limiter=limiter, retry=retry)
+        acct = Account(credentials=sym.credentials, rate_limiter=limiter, retry=retry)
+
+        calls = scenarios(sym, acct, server.accounts[0])
+        names = args.scenario or list(calls)
+        results = {}
+        print("%-18s %9s %9s %10s %10s %12s %9s %8s" % ("scenario", "rows", "requests", "p50 ms", "p99 ms", "rows/s", "peak MB", "failed"))
+        for name in names:
+            r = results[name] = measure(calls[name], args.repeat, server)
+            print("%-18s %9d %9.0f %10.1f %10.1f %12.0f %9.1f %8d" % (
+                name, r["rows"], r["requests"], r["p50"] * 1000, r["p99"] * 1000, r["rows_per_second"], r["peak_mb"], r["failures"]))
+        if server.errors:
+            print("%d injected errors" % server.errors)
+
+    if args.save:
+        with open(args.save, "w") as fp:
+            json.dump(results, fp, indent=2)
+
+    if args.compare:
+        with open(args.compare) as fp:
+            found = regressions(results, json.load(fp), args.tolerance)
+        for line in found:
+            print("REGRESSION " + line)
+        if found:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
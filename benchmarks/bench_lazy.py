@@ -0,0 +1,52 @@
+"""Compare decoding and filtering a large response as raw dicts, as QuestradeType objects,
+and as lazy views, which only read the fields filtered on.
+
+    python -m benchmarks.bench_lazy [--rows N] [--repeat N]
+"""
+import argparse
+import datetime
+import json
+import time
+from fakeserver import execution, quote
+from questradeist.lazy import views
+from questradeist.questrade import loads
+from questradeist.types import AccountExecution, Quote
+
+
+def timed(f, repeat: int):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        f()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=50000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print("decoder: %s.%s" % (loads.__module__, loads.__name__))
+    day = datetime.date(2020, 1, 1)
+    cases = (
+        ("quotes", Quote, [quote(i) for i in range(args.rows)], "lastTradePrice", "LASTTRADEPRICE", 50.0),
+        ("executions", AccountExecution, [execution(day + datetime.timedelta(days=i % 1000)) for i in range(args.rows)], "quantity", "QUANTITY", 50),
+    )
+    for key, qtype, rows, raw_field, field, threshold in cases:
+        body = json.dumps({key: rows}).encode("utf-8")
+        filters = (
+            ("raw dicts", lambda: [r for r in loads(body)[key] if r[raw_field] > threshold]),
+            ("objects", lambda: [o for o in qtype.from_list(loads(body)[key]) if getattr(o, field) > threshold]),
+            ("lazy views", lambda: [v for v in views(loads(body)[key], qtype) if getattr(v, field) > threshold]),
+        )
+        print("%d %s, decoded and filtered on %s" % (args.rows, key, field))
+        print("%-14s %10.1f ms" % ("decode only", timed(lambda: loads(body), args.repeat) * 1000))
+        for name, f in filters:
+            print("%-14s %10.1f ms" % (name, timed(f, args.repeat) * 1000))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""Compare applying polled quotes to a QuoteStore, which only builds the quotes
+that changed, against rebuilding every Quote on every poll.
+
+    python -m benchmarks.bench_snapshot [--quotes N] [--changed FRACTION] [--polls N]
+"""
+import argparse
+import json
+import time
+from fakeserver import quote
+from questradeist.snapshot import QuoteStore
+from questradeist.types import Quote
+
+
+def responses(count: int, changed: float, polls: int):
+    """Decoded quote responses, with the first changed fraction of quotes moving on every poll."""
+    moving = int(count * changed)
+    polled = []
+    for p in range(polls):
+        rows = [quote(i) for i in range(count)]
+        for r in rows[:moving]:
+            r["lastTradePrice"] += p / 100.0
+        # decoded from JSON, as a response would be, so that no rows share objects
+        polled.append(json.loads(json.dumps({"quotes": rows})))
+    return polled
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--quotes", type=int, default=5000)
+    parser.add_argument("--changed", type=float, default=0.05)
+    parser.add_argument("--polls", type=int, default=50)
+    args = parser.parse_args()
+
+    polled = responses(args.quotes, args.changed, args.polls)
+
+    start = time.perf_counter()
+    for data in polled:
+        Quote.from_list(data["quotes"])
+    rebuild = (time.perf_counter() - start) / len(polled)
+
+    store = QuoteStore()
+    store.apply(polled[0])
+    start = time.perf_counter()
+    for data in polled[1:]:
+        store.apply(data)
+    apply = (time.perf_counter() - start) / (len(polled) - 1)
+
+    print("%d quotes, %.0f%% changing per poll" % (args.quotes, args.changed * 100))
+    print("%-22s %8.2f ms/poll" % ("Quote.from_list", rebuild * 1000))
+    print("%-22s %8.2f ms/poll" % ("QuoteStore.apply", apply * 1000))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+"""Compare the pooled keep-alive transport against a new connection per call.
+
+    python -m benchmarks.bench_transport [--calls N] [--threads N]
+"""
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+from fakeserver import FakeQuestrade
+from questradeist.auth import QuestradeAuth
+from questradeist.ratelimit import RateLimiter
+from questradeist.symbol import Symbol
+from questradeist.transport import PooledTransport, Transport
+
+
+def run(transport: Transport, calls: int, threads: int):
+    # a limiter that never holds calls back, so that the transports are what's measured
+    limiter = RateLimiter(account_rate=10000, market_rate=10000)
+    sym = Symbol(refresh_token="bench", transport=transport, rate_limiter=limiter)
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(lambda i: sym.quotes([i % 5000 + 1]), range(calls)))
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=int, default=500)
+    parser.add_argument("--threads", type=int, default=1)
+    args = parser.parse_args()
+
+    with FakeQuestrade() as server:
+        QuestradeAuth.LOGIN_URL = server.login_url
+        for name, transport in (("per-call", Transport()), ("pooled", PooledTransport(pool_maxsize=args.threads))):
+            connections = server.connections
+            elapsed = run(transport, args.calls, args.threads)
+            print("%-10s %6d calls  %7.3fs  %8.1f calls/s  %5d connections" % (
+                name, args.calls, elapsed, args.calls / elapsed, server.connections - connections))
+            transport.close()
+
+
+if __name__ == "__main__":
+    main()
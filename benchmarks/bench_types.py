@@ -0,0 +1,80 @@
+"""Compare the memory use and construction time of the slotted QuestradeType
+classes against the dynamic, __dict__ based classes they replaced, and of
+building them one by one against building them in bulk with from_list.
+
+    python -m benchmarks.bench_types [--rows N]
+"""
+import argparse
+import datetime
+import gc
+import logging
+import time
+import tracemalloc
+from fakeserver import candle, execution
+from questradeist.types import AccountExecution, Candle
+
+
+def legacy(qtype):
+    """A stand-in for qtype as it was built before slots: every field set in a per-instance __dict__."""
+    names = list(qtype.__slots__)
+
+    class Legacy(object):
+
+        @property
+        def fields(self):
+            return list(names)
+
+        def __init__(self, d=None):
+            logger = logging.getLogger("questrade-logger")
+            for k, v in d.items():
+                if k.upper() not in self.fields:
+                    logger.warning("Invalid questrade field response. Missing %s." % k)
+                setattr(self, k.upper(), v)
+
+    Legacy.__name__ = "Legacy%s" % qtype.__name__
+    return Legacy
+
+
+def measure(build, rows):
+    gc.collect()
+    start = time.perf_counter()
+    objs = build(rows)
+    elapsed = time.perf_counter() - start
+    del objs
+
+    # measured separately, as tracing slows construction down
+    gc.collect()
+    tracemalloc.start()
+    objs = build(rows)
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del objs
+    return elapsed, size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100000)
+    args = parser.parse_args()
+
+    start = datetime.datetime(2020, 1, 1)
+    step = datetime.timedelta(minutes=1)
+    datasets = (
+        (Candle, [candle(1, start + n * step, step) for n in range(args.rows)]),
+        (AccountExecution, [execution(datetime.date(2000, 1, 1) + datetime.timedelta(days=n % 10000)) for n in range(args.rows)]),
+    )
+    for qtype, rows in datasets:
+        old = legacy(qtype)
+        builders = (
+            (old.__name__, lambda rows: [old(d=r) for r in rows]),
+            (qtype.__name__, lambda rows: [qtype(d=r) for r in rows]),
+            ("%s.from_list" % qtype.__name__, qtype.from_list),
+        )
+        for name, build in builders:
+            elapsed, size = measure(build, rows)
+            print("%-28s %8d rows  %7.3fs  %8.0f rows/s  %6.0f bytes/row" % (
+                name, len(rows), elapsed, len(rows) / elapsed, size / len(rows)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,27 @@
+import pytest
+from fakeserver import FakeQuestrade
+from questradeist import ratelimit
+from questradeist.auth import QuestradeAuth
+
+
+@pytest.fixture
+def server(monkeypatch):
+    """A local stand-in Questrade server. Clients created with any refresh token
+    authenticate against it, and send their API calls to it. Like the server, the
+    shared rate limiter doesn't hold requests back unless a test asks for it.
+    """
+    with FakeQuestrade() as fake:
+        monkeypatch.setattr(QuestradeAuth, "LOGIN_URL", fake.login_url)
+        monkeypatch.setattr(ratelimit, "_default", ratelimit.RateLimiter(account_rate=10000, market_rate=10000))
+        yield fake
+
+
+@pytest.fixture
+def stream(server):
+    """A local stand-in streaming server, attached to the stand-in Questrade server."""
+    pytest.importorskip("aiohttp")
+    from fakeserver import FakeStream
+
+    with FakeStream() as fake:
+        server.stream = fake
+        yield fake
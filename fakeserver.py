@@ -0,0 +1,799 @@
+"""A local stand-in for the Questrade API. It serves synthetic responses for the
+endpoints questradeist calls, so that tests and benchmarks can run offline.
+
+    with FakeQuestrade() as server:
+        QuestradeAuth.LOGIN_URL = server.login_url
+        sym = Symbol(refresh_token="anything")
+
+Responses recorded from the real API with a RecordingTransport can be served instead,
+for the calls they answer, with server.replay(path).
+"""
+import asyncio
+import datetime
+import gzip
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+from questradeist.transport import PooledTransport
+
+
+def quote(id: int):
+    """A synthetic stock quote for the given symbol id."""
+    price = 10.0 + (id % 1000) / 10.0
+    return {
+        "symbol": "SYM%d" % id,
+        "symbolId": id,
+        "tier": "",
+        "bidPrice": price - 0.01,
+        "bidSize": 100,
+        "askPrice": price + 0.01,
+        "askSize": 200,
+        "lastTradePriceTrHrs": price,
+        "lastTradePrice": price,
+        "lastTradeSize": 10,
+        "lastTradeTick": "Equal",
+        "lastTradeTime": "2020-01-02T15:59:59.000000-05:00",
+        "volume": 1000 + id,
+        "openPrice": price - 0.5,
+        "highPrice": price + 1.0,
+        "lowPrice": price - 1.0,
+        "delay": 0,
+        "isHalted": False,
+        "high52w": price + 10.0,
+        "low52w": price - 10.0,
+        "VWAP": price,
+    }
+
+
+def search_result(id: int, name: str):
+    """A synthetic symbol search match."""
+    return {
+        "symbol": name,
+        "symbolId": id,
+        "description": "SYNTHETIC SYMBOL %d" % id,
+        "securityType": "Stock",
+        "listingExchange": "TSX",
+        "isTradable": True,
+        "isQuotable": True,
+        "currency": "CAD",
+    }
+
+
+def symbol(id: int, name: str=None):
+    """Synthetic symbol data for the given symbol id."""
+    return {
+        "symbol": name or "SYM%d" % id,
+        "symbolId": id,
+        "prevDayClosePrice": 10.0,
+        "highPrice52": 20.0,
+        "lowPrice52": 5.0,
+        "averageVol3Months": 1000,
+        "averageVol20Days": 1000,
+        "outstandingShares": 1000000,
+        "eps": 1.0,
+        "pe": 10.0,
+        "dividend": 0.1,
+        "yield": 1.0,
+        "exDate": "2020-01-02T00:00:00.000000-05:00",
+        "marketCap": 10000000,
+        "tradeUnit": 1,
+        "optionType": None,
+        "optionDurationType": None,
+        "optionRoot": "",
+        "optionContractDeliverables": {"underlyings": [], "cashInLieu": 0},
+        "optionExerciseType": None,
+        "listingExchange": "TSX",
+        "description": "SYNTHETIC SYMBOL %d" % id,
+        "securityType": "Stock",
+        "optionExpiryDate": None,
+        "dividendDate": "2020-01-02T00:00:00.000000-05:00",
+        "optionStrikePrice": None,
+        "isTradable": True,
+        "isQuotable": True,
+        "hasOptions": False,
+        "currency": "CAD",
+        "minTicks": [],
+        "industrySector": "",
+        "industryGroup": "",
+        "industrySubGroup": "",
+    }
+
+
+def account(number: int):
+    """A synthetic trading account."""
+    return {
+        "type": "Margin",
+        "number": str(number),
+        "status": "Active",
+        "isPrimary": number == 10000001,
+        "isBilling": number == 10000001,
+        "clientAccountType": "Individual",
+    }
+
+
+def position(id: int):
+    """A synthetic position, holding 100 shares of the given symbol id."""
+    price = quote(id)["lastTradePrice"]
+    return {
+        "symbol": "SYM%d" % id,
+        "symbolId": id,
+        "openQuantity": 100,
+        "closedQuantity": 0,
+        "currentMarketValue": price * 100,
+        "currentPrice": price,
+        "averageEntryPrice": price - 1.0,
+        "dayPnl": 0.0,
+        "closedPnl": 0.0,
+        "openPnl": 100.0,
+        "totalCost": (price - 1.0) * 100,
+        "isRealTime": False,
+        "isUnderReorg": False,
+    }
+
+
+def balance(currency: str):
+    """A synthetic per-currency balance."""
+    return {
+        "currency": currency,
+        "cash": 1000.0,
+        "marketValue": 5000.0,
+        "totalEquity": 6000.0,
+        "buyingPower": 2000.0,
+        "maintenanceExcess": 1000.0,
+        "isRealTime": False,
+    }
+
+
+def activity(day: datetime.date):
+    """A synthetic dividend activity, paid on the given day."""
+    stamp = "%sT00:00:00.000000-05:00" % day.isoformat()
+    return {
+        "tradeDate": stamp,
+        "transactionDate": stamp,
+        "settlementDate": stamp,
+        "action": "",
+        "symbol": "SYM1",
+        "symbolId": 1,
+        "description": "DIVIDEND %s" % day.isoformat(),
+        "currency": "CAD",
+        "quantity": 0,
+        "price": 0,
+        "grossAmount": 0,
+        "commission": 0,
+        "netAmount": 1.25,
+        "type": "Dividends",
+    }
+
+
+def execution(day: datetime.date):
+    """A synthetic execution, filled at noon on the given day. Its id is the day's ordinal."""
+    return {
+        "symbol": "SYM1",
+        "symbolId": 1,
+        "quantity": 10,
+        "side": "Buy",
+        "price": 10.0,
+        "id": day.toordinal(),
+        "orderId": day.toordinal(),
+        "orderChainId": day.toordinal(),
+        "exchangeExecId": "X%d" % day.toordinal(),
+        "timestamp": "%sT12:00:00.000000-05:00" % day.isoformat(),
+        "notes": "",
+        "venue": "TSX",
+        "totalCost": 100.0,
+        "orderPlacementCommission": 0,
+        "commission": 4.95,
+        "executionFee": 0,
+        "secFee": 0,
+        "legId": 0,
+        "canadianExecutionFee": 0,
+        "parentId": 0,
+    }
+
+
+def order(day: datetime.date, state: str="Executed"):
+    """A synthetic order, created at noon on the given day. Its id is the day's ordinal."""
+    stamp = "%sT12:00:00.000000-05:00" % day.isoformat()
+    return {
+        "id": day.toordinal(),
+        "symbol": "SYM1",
+        "symbolId": 1,
+        "totalQuantity": 10,
+        "openQuantity": 0,
+        "filledQuantity": 10,
+        "canceledQuantity": 0,
+        "side": "Buy",
+        "orderType": "Limit",
+        "limitPrice": 10.0,
+        "stopPrice": None,
+        "isAllOrNone": False,
+        "isAnonymous": False,
+        "icebergQuantity": None,
+        "minQuantity": None,
+        "avgExecPrice": 10.0,
+        "lastExecPrice": 10.0,
+        "source": "TradingAPI",
+        "timeInForce": "Day",
+        "gtdDate": None,
+        "state": state,
+        "rejectionReason": "",
+        "chainId": day.toordinal(),
+        "creationTime": stamp,
+        "updateTime": stamp,
+        "notes": "",
+        "primaryRoute": "AUTO",
+        "secondaryRoute": "",
+        "orderRoute": "TSX",
+        "venueHoldingOrder": "",
+        "comissionCharged": 0,
+        "exchangeOrderId": "",
+        "isSignificantShareHolder": False,
+        "isInsider": False,
+        "isLimitOffsetInDollar": False,
+        "userId": 1,
+        "placementCommission": None,
+        "legs": [],
+        "strategyType": "SingleLeg",
+        "triggerStopPrice": None,
+        "orderGroupId": 0,
+        "orderClass": None,
+        "isCrossZero": False,
+    }
+
+
+# the expiries and strikes of every synthetic option chain
+EXPIRIES = ["2020-01-17", "2020-02-21", "2020-03-20"]
+STRIKES = 5
+
+
+def option_id(underlying: int, expiry: int, strike: int, put: bool=False):
+    """The id of a synthetic option: the underlying id, then the expiry and strike indexes, then 0 for calls and 1 for puts."""
+    return underlying * 1000 + expiry * 100 + strike * 2 + int(put)
+
+
+def option_strike(underlying: int, strike: int):
+    """The strike price of the synthetic options of the given strike index, around the price of the underlying."""
+    return float(int(quote(underlying)["lastTradePrice"]) + strike - STRIKES // 2)
+
+
+def option_chain(underlying: int):
+    """A synthetic option chain for the given underlying symbol id."""
+    return [{
+        "expiryDate": "%sT00:00:00.000000-05:00" % date,
+        "description": "SYNTHETIC SYMBOL %d" % underlying,
+        "listingExchange": "MX",
+        "optionExerciseType": "American",
+        "chainPerRoot": [{
+            "optionRoot": "SYM%d" % underlying,
+            "chainPerStrikePrice": [{
+                "strikePrice": option_strike(underlying, s),
+                "callSymbolId": option_id(underlying, e, s),
+                "putSymbolId": option_id(underlying, e, s, put=True),
+            } for s in range(STRIKES)],
+            "multiplier": 100,
+        }],
+    } for e, date in enumerate(EXPIRIES)]
+
+
+def option_quote(id: int):
+    """A synthetic option quote for the given option id."""
+    underlying, expiry, strike, put = id // 1000, id % 1000 // 100, id % 100 // 2, id % 2
+    price = 1.0 + strike / 10.0 + expiry / 100.0
+    return {
+        "underlying": "SYM%d" % underlying,
+        "underlyingId": underlying,
+        "symbol": "SYM%d%s%s%d" % (underlying, EXPIRIES[expiry].replace("-", ""), "P" if put else "C", option_strike(underlying, strike)),
+        "symbolId": id,
+        "bidPrice": price - 0.05,
+        "bidSize": 10,
+        "askPrice": price + 0.05,
+        "askSize": 10,
+        "lastTradePriceTrHrs": price,
+        "lastTradePrice": price,
+        "lastTradeSize": 1,
+        "lastTradeTick": "Equal",
+        "lastTradeTime": "2020-01-02T15:59:59.000000-05:00",
+        "volume": 100,
+        "openPrice": price,
+        "highPrice": price + 0.1,
+        "lowPrice": price - 0.1,
+        "volatility": 25.0,
+        "delta": -0.5 if put else 0.5,
+        "gamma": 0.05,
+        "theta": -0.02,
+        "vega": 0.1,
+        "rho": 0.01,
+        "openInterest": 500,
+        "delay": 0,
+        "isHalted": False,
+        "VWAP": price,
+    }
+
+
+def candle(id: int, start: datetime.datetime, step: datetime.timedelta):
+    """A synthetic candle for the given symbol id, starting at start and lasting step."""
+    price = 10.0 + (start.toordinal() % 100) / 10.0 + start.hour / 100.0 + start.minute / 10000.0
+    return {
+        "start": "%s.000000-05:00" % start.isoformat(),
+        "end": "%s.000000-05:00" % (start + step).isoformat(),
+        "low": price - 0.5,
+        "high": price + 0.5,
+        "open": price - 0.25,
+        "close": price + 0.25,
+        "volume": 1000 + id,
+        "VWAP": price,
+    }
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        BaseHTTPRequestHandler.setup(self)
+        self.server.fake._count("connections")
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        self._serve("GET", None)
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        self._serve("POST", json.loads(self.rfile.read(length) or b"{}"))
+
+    def _serve(self, method: str, body: dict):
+        fake = self.server.fake
+        fake._count("requests")
+        delay = fake._delay()
+        if delay:
+            time.sleep(delay)
+
+        parsed = urlparse(self.path)
+        limited = fake.rate_limit is not None and parsed.path.startswith("/v1/")
+        if limited:
+            allowed, remaining, reset = fake._take()
+        if limited and not allowed:
+            status, payload = 429, {"code": 1006, "message": "Too many requests"}
+        elif parsed.path.startswith("/v1/") and not fake._authorized(self.headers):
+            status, payload = 401, {"code": 1017, "message": "Access token is invalid"}
+        elif parsed.path.startswith("/v1/") and fake._fail():
+            status, payload = 500, {"code": 1000, "message": "Injected error"}
+        elif (method, parsed.path, _canonical(parsed.query, body)) in fake.recorded:
+            status, payload = fake.recorded[(method, parsed.path, _canonical(parsed.query, body))]
+        else:
+            status, payload = fake.dispatch(parsed.path, parse_qs(parsed.query) if body is None else body, dict(self.headers), method)
+
+        content = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        if limited:
+            self.send_header("X-RateLimit-Remaining", str(remaining))
+            self.send_header("X-RateLimit-Reset", "%.3f" % reset)
+        if "gzip" in self.headers.get("Accept-Encoding", ""):
+            content = gzip.compress(content)
+            self.send_header("Content-Encoding", "gzip")
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+
+class FakeQuestrade(object):
+    """A threaded HTTP server, answering like the Questrade API and login server.
+    Extra endpoints can be registered with route(), and take priority over the defaults.
+    """
+
+    def __init__(self, host: str="127.0.0.1", port: int=0, latency: float=0.0, accounts: int=3, rate_limit: int=None, rate_window: float=1.0,
+                 token_ttl: float=1800, strict: bool=False, jitter: float=0.0, error_rate: float=0.0, seed: int=None):
+        """Constructor
+        host, port - The address to listen on. Port 0 picks a free port.
+        latency - Seconds to sleep before answering each request.
+        accounts - The number of trading accounts to serve.
+        rate_limit - If set, the number of API requests allowed per rate_window seconds. Responses
+                     carry Questrade's rate limit headers, and requests over the limit get a 429.
+        token_ttl - Seconds access tokens are valid for.
+        strict - If set, like Questrade, refresh tokens can only be used once, and API requests
+                 without a valid, unexpired access token, sent to the API server it was issued
+                 with, get a 401.
+        jitter - Up to this many seconds, drawn at random, are added to latency, for a spread of response times.
+        error_rate - The fraction of API requests answered with a 500 error, at random.
+        seed - The seed of the random jitter and errors, to repeat a run.
+        """
+        self.token_ttl = token_ttl
+        # the API server handed out with new tokens, if not this one, or a callable returning it for every login
+        self.api_server = None
+        self.strict = strict
+        self.logins = 0
+        self.refused = 0
+        self.misdirected = 0
+        self._issued = {}
+        self._hosts = {}
+        self._spent = set()
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.errors = 0
+        self.recorded = {}
+        self._random = random.Random(seed)
+        self.rate_limit = rate_limit
+        self.rate_window = rate_window
+        self.rejected = 0
+        self._window_reset = None
+        self._window_count = 0
+        self.accounts = [10000001 + n for n in range(accounts)]
+        self.stream = None
+        self.requests = 0
+        self.connections = 0
+        self._lock = threading.Lock()
+        self._thread = None
+        self.routes = [
+            (r"/oauth2/token", self._token),
+            (r"/v1/time", self._time),
+            (r"/v1/markets/quotes", self._quotes),
+            (r"/v1/symbols/?", self._symbols),
+            (r"/v1/symbols/search", self._search),
+            (r"/v1/symbols/(\d+)/options", self._option_chain),
+            (r"/v1/markets/candles/(\d+)", self._candles),
+            (r"/v1/accounts", self._accounts),
+            (r"/v1/accounts/(\d+)/positions", self._positions),
+            (r"/v1/accounts/(\d+)/balances", self._balances),
+            (r"/v1/accounts/(\d+)/activities/?", self._dated(activity, "activities")),
+            (r"/v1/accounts/(\d+)/executions", self._dated(execution, "executions")),
+            (r"/v1/accounts/(\d+)/orders", self._dated(order, "orders")),
+        ]
+        self.post_routes = [
+            (r"/v1/markets/quotes/options", self._option_quotes),
+        ]
+
+        self.httpd = ThreadingHTTPServer((host, port), _Handler)
+        self.httpd.daemon_threads = True
+        self.httpd.fake = self
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return "http://%s:%d/" % (host, port)
+
+    @property
+    def login_url(self):
+        return self.url + "oauth2/token"
+
+    def route(self, pattern: str, handler: callable, method: str="GET"):
+        """Serve paths fully matching the regular expression pattern with handler.
+        The handler is called as handler(match, query, headers) and returns (status, payload).
+        For POST requests, the decoded JSON body is passed as the query.
+        """
+        routes = self.post_routes if method == "POST" else self.routes
+        routes.insert(0, (pattern, handler))
+
+    def dispatch(self, path: str, query: dict, headers: dict, method: str="GET"):
+        for pattern, handler in self.post_routes if method == "POST" else self.routes:
+            m = re.fullmatch(pattern, path)
+            if m is not None:
+                return handler(m, query, headers)
+        return 404, {"code": 1001, "message": "Not found: %s" % path}
+
+    def replay(self, path: str):
+        """Serve the responses recorded by a RecordingTransport to path, for the calls they answer.
+        Other calls are still answered with synthetic responses.
+        """
+        with open(path) as fp:
+            for line in fp:
+                r = json.loads(line)
+                self.recorded[(r["method"], r["path"], _canonical(r["query"], r["body"]))] = (r["status"], r["response"])
+
+    def _delay(self):
+        if not self.jitter:
+            return self.latency
+        with self._lock:
+            return self.latency + self._random.uniform(0, self.jitter)
+
+    def _fail(self):
+        """Returns True if a request should get an injected error."""
+        if not self.error_rate:
+            return False
+        with self._lock:
+            failed = self._random.random() < self.error_rate
+            if failed:
+                self.errors += 1
+            return failed
+
+    def _take(self):
+        """Count a request against the rate limit, returning (allowed, remaining, reset time)."""
+        with self._lock:
+            now = time.time()
+            if self._window_reset is None or now >= self._window_reset:
+                self._window_reset = now + self.rate_window
+                self._window_count = 0
+            self._window_count += 1
+            allowed = self._window_count <= self.rate_limit
+            if not allowed:
+                self.rejected += 1
+            return allowed, max(0, self.rate_limit - self._window_count), self._window_reset
+
+    def _count(self, attr: str):
+        with self._lock:
+            setattr(self, attr, getattr(self, attr) + 1)
+
+    def _authorized(self, headers):
+        """Returns True if the request carries a valid access token, or tokens aren't checked."""
+        if not self.strict:
+            return True
+        token = headers.get("Authorization", "")[len("Bearer "):]
+        with self._lock:
+            misdirected = self._hosts.get(token) not in (None, headers.get("Host"))
+            valid = self._issued.get(token, 0) > time.time() and not misdirected
+            if misdirected:
+                self.misdirected += 1
+            if not valid:
+                self.refused += 1
+            return valid
+
+    def _token(self, m, query, headers):
+        refresh_token = query.get("refresh_token", [""])[0]
+        with self._lock:
+            if self.strict and refresh_token in self._spent:
+                return 400, {"code": 1002, "message": "Bad Request"}
+            self._spent.add(refresh_token)
+            api_server = self.api_server() if callable(self.api_server) else self.api_server or self.url
+            self._issued["access-%s" % refresh_token] = time.time() + self.token_ttl
+            self._hosts["access-%s" % refresh_token] = urlparse(api_server).netloc
+            self.logins += 1
+        return 200, {
+            "access_token": "access-%s" % refresh_token,
+            "refresh_token": "refresh-%s" % refresh_token,
+            "expires_in": self.token_ttl,
+            "token_type": "Bearer",
+            "api_server": api_server,
+        }
+
+    def _time(self, m, query, headers):
+        return 200, {"time": "2020-01-02T12:00:00.000000-05:00"}
+
+    def _quotes(self, m, query, headers):
+        ids = [int(i) for i in query.get("ids", [""])[0].split(",") if i]
+        if query.get("stream", [""])[0] == "true":
+            if self.stream is None:
+                return 400, {"code": 1002, "message": "Streaming is not available"}
+            return 200, {"streamPort": self.stream.subscribe(ids)}
+        return 200, {"quotes": [quote(i) for i in ids]}
+
+    def _symbols(self, m, query, headers):
+        if "names" in query:
+            names = query["names"][0].split(",")
+            return 200, {"symbols": [symbol(1000 + n, name) for n, name in enumerate(names)]}
+        ids = [int(i) for i in query.get("ids", [""])[0].split(",") if i]
+        return 200, {"symbols": [symbol(i) for i in ids]}
+
+    def _search(self, m, query, headers):
+        prefix = query.get("prefix", [""])[0].upper()
+        return 200, {"symbols": [search_result(2000 + n, prefix + c) for n, c in enumerate("ABC")]}
+
+    def _candles(self, m, query, headers):
+        from questradeist.symbol import Symbol
+
+        step = Symbol.INTERVALS.get(query.get("interval", [""])[0])
+        if step is None:
+            return 400, {"code": 1002, "message": "Invalid interval"}
+
+        start = datetime.datetime.fromisoformat(query["startTime"][0][:19])
+        end = datetime.datetime.fromisoformat(query["endTime"][0][:19])
+        if (end - start) // step + 1 > Symbol.MAX_CANDLES:
+            return 400, {"code": 1003, "message": "Argument length exceeds imposed limit"}
+
+        count = (end - start) // step + 1
+        return 200, {"candles": [candle(int(m.group(1)), start + n * step, step) for n in range(count)]}
+
+    def _accounts(self, m, query, headers):
+        return 200, {"accounts": [account(n) for n in self.accounts], "userId": 1}
+
+    def _positions(self, m, query, headers):
+        number = int(m.group(1))
+        return 200, {"positions": [position(number % 100 + n) for n in range(1, 6)]}
+
+    def _balances(self, m, query, headers):
+        balances = [balance("CAD"), balance("USD")]
+        return 200, {
+            "perCurrencyBalances": balances,
+            "combinedBalances": balances,
+            "sodPerCurrencyBalances": balances,
+            "sodCombinedBalances": balances,
+        }
+
+    def _option_chain(self, m, query, headers):
+        return 200, {"optionChain": option_chain(int(m.group(1)))}
+
+    def _option_quotes(self, m, body, headers):
+        ids = list(body.get("optionIds", []))
+        for f in body.get("filters", []):
+            for expiry in option_chain(f["underlyingId"]):
+                if expiry["expiryDate"][:10] != f["expiryDate"][:10]:
+                    continue
+                for strike in expiry["chainPerRoot"][0]["chainPerStrikePrice"]:
+                    if strike["strikePrice"] < f.get("minstrikePrice", 0) or strike["strikePrice"] > f.get("maxstrikePrice", float("inf")):
+                        continue
+                    if f.get("optionType") != "Put":
+                        ids.append(strike["callSymbolId"])
+                    if f.get("optionType") != "Call":
+                        ids.append(strike["putSymbolId"])
+        return 200, {"optionQuotes": [option_quote(i) for i in ids]}
+
+    def _dated(self, make: callable, key: str):
+        """A handler returning one element per day in the startTime to endTime range,
+        inclusive. Like Questrade, it refuses ranges wider than 31 days.
+        """
+        def handler(m, query, headers):
+            if "startTime" not in query:
+                end = datetime.date(2020, 1, 31)
+                return 200, {key: [make(end - datetime.timedelta(days=n)) for n in range(5)]}
+
+            start = datetime.date.fromisoformat(query["startTime"][0][:10])
+            end = datetime.date.fromisoformat(query["endTime"][0][:10])
+            if (end - start).days > 31:
+                return 400, {"code": 1003, "message": "Argument length exceeds imposed limit"}
+            return 200, {key: [make(start + datetime.timedelta(days=n)) for n in range((end - start).days + 1)]}
+        return handler
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, args=(0.05,), daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *args):
+        self.stop()
+
+
+def _canonical(query: str, body: dict):
+    """The part of a request, other than its method and path, telling recorded responses apart."""
+    return query if body is None else json.dumps(body, sort_keys=True)
+
+
+class RecordingTransport(PooledTransport):
+    """A transport recording every response it receives to a file, as JSON lines, for a
+    FakeQuestrade to replay. Only the path, query and body of requests are kept, never headers.
+
+        sym = Symbol(refresh_token=token, transport=RecordingTransport("recorded.jsonl"))
+    """
+
+    def __init__(self, path: str, **kwargs):
+        PooledTransport.__init__(self, **kwargs)
+        self.path = path
+        self._lock = threading.Lock()
+
+    def get(self, url: str, headers: dict=None):
+        return self._record("GET", url, None, PooledTransport.get(self, url, headers=headers))
+
+    def post(self, url: str, body: dict, headers: dict=None):
+        return self._record("POST", url, body, PooledTransport.post(self, url, body, headers=headers))
+
+    def _record(self, method: str, url: str, body: dict, r):
+        try:
+            response = r.json()
+        except ValueError:
+            # not an API response, such as a proxy's error page
+            return r
+        parsed = urlparse(url)
+        line = json.dumps({"method": method, "path": parsed.path, "query": parsed.query, "body": body,
+                           "status": r.status_code, "response": response})
+        with self._lock, open(self.path, "a") as fp:
+            fp.write(line + "\n")
+        return r
+
+
+class FakeStream(object):
+    """A WebSocket server pushing quotes like Questrade's streaming server. Attach it
+    to a FakeQuestrade as its stream, and streaming port requests are answered with
+    its port. Every connection first gets the full quote of each subscribed symbol,
+    then partial updates, holding only the changed fields, every interval seconds.
+    Requires aiohttp.
+    """
+
+    def __init__(self, host: str="127.0.0.1", interval: float=0.01, reject: set=None):
+        """Constructor
+        host - The address to listen on.
+        interval - Seconds between updates.
+        reject - Access tokens answered with an invalid token error.
+        """
+        self.host = host
+        self.port = None
+        self.interval = interval
+        self.reject = set(reject or ())
+        self.ids = []
+        self.connections = 0
+        self.tokens = []
+        self._sockets = set()
+        self._loop = None
+        self._runner = None
+        self._thread = None
+
+    def subscribe(self, ids: list):
+        """Stream ids to the next connections, returning the port to connect to."""
+        self.ids = list(ids)
+        return self.port
+
+    def drop(self):
+        """Close every open connection, as if the network failed."""
+        async def close():
+            for ws in list(self._sockets):
+                await ws.close()
+        asyncio.run_coroutine_threadsafe(close(), self._loop).result()
+
+    async def _handle(self, request):
+        from aiohttp import web
+
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        self.connections += 1
+        self._sockets.add(ws)
+        ids = self.ids
+        try:
+            token = await ws.receive_str()
+            self.tokens.append(token)
+            if token in self.reject:
+                await ws.send_json({"code": 1017, "message": "Access token is invalid"})
+                return ws
+
+            await ws.send_json({"success": True})
+            await ws.send_json({"quotes": [quote(i) for i in ids]})
+
+            async def push():
+                n = 0
+                while not ws.closed:
+                    await asyncio.sleep(self.interval)
+                    n += 1
+                    await ws.send_json({"quotes": [{"symbolId": i, "lastTradePrice": quote(i)["lastTradePrice"] + n / 100.0, "volume": 1000 + n} for i in ids]})
+
+            # keep reading, so that a close from the client is answered
+            pusher = asyncio.ensure_future(push())
+            async for msg in ws:
+                pass
+            pusher.cancel()
+        except (ConnectionError, RuntimeError, TypeError):
+            # the client went away mid-send
+            pass
+        finally:
+            self._sockets.discard(ws)
+            await ws.close()
+        return ws
+
+    async def _start(self):
+        from aiohttp import web
+
+        app = web.Application()
+        app.router.add_get("/", self._handle)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, 0)
+        await site.start()
+        self.port = self._runner.addresses[0][1]
+
+    def start(self):
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, daemon=True)
+        self._thread.start()
+        asyncio.run_coroutine_threadsafe(self._start(), self._loop).result()
+        return self
+
+    def stop(self):
+        asyncio.run_coroutine_threadsafe(self._runner.cleanup(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *args):
+        self.stop()
@@ -1,2 +1,3 @@
 from .account import Account  # noqa
-from .symbol import Symbol  # noqa
\ No newline at end of file
+from .symbol import Symbol  # noqa
+from .aio import AsyncAccount, AsyncSymbol  # noqa
\ No newline at end of file
@@ -1,38 +1,51 @@
 from .questrade import Questrade, to_datestring
 import datetime
+from concurrent.futures import ThreadPoolExecutor
 from typing import Optional
 from urllib.parse import urljoin
+from .batch import chunked, day_windows
+from .portfolio import Portfolio
+from .symbol import Symbol
 from .types import *
 
 
 class Account(Questrade):
     """This class communicates with the Questrade Account APIs, in order to retrieve
     accunt-specific data.
+
+    Calls taking a start and end time accept any range. Ranges wider than WINDOW are
+    split into windows of whole days the API accepts, fetched concurrently, and merged in
+    time order. Windows don't share a day, so every entry is fetched once.
     """
 
+    # the widest startTime/endTime range the API accepts in a single call
+    WINDOW = datetime.timedelta(days=30)
+
     def __init__(self, **kwargs):
         Questrade.__init__(self, **kwargs)
 
-    def get_all(self, raw: Optional[bool]=False):
+    def get_all(self, raw: Optional[bool]=False, format: Optional[str]=None):
         """Returns the list of accounts associated.
         https://www.questrade.com/api/documentation/rest-operations/account-calls/accounts
 
         raw - If set, return the raw JSON rather than objects of qtype.
+        format - If set to "columnar", return a dictionary of NumPy arrays, one per field, or if set to "lazy", views reading fields on access, rather than objects of qtype.
         """
         url = urljoin(self.server, "/v1/accounts")
-        return self._request(url, qtype=TradingAccount, key="accounts", raw=raw)
+        return self._cached_request("accounts", url, qtype=TradingAccount, key="accounts", raw=raw, format=format)
 
-    def positions(self, id: int, raw: Optional[bool]=False):
+    def positions(self, id: int, raw: Optional[bool]=False, format: Optional[str]=None):
         """Return positions held by the specified account.
         https://www.questrade.com/api/documentation/rest-operations/account-calls/accounts-id-positions
 
         id - An integer containing the account ID.
         raw - If set, return the raw JSON rather than objects of qtype.
+        format - If set to "columnar", return a dictionary of NumPy arrays, one per field, or if set to "lazy", views reading fields on access, rather than objects of qtype.
         """
         url = urljoin(self.server, "/v1/accounts/%d/positions" % id)
-        return self._request(url, qtype=AccountPosition, key="positions", raw=raw)
+        return self._request(url, qtype=AccountPosition, key="positions", raw=raw, format=format)
 
-    def activities(self, id: int, start: datetime.datetime, end: datetime.datetime, raw: Optional[bool]=False):
+    def activities(self, id: int, start: datetime.datetime, end: datetime.datetime, raw: Optional[bool]=False, stream: Optional[bool]=False, format: Optional[str]=None):
         """Return the account activities - actions including buys, sells, and dividends, amongst other things.
         https://www.questrade.com/api/documentation/rest-operations/account-calls/accounts-id-activities
 
@@ -40,18 +53,17 @@ class Account(Questrade):
         start - The start time of transactions
         end - The end time of the transactons
         raw - If set, return the raw JSON rather than objects of qtype.
+        stream - If set, return a generator yielding the results of each window as it arrives.
+        format - If set to "columnar", return a dictionary of NumPy arrays, one per field, or if set to "lazy", views reading fields on access, rather than objects of qtype.
         """
-        if start > end:
-            start_date = to_datestring(end)
-            end_date = to_datestring(start)
-        else:
-            start_date = to_datestring(start)
-            end_date = to_datestring(end)
+        def url_for(window):
+            start_date, end_date = to_datestring(window[0]), to_datestring(window[1])
+            return urljoin(self.server, "/v1/accounts/%d/activities/?startTime=%s&endTime=%s" % (id, start_date, end_date))
 
-        url = urljoin(self.server, "/v1/accounts/%d/activities/?startTime=%s&endTime=%s" % (id, start_date, end_date))
-        return self._request(url, qtype=AccountActivity, key="activities", raw=raw)
+        chunks = day_windows(start, end, self.WINDOW)
+        return self._windowed(chunks, url_for, AccountActivity, "activities", raw, stream, unique=None, format=format)
 
-    def executions(self, id: int, start: Optional[datetime.datetime]=None, end: Optional[datetime.datetime]=None, raw: Optional[bool]=False):
+    def executions(self, id: int, start: Optional[datetime.datetime]=None, end: Optional[datetime.datetime]=None, raw: Optional[bool]=False, stream: Optional[bool]=False, format: Optional[str]=None):
         """Return the account executions - actions including buys, sells, and dividends, amongst other things.
         https://www.questrade.com/api/documentation/rest-operations/account-calls/accounts-id-executions
 
@@ -59,59 +71,105 @@ class Account(Questrade):
         start - The start time of transactions
         end - The end time of the transactons
         raw - If set, return the raw JSON rather than objects of qtype.
+        stream - If set, return a generator yielding the results of each window as it arrives.
+        format - If set to "columnar", return a dictionary of NumPy arrays, one per field, or if set to "lazy", views reading fields on access, rather than objects of qtype.
         """
+        def url_for(window):
+            if window is None:
+                return urljoin(self.server, "/v1/accounts/%d/executions" % id)
+            start_date, end_date = to_datestring(window[0]), to_datestring(window[1])
+            return urljoin(self.server, "/v1/accounts/%d/executions?startTime=%s&endTime=%s" % (id, start_date, end_date))
 
-        if start is None:
-            url = urljoin(self.server, "/v1/accounts/%d/executions" % id)
-            return self._request(url, qtype=AccountExecution, key="executions", raw=raw)
-
-        start_date, end_date = None, None
-        if start > end:
-            start_date = to_datestring(end)
-            end_date = to_datestring(start)
-        else:
-            start_date = to_datestring(start)
-            end_date = to_datestring(end)
-
-        url = urljoin(self.server, "/v1/accounts/%d/executions?startTime=%s&endTime=%s" % (id, start_date, end_date))
-        return self._request(url, qtype=AccountExecution, key="executions", raw=raw)
+        chunks = [None] if start is None else day_windows(start, end, self.WINDOW)
+        return self._windowed(chunks, url_for, AccountExecution, "executions", raw, stream, unique=lambda r: r["id"], format=format)
 
-    def balances(self, id: int, raw: Optional[bool]=False):
+    def balances(self, id: int, raw: Optional[bool]=False, format: Optional[str]=None):
         """Return the cash balances associated with the questrade account.
         https://www.questrade.com/api/documentation/rest-operations/account-calls/accounts-id-balances
 
         id - An integer containing the account ID.
         raw - If set, return the raw JSON rather than objects of qtype.
+        format - If set to "columnar", return a dictionary of NumPy arrays, one per field, or if set to "lazy", views reading fields on access, rather than objects of qtype.
         """
 
         url = urljoin(self.server, "/v1/accounts/%d/balances" % id)
-        return self._request(url, qtype=CurrencyBalance, key="perCurrencyBalances", raw=raw)
+        return self._request(url, qtype=CurrencyBalance, key="perCurrencyBalances", raw=raw, format=format)
 
-    def orders(self, id: int, start: Optional[datetime.datetime]=None, end: Optional[datetime.datetime]=None, state: Optional[str]='All', raw: Optional[bool]=False):
+    def orders(self, id: int, start: Optional[datetime.datetime]=None, end: Optional[datetime.datetime]=None, state: Optional[str]='All', raw: Optional[bool]=False, stream: Optional[bool]=False, format: Optional[str]=None):
         """Return the account executions - actions including buys, sells, and dividends, amongst other things.
         https://www.questrade.com/api/documentation/rest-operations/account-calls/accounts-id-orders
 
         id - An integer containing the account ID.
         start - The start time of transactions
         end - The end time of the transactons
+        state - One of All, Open or Closed.
         raw - If set, return the raw JSON rather than objects of qtype.
+        stream - If set, return a generator yielding the results of each window as it arrives.
+        format - If set to "columnar", return a dictionary of NumPy arrays, one per field, or if set to "lazy", views reading fields on access, rather than objects of qtype.
         """
 
         valid_states = ['All', 'Open', 'Closed']
         if state not in valid_states:
             raise AttributeError("Invalid state. State must be one of %s" % valid_states)
 
-        if start is None:
-            url = urljoin(self.server, "/v1/accounts/%d/orders&stateFilter=%s" % (id, state))
-            return self._request(url, qtype=Order, key="orders", raw=raw)
+        def url_for(window):
+            if window is None:
+                return urljoin(self.server, "/v1/accounts/%d/orders?stateFilter=%s" % (id, state))
+            start_date, end_date = to_datestring(window[0]), to_datestring(window[1])
+            return urljoin(self.server, "/v1/accounts/%d/orders?startTime=%s&endTime=%s&stateFilter=%s" % (id, start_date, end_date, state))
 
-        start_date, end_date = None, None
-        if start > end:
-            start_date = to_datestring(end)
-            end_date = to_datestring(start)
-        else:
-            start_date = to_datestring(start)
-            end_date = to_datestring(end)
+        chunks = [None] if start is None else day_windows(start, end, self.WINDOW)
+        return self._windowed(chunks, url_for, Order, "orders", raw, stream, unique=lambda r: r["id"], format=format)
 
-        url = urljoin(self.server, "/v1/accounts/%d/orders?startTime=%s&endTime=%s" % (id, start_date, end_date))
-        return self._request(url, qtype=Order, key="orders", raw=raw)
\ No newline at end of file
+    def snapshot(self, ids: Optional[list]=None, raw: Optional[bool]=False):
+        """Returns the positions and balances of several accounts, with a live quote for every
+        symbol held, as a portfolio.Portfolio.
+
+        ids - A list of account IDs. Defaults to every account.
+        raw - If set, return the raw JSON, as a dictionary of accounts, positions, balances and quotes.
+
+        The positions and balances of every account are requested concurrently. As soon as
+        the positions are in, the symbols held in any account are requested once each, in
+        batched quote calls. If ids are given, the account list is requested alongside the
+        positions, so a snapshot takes two round trips.
+        """
+        with ThreadPoolExecutor(max_workers=self.MAX_WORKERS) as pool:
+            if ids is None:
+                accounts = self.get_all(raw=True)
+                ids = [int(a["number"]) for a in accounts["accounts"]]
+            else:
+                accounts = pool.submit(self.get_all, raw=True)
+
+            positions = {id: pool.submit(self.positions, id, raw=True) for id in ids}
+            balances = {id: pool.submit(self.balances, id, raw=True) for id in ids}
+            positions = {id: f.result() for id, f in positions.items()}
+
+            symbol_ids = self._held(positions)
+            quotes = self._request_all(chunked(symbol_ids, Symbol.CHUNK_SIZE), self._quotes_url, qtype=Quote, key="quotes", raw=True) if symbol_ids else {"quotes": []}
+
+            balances = {id: f.result() for id, f in balances.items()}
+            if not isinstance(accounts, dict):
+                accounts = accounts.result()
+
+        return self._portfolio(ids, accounts, positions, balances, quotes, raw)
+
+    def _held(self, positions: dict):
+        """The ids of the symbols in raw positions responses, once each, in the order first held."""
+        return list(dict.fromkeys(p["symbolId"] for r in positions.values() for p in r["positions"]))
+
+    def _portfolio(self, ids: list, accounts: dict, positions: dict, balances: dict, quotes: dict, raw: bool):
+        """Join the raw responses making up a snapshot."""
+        wanted = set(ids)
+        data = {
+            "accounts": [a for a in accounts["accounts"] if int(a["number"]) in wanted],
+            "positions": positions,
+            "balances": balances,
+            "quotes": quotes["quotes"],
+        }
+        return data if raw else Portfolio(data)
+
+    def _windowed(self, chunks: list, url_for: callable, qtype: QuestradeType, key: str, raw: bool, stream: bool, unique: callable, format: str=None):
+        """Fetch every window of a date-ranged call, as one list or as a generator of per-window results."""
+        if stream:
+            return self._iter_all(chunks, url_for, qtype=qtype, key=key, raw=raw, unique=unique, format=format)
+        return self._request_all(chunks, url_for, qtype=qtype, key=key, raw=raw, unique=unique, format=format)
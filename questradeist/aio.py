@@ -0,0 +1,383 @@
+import asyncio
+import threading
+import time
+from collections import deque
+from .account import Account
+from .batch import BatchError, chunked
+from .metrics import RequestEvent
+from .questrade import Questrade, _no_body, loads
+from .symbol import Symbol
+from .types import QuestradeType, Quote
+
+try:
+    import aiohttp
+except ImportError:  # pragma: no cover
+    aiohttp = None
+
+
+class AsyncTransport(object):
+    """The asyncio counterpart to transport.PooledTransport. It holds an aiohttp
+    session, whose connection pool is shared by every AsyncSymbol and AsyncAccount
+    using this transport.
+
+    aiohttp sessions are bound to the event loop that created them, so there is one
+    session per event loop. The sessions of loops that have since closed, such as those
+    of earlier asyncio.run calls, are closed as soon as the transport is used again.
+    """
+
+    def __init__(self, pool_size: int=100, timeout: float=30.0, compress: bool=True):
+        """Constructor
+        pool_size - The maximum number of connections open at once, per event loop.
+        timeout - Seconds to wait for the server to connect and respond.
+        compress - If set, ask the server for a gzip/deflate compressed response.
+        """
+        if aiohttp is None:
+            raise ImportError("aiohttp is required for asyncio support. Install questradeist[async].")
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.headers = {"Accept-Encoding": "gzip, deflate" if compress else "identity"}
+        self._sessions = {}
+        self._lock = threading.Lock()
+
+    async def _get_session(self):
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            stale = [self._sessions.pop(other) for other in list(self._sessions) if other.is_closed()]
+            session = self._sessions.get(loop)
+            if session is None or session.closed:
+                connector = aiohttp.TCPConnector(limit=self.pool_size)
+                session = self._sessions[loop] = aiohttp.ClientSession(connector=connector, headers=self.headers,
+                                                                       timeout=aiohttp.ClientTimeout(total=self.timeout))
+        for old in stale:
+            await _close(old)
+        return session
+
+    async def get(self, url: str, headers: dict=None):
+        """Issue a GET request, returning a tuple of (status, response headers, body bytes)."""
+        async with (await self._get_session()).get(url, headers=headers) as r:
+            return r.status, r.headers, await r.read()
+
+    async def post(self, url: str, body: dict, headers: dict=None):
+        """Issue a POST request with a JSON body, returning a tuple of (status, response headers, body bytes)."""
+        async with (await self._get_session()).post(url, json=body, headers=headers) as r:
+            return r.status, r.headers, await r.read()
+
+    async def close(self):
+        """Close the session of the running event loop, and those of closed loops, with every pooled connection."""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            sessions = [self._sessions.pop(other) for other in list(self._sessions) if other is loop or other.is_closed()]
+        for session in sessions:
+            await _close(session)
+
+
+async def _close(session):
+    """Close an aiohttp session, which may belong to an event loop that has closed."""
+    if session.closed:
+        return
+    try:
+        await session.close()
+    except RuntimeError:
+        # the connections of a closed loop can't be closed from another; they're dropped
+        pass
+
+
+_default = None
+_default_lock = threading.Lock()
+
+
+def default_async_transport():
+    """Returns the process-wide AsyncTransport, shared by every async object
+    that wasn't given a transport of its own.
+    """
+    global _default
+    with _default_lock:
+        if _default is None:
+            _default = AsyncTransport()
+    return _default
+
+
+class AsyncQuestrade(Questrade):
+    """The base class for asyncio Questrade operations. Methods inherited from
+    Symbol and Account return awaitables, rather than results.
+
+    Authentication happens synchronously, once, in the constructor.
+    """
+
+    def __init__(self, async_transport: AsyncTransport=None, **kwargs):
+        Questrade.__init__(self, **kwargs)
+        if async_transport is None:
+            async_transport = default_async_transport()
+        self.async_transport = async_transport
+
+    async def _request(self, url: str, qtype: QuestradeType, key: str=None, raw: bool=False, format: str=None, body: dict=None):
+        """This is the asyncio request wrapper. It's meant to be called by other functions.
+        qtype - The types.Questrade object that should be used for deserializing data.
+        key - A string, containing the key within the Questrade API response, that contains the response elements.
+        raw - If set, return the raw JSON rather than objects of qtype.
+        format - If set to "columnar", return a dictionary of NumPy arrays, one per field, or if set to "lazy", views reading fields on access, rather than objects of qtype.
+        body - If set, the request is a POST, sending body as JSON.
+        """
+        event = RequestEvent(url, "GET" if body is None else "POST") if self.hooks else None
+        try:
+            loop = asyncio.get_running_loop()
+            auth = self.credentials.auth
+            if self.credentials.expiring(auth):
+                auth = await loop.run_in_executor(None, self.credentials.current)
+            url = self._rebase(url, auth)
+
+            status, content = await self._send(url, {"Authorization": "Bearer %s" % auth.ACCESS_TOKEN}, body, event)
+            if status != 200:
+
+                # at least try to trigger a refresh if authentication fails.
+                if self._unauthorized(status, auth):
+                    fresh = await loop.run_in_executor(None, self.credentials.refresh, auth)
+                    status, content = await self._send(self._rebase(url, fresh), {"Authorization": "Bearer %s" % fresh.ACCESS_TOKEN}, body, event)
+                    if status != 200:
+                        raise OSError(content.decode('utf-8'))
+                else:
+                    raise OSError(content.decode('utf-8'))
+
+            if event is None:
+                return self._deserialize(loads(content), qtype, key, raw, format)
+            return self._measured(event, content, qtype, key, raw, format)
+        except Exception as e:
+            if event is not None:
+                event.error = e
+            raise
+        finally:
+            if event is not None:
+                self._emit(event)
+
+    async def _send(self, url: str, headers: dict, body: dict=None, event: RequestEvent=None):
+        """The asyncio counterpart to Questrade._send, returning a tuple of (status, body bytes)."""
+        attempt = 0
+        while True:
+            try:
+                if self.hedge_after is not None:
+                    status, content = await self._hedged(url, headers, body, event)
+                else:
+                    status, content = await self._get(url, headers, body, event)
+            except Exception as e:
+                if not self.retry.retry_error(e, attempt):
+                    raise
+            else:
+                if not self.retry.retry_status(status, attempt):
+                    return status, content
+
+            await asyncio.sleep(self.retry.delay(attempt))
+            attempt += 1
+
+    async def _hedged(self, url: str, headers: dict, body: dict=None, event: RequestEvent=None):
+        """The asyncio counterpart to Questrade._hedged."""
+        on_wire = asyncio.Event()
+        tasks = [asyncio.ensure_future(self._get(url, headers, body, event, on_wire))]
+        while True:
+            waiter = asyncio.ensure_future(on_wire.wait())
+            await asyncio.wait([waiter, tasks[0]], timeout=self.hedge_after, return_when=asyncio.FIRST_COMPLETED)
+            waiter.cancel()
+            if tasks[0].done():
+                break
+            if not on_wire.is_set():
+                continue
+            done, _ = await asyncio.wait(tasks, timeout=self.hedge_after)
+            if done:
+                break
+            if on_wire.is_set():
+                tasks.append(asyncio.ensure_future(self._get(url, headers, body, event)))
+                break
+
+        try:
+            while True:
+                done, pending = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                for t in done:
+                    if t.exception() is None:
+                        return t.result()
+                if not pending:
+                    return tasks[0].result()
+                tasks = list(pending)
+        finally:
+            for t in tasks:
+                t.cancel()
+
+    async def _get(self, url: str, headers: dict, body: dict=None, event: RequestEvent=None, on_wire: asyncio.Event=None):
+        """The asyncio counterpart to Questrade._get, returning a tuple of (status, body bytes)."""
+        while True:
+            if on_wire is not None:
+                on_wire.clear()
+            delay = self.rate_limiter.reserve(url)
+            if delay > 0:
+                await asyncio.sleep(delay)
+            if event is not None:
+                sent = time.perf_counter()
+            if on_wire is not None:
+                on_wire.set()
+            if body is None:
+                status, response_headers, content = await self.async_transport.get(url, headers=headers)
+            else:
+                status, response_headers, content = await self.async_transport.post(url, body, headers=headers)
+            if event is not None:
+                event.attempts += 1
+                event.wait += max(delay, 0.0)
+                event.transfer += time.perf_counter() - sent
+                event.response(status, response_headers, int(response_headers.get("Content-Length", len(content))))
+            self.rate_limiter.update(url, status, response_headers)
+            if status != 429:
+                return status, content
+
+    async def _cached_request(self, endpoint: str, url: str, qtype: QuestradeType, key: str=None, raw: bool=False, format: str=None):
+        """The asyncio counterpart to Questrade._cached_request."""
+        ttl = self._ttl(endpoint)
+        if ttl is None:
+            return await self._request(url, qtype=qtype, key=key, raw=raw, format=format)
+
+        ckey = self._url_key(endpoint, url)
+        data = self.cache.get(ckey)
+        if data is None:
+            data = await self._request(url, qtype=qtype, key=key, raw=True)
+            self.cache.set(ckey, data, ttl)
+        return self._deserialize(data, qtype, key, raw, format)
+
+    async def _request_each(self, endpoint: str, items: list, chunk_size: int, url_for: callable, qtype: QuestradeType, key: str, field: str, raw: bool=False, format: str=None):
+        """The asyncio counterpart to Questrade._request_each."""
+        ttl = self._ttl(endpoint)
+        if ttl is None:
+            return await self._request_all(chunked(items, chunk_size), url_for, qtype=qtype, key=key, raw=raw, format=format)
+
+        found, missing = self._cache_lookup(endpoint, items)
+        if missing:
+            data = await self._request_all(chunked(missing, chunk_size), url_for, qtype=qtype, key=key, raw=True)
+            self._cache_store(endpoint, field, data[key], ttl, found)
+        return self._cache_merge(items, found, qtype, key, raw, format)
+
+    async def _request_all(self, chunks: list, url_for: callable, qtype: QuestradeType, key: str=None, raw: bool=False, unique: callable=None, format: str=None, body_for: callable=None):
+        """The asyncio counterpart to Questrade._request_all, keeping at most
+        MAX_WORKERS requests in flight.
+        """
+        if body_for is None:
+            body_for = _no_body
+
+        if len(chunks) == 1:
+            return await self._request(url_for(chunks[0]), qtype=qtype, key=key, raw=raw, format=format, body=body_for(chunks[0]))
+
+        fetch_raw = raw or unique is not None or format is not None
+        sem = asyncio.Semaphore(self.MAX_WORKERS)
+
+        async def fetch(c):
+            async with sem:
+                return await self._request(url_for(c), qtype=qtype, key=key, raw=fetch_raw, body=body_for(c))
+
+        done = await asyncio.gather(*[fetch(c) for c in chunks], return_exceptions=True)
+        parts, errors = [], []
+        for c, r in zip(chunks, done):
+            if isinstance(r, Exception):
+                errors.append((c, r))
+            else:
+                parts.append(r)
+
+        results = self._combine(parts, qtype, key, raw, unique, format)
+        if errors:
+            raise BatchError(results, errors)
+        return results
+
+    async def _iter_all(self, chunks: list, url_for: callable, qtype: QuestradeType, key: str=None, raw: bool=False, unique: callable=None, format: str=None):
+        """The asyncio counterpart to Questrade._iter_all, as an async generator."""
+        sem = asyncio.Semaphore(self.MAX_WORKERS)
+
+        async def fetch(c):
+            async with sem:
+                try:
+                    return c, await self._request(url_for(c), qtype=qtype, key=key, raw=True), None
+                except Exception as e:
+                    return c, None, e
+
+        seen = set()
+        tasks = [asyncio.ensure_future(fetch(c)) for c in chunks]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                c, data, error = await next_done
+                if error is not None:
+                    raise BatchError([] if not raw else {}, [(c, error)])
+                yield self._window(data, qtype, key, raw, unique, seen, format)
+        finally:
+            for t in tasks:
+                t.cancel()
+
+    async def _iter_ordered(self, chunks: list, url_for: callable, qtype: QuestradeType, key: str=None, raw: bool=False, unique: callable=None, max_workers: int=1):
+        """The asyncio counterpart to Questrade._iter_ordered, as an async generator."""
+        max_workers = max(1, max_workers)
+        chunks = iter(chunks)
+        previous = set()
+        pending = deque()
+
+        def submit():
+            for c in chunks:
+                pending.append((c, asyncio.ensure_future(self._request(url_for(c), qtype=qtype, key=key, raw=True))))
+                return
+
+        for _ in range(max_workers):
+            submit()
+
+        try:
+            while pending:
+                c, task = pending.popleft()
+                try:
+                    data = await task
+                except Exception as e:
+                    raise BatchError([], [(c, e)])
+                submit()
+
+                rows = data[key] if key is not None else data
+                if unique is not None:
+                    current = set(unique(r) for r in rows)
+                    rows = [r for r in rows if unique(r) not in previous]
+                    previous = current
+                for o in self._deserialize(rows, qtype, raw=raw):
+                    yield o
+        finally:
+            for _, task in pending:
+                task.cancel()
+
+    async def close(self):
+        """Close the async transport used by this object, unless it's the process-wide one, which
+        other objects may still be using. Close that with default_async_transport().close().
+        """
+        if self.async_transport is not _default:
+            await self.async_transport.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        await self.close()
+
+
+class AsyncSymbol(AsyncQuestrade, Symbol):
+    """Symbol, for asyncio. Every method has the same signature, and must be awaited."""
+
+    async def option_chain(self, id: int, raw: bool=False, format: str=None):
+        """The asyncio counterpart to Symbol.option_chain."""
+        return self._chain(await self._cached_request("options", self._options_url(id), qtype=None, key="optionChain", raw=True), raw, format)
+
+
+class AsyncAccount(AsyncQuestrade, Account):
+    """Account, for asyncio. Every method has the same signature, and must be awaited."""
+
+    async def snapshot(self, ids: list=None, raw: bool=False):
+        """The asyncio counterpart to Account.snapshot."""
+        if ids is None:
+            accounts = await self.get_all(raw=True)
+            ids = [int(a["number"]) for a in accounts["accounts"]]
+        else:
+            accounts = asyncio.ensure_future(self.get_all(raw=True))
+
+        balances = asyncio.gather(*[self.balances(id, raw=True) for id in ids])
+        positions = dict(zip(ids, await asyncio.gather(*[self.positions(id, raw=True) for id in ids])))
+
+        symbol_ids = self._held(positions)
+        quotes = await self._request_all(chunked(symbol_ids, Symbol.CHUNK_SIZE), self._quotes_url, qtype=Quote, key="quotes", raw=True) if symbol_ids else {"quotes": []}
+
+        balances = dict(zip(ids, await balances))
+        if not isinstance(accounts, dict):
+            accounts = await accounts
+        return self._portfolio(ids, accounts, positions, balances, quotes, raw)
@@ -0,0 +1,160 @@
+import datetime
+from .symbol import Symbol
+
+try:
+    import numpy
+except ImportError:  # pragma: no cover
+    numpy = None
+
+
+# Questrade's own day boundaries, as used by to_datestring
+UTC_OFFSET = datetime.timedelta(hours=-5)
+
+COLUMNS = ("START", "END", "LOW", "HIGH", "OPEN", "CLOSE", "VOLUME", "VWAP")
+
+
+def returns(candles: dict, log: bool=False):
+    """Returns the return of every candle over the one before it, from the closing prices.
+    The first is NaN.
+
+    candles - Columnar candles, as returned by Symbol.history(format="columnar").
+    log - If set, return log returns rather than simple returns.
+    """
+    close = _column(candles, "CLOSE")
+    out = numpy.full(len(close), numpy.nan)
+    if log:
+        out[1:] = numpy.diff(numpy.log(close))
+    else:
+        out[1:] = close[1:] / close[:-1] - 1.0
+    return out
+
+
+def sma(values, window: int):
+    """Returns the simple moving average of values over window elements. The first window - 1 are NaN.
+
+    values - An array, such as the CLOSE column of columnar candles.
+    window - The number of elements averaged.
+    """
+    _check_window(window)
+    return _rolling_sum(_floats(values), window) / window
+
+
+def rolling_vwap(candles: dict, window: int):
+    """Returns the volume weighted average price over the last window candles, at every candle.
+    The first window - 1 are NaN, as are windows without any volume.
+
+    candles - Columnar candles, as returned by Symbol.history(format="columnar").
+    window - The number of candles averaged.
+    """
+    price, volume = _column(candles, "VWAP"), _column(candles, "VOLUME")
+    _check_window(window)
+    traded = _rolling_sum(price * volume, window)
+    volume = _rolling_sum(volume, window)
+    return numpy.divide(traded, volume, out=numpy.full(len(volume), numpy.nan), where=volume > 0)
+
+
+def volatility(candles: dict, window: int, periods: float=None):
+    """Returns the standard deviation of log returns over the last window candles, at every candle.
+    The first window are NaN, as the first candle has no return.
+
+    candles - Columnar candles, as returned by Symbol.history(format="columnar").
+    window - The number of returns the deviation is taken over.
+    periods - If set, annualize the volatility, given the number of candles in a year, such as 252 for days.
+    """
+    _check_window(window, least=2)
+    r = returns(candles, log=True)
+    r[0] = 0.0
+    # returns are centred near zero, so sums of squares lose no precision to the mean
+    mean = _rolling_sum(r, window) / window
+    variance = (_rolling_sum(r * r, window) - window * mean * mean) / (window - 1)
+    out = numpy.sqrt(numpy.maximum(variance, 0.0))
+    out[:window] = numpy.nan
+    if periods is not None:
+        out *= numpy.sqrt(periods)
+    return out
+
+
+def resample(candles: dict, interval: str, utc_offset: datetime.timedelta=UTC_OFFSET):
+    """Build coarser candles out of finer ones, such as OneHour or OneDay candles out of OneMinute
+    candles, rather than requesting them. Returns columnar candles, with the columns of Candle.
+
+    candles - Columnar candles in time order, as returned by Symbol.history(format="columnar").
+    interval - The interval of the candles built, one of Symbol.INTERVALS.
+    utc_offset - The offset of the time zone whose days, weeks, months and years candles are built for.
+
+    Only intervals that are a multiple of the interval of candles give complete candles. Candles are
+    aligned like Questrade's: intervals of up to a day on multiples of the interval since midnight,
+    weeks on Mondays, and months and years on their first day.
+    """
+    if interval not in Symbol.INTERVALS:
+        raise AttributeError("Invalid interval. Interval must be one of %s" % list(Symbol.INTERVALS))
+
+    start = _column(candles, "START").astype("datetime64[us]")
+    if not len(start):
+        return {name: _column(candles, name)[:0] for name in COLUMNS}
+
+    offset = numpy.timedelta64(int(utc_offset.total_seconds() * 1000000), "us")
+    bucket, following = _buckets(start + offset, interval)
+
+    # candles are in time order, so each bucket is a run of candles
+    first = numpy.flatnonzero(numpy.concatenate(([True], bucket[1:] != bucket[:-1])))
+    last = numpy.append(first[1:], len(bucket)) - 1
+
+    volume = numpy.asarray(candles["VOLUME"])
+    volumes = numpy.add.reduceat(volume, first)
+    traded = numpy.add.reduceat(_column(candles, "VWAP") * volume, first)
+    return {
+        "START": bucket[first] - offset,
+        "END": following[first] - offset,
+        "LOW": numpy.minimum.reduceat(_column(candles, "LOW"), first),
+        "HIGH": numpy.maximum.reduceat(_column(candles, "HIGH"), first),
+        "OPEN": _column(candles, "OPEN")[first],
+        "CLOSE": _column(candles, "CLOSE")[last],
+        "VOLUME": volumes,
+        "VWAP": numpy.divide(traded, volumes, out=numpy.full(len(first), numpy.nan), where=volumes > 0),
+    }
+
+
+def _buckets(local, interval: str):
+    """Returns the start of the interval holding every local time, and the start of the interval after it."""
+    if interval == "OneWeek":
+        days = local.astype("datetime64[D]")
+        # 1970-01-01 was a Thursday
+        monday = days - ((days.astype(numpy.int64) + 3) % 7).astype("timedelta64[D]")
+        return monday.astype("datetime64[us]"), (monday + numpy.timedelta64(7, "D")).astype("datetime64[us]")
+    if interval in ("OneMonth", "OneYear"):
+        unit = "M" if interval == "OneMonth" else "Y"
+        period = local.astype("datetime64[%s]" % unit)
+        return period.astype("datetime64[us]"), (period + numpy.timedelta64(1, unit)).astype("datetime64[us]")
+
+    step = numpy.timedelta64(int(Symbol.INTERVALS[interval].total_seconds() * 1000000), "us")
+    bucket = local - (local - numpy.datetime64(0, "us")) % step
+    return bucket, bucket + step
+
+
+def _rolling_sum(values, window: int):
+    out = numpy.full(len(values), numpy.nan)
+    if len(values) >= window:
+        totals = numpy.cumsum(numpy.concatenate(([0.0], values)))
+        out[window - 1:] = totals[window:] - totals[:-window]
+    return out
+
+
+def _column(candles: dict, name: str):
+    if numpy is None:
+        raise ImportError("numpy is required for analytics. Install questradeist[columnar].")
+    if name not in candles:
+        raise AttributeError("candles have no %s column. Pass candles from Symbol.history(format=\"columnar\")." % name)
+    values = candles[name]
+    return values if numpy.issubdtype(values.dtype, numpy.datetime64) else _floats(values)
+
+
+def _floats(values):
+    if numpy is None:
+        raise ImportError("numpy is required for analytics. Install questradeist[columnar].")
+    return numpy.asarray(values, dtype=numpy.float64)
+
+
+def _check_window(window: int, least: int=1):
+    if window < least:
+        raise AttributeError("window must be at least %d" % least)
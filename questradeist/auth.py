@@ -11,6 +11,8 @@ class QuestradeAuth(object):
     https://www.questrade.com/api/documentation/authorization
     """
 
+    LOGIN_URL = "https://login.questrade.com/oauth2/token"
+
     def __init__(self, access_token=None, refresh_token=None, expires=None):
         """Constructor
         access_token - The token used to access the Questrade API.
@@ -38,7 +40,7 @@ class QuestradeAuth(object):
         refresh_token - The token to be used, exchanging for an access token.
         """
 
-        authapi = "https://login.questrade.com/oauth2/token?grant_type=refresh_token&refresh_token=%s" % refresh_token
+        authapi = "%s?grant_type=refresh_token&refresh_token=%s" % (self.LOGIN_URL, refresh_token)
         now = datetime.datetime.now()
         r = requests.get(authapi)
 
@@ -0,0 +1,213 @@
+import datetime
+import json
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing.connection import Client
+from multiprocessing.managers import BaseManager
+from typing import Optional
+from .batch import BatchError
+from .credentials import Credentials
+from .ratelimit import RateLimiter
+from .symbol import Symbol
+
+try:
+    import numpy
+except ImportError:  # pragma: no cover
+    numpy = None
+
+
+MANIFEST = "backfill.json"
+
+
+def backfill(symbol: Symbol, ids: list, start: datetime.datetime, end: datetime.datetime, directory: str, interval: str="OneDay",
+             processes: Optional[int]=None, progress: Optional[callable]=None):
+    """Download the candles of every symbol in ids, between start and end, to directory. Each symbol
+    is written to <id>.npz, holding the columns of columnar.columns, as soon as it's complete.
+
+    symbol - The Symbol object whose login and rate limiter the worker processes share.
+    ids - The questrade IDs of the symbols.
+    start - The start time of the candles.
+    end - The end time of the candles.
+    directory - The directory the files are written to. It's created if needed.
+    interval - The interval for the candle data.
+    processes - The number of worker processes. Defaults to the number of CPUs.
+    progress - If set, called as progress(done, total, id) after every symbol is written.
+
+    Decoding responses takes most of the CPU of a large download, and threads serialize it on the
+    GIL, so every worker process fetches and decodes its own symbols. The processes share the
+    login and the rate limit budget of symbol, served to them from a thread of this process.
+
+    Symbols already written to directory are skipped, so an interrupted backfill picks up where it
+    stopped when run again. Returns a dictionary of id to the number of candles written, for the
+    symbols downloaded by this run. If some symbols failed, a batch.BatchError is raised holding
+    that dictionary as its results, once every other symbol is written.
+    """
+    if numpy is None:
+        raise ImportError("numpy is required for backfills. Install questradeist[columnar].")
+    if interval not in Symbol.INTERVALS:
+        raise AttributeError("Invalid interval. Interval must be one of %s" % list(Symbol.INTERVALS))
+
+    os.makedirs(directory, exist_ok=True)
+    _check_manifest(directory, start, end, interval)
+    todo = [id for id in dict.fromkeys(ids) if not os.path.exists(path(directory, id))]
+    total, done = len(todo), 0
+
+    results, errors = {}, []
+    with _SharedState(symbol) as shared:
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=processes, mp_context=context, initializer=_init_worker, initargs=shared.initargs()) as pool:
+            futures = {pool.submit(_download, id, start, end, interval, directory): id for id in todo}
+            for f in as_completed(futures):
+                id = futures[f]
+                try:
+                    results[id] = f.result()
+                except Exception as e:
+                    errors.append(([id], e))
+                    continue
+                done += 1
+                if progress is not None:
+                    progress(done, total, id)
+
+    if errors:
+        raise BatchError(results, errors)
+    return results
+
+
+def path(directory: str, id: int):
+    """Returns the file a backfill to directory writes the candles of symbol id to."""
+    return os.path.join(directory, "%d.npz" % id)
+
+
+def load(directory: str, id: int):
+    """Returns the columns a backfill to directory wrote for symbol id, as a dictionary of NumPy arrays."""
+    with numpy.load(path(directory, id)) as data:
+        return {k: data[k] for k in data.files}
+
+
+def _check_manifest(directory: str, start: datetime.datetime, end: datetime.datetime, interval: str):
+    """Record the range a backfill to directory covers, refusing to mix files of different ranges."""
+    manifest = {"start": start.isoformat(), "end": end.isoformat(), "interval": interval}
+    name = os.path.join(directory, MANIFEST)
+    if os.path.exists(name):
+        with open(name) as fp:
+            existing = json.load(fp)
+        if existing != manifest:
+            raise AttributeError("%s holds a backfill of %s, not %s" % (directory, existing, manifest))
+        return
+    with open(name, "w") as fp:
+        json.dump(manifest, fp)
+
+
+class _Manager(BaseManager):
+    pass
+
+
+_Manager.register("credentials")
+_Manager.register("rate_limiter")
+
+
+class _SharedState(object):
+    """Serves the credentials and rate limiter of a Symbol object to worker processes."""
+
+    def __init__(self, symbol: Symbol):
+        self.authkey = os.urandom(16)
+        # a class of its own, so that backfills run side by side serve their own symbol
+        manager = type("_SymbolManager", (_Manager,), {})
+        manager.register("credentials", callable=lambda: symbol.credentials, exposed=("current", "refresh"))
+        manager.register("rate_limiter", callable=lambda: symbol.rate_limiter, exposed=("reserve", "update"))
+        self.server = manager(address=("127.0.0.1", 0), authkey=self.authkey).get_server()
+        self.margin = symbol.credentials.margin
+        self.server.stop_event = threading.Event()
+        self._closing = False
+        self._thread = threading.Thread(target=self._serve, name="questradeist-backfill", daemon=True)
+
+    def initargs(self):
+        return self.server.address, self.authkey, self.margin
+
+    def _serve(self):
+        # Server.serve_forever is meant for a process of its own, and exits it when done
+        while True:
+            try:
+                conn = self.server.listener.accept()
+            except Exception:
+                conn = None
+            if self._closing:
+                break
+            if conn is not None:
+                threading.Thread(target=self.server.handle_request, args=(conn,), daemon=True).start()
+        if conn is not None:
+            conn.close()
+        self.server.listener.close()
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *args):
+        self._closing = True
+        self.server.stop_event.set()
+        # wake up the accepting thread, which hangs up on seeing _closing
+        try:
+            Client(self.server.address, authkey=self.authkey).close()
+        except (EOFError, OSError):
+            pass
+        self._thread.join()
+
+
+class _RemoteCredentials(Credentials):
+    """Credentials held by the parent process. The current Auth is kept locally until it's about to expire."""
+
+    def __init__(self, remote, margin: float):
+        self.f = None
+        self.margin = margin
+        self.refreshes = 0
+        self.remote = remote
+        self._lock = threading.Lock()
+        self._refresher = None
+        self._stop = threading.Event()
+        self._auth = remote.current()
+
+    def current(self):
+        auth = self._auth
+        if self.expiring(auth):
+            self._auth = auth = self.remote.current()
+        return auth
+
+    def refresh(self, stale=None):
+        self._auth = auth = self.remote.refresh(stale)
+        return auth
+
+
+class _RemoteRateLimiter(RateLimiter):
+    """A rate limiter held by the parent process. Requests are reserved there, and waited for here."""
+
+    def __init__(self, remote):
+        self.remote = remote
+
+    def reserve(self, url: str):
+        return self.remote.reserve(url)
+
+    def update(self, url: str, status: int, headers: dict):
+        self.remote.update(url, status, dict(headers))
+
+
+_symbol = None
+
+
+def _init_worker(address: tuple, authkey: bytes, margin: float):
+    global _symbol
+    manager = _Manager(address=address, authkey=authkey)
+    manager.connect()
+    _symbol = Symbol(credentials=_RemoteCredentials(manager.credentials(), margin), rate_limiter=_RemoteRateLimiter(manager.rate_limiter()))
+
+
+def _download(id: int, start: datetime.datetime, end: datetime.datetime, interval: str, directory: str):
+    """Fetch and write the candles of one symbol, returning how many there were."""
+    columns = _symbol.history(id, start, end, interval=interval, format="columnar")
+    # written under another name first, so that a file only exists once it's complete
+    tmp = os.path.join(directory, ".%d.tmp.npz" % id)
+    numpy.savez(tmp, **columns)
+    os.replace(tmp, path(directory, id))
+    return len(columns["START"]) if columns else 0
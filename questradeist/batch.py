@@ -0,0 +1,93 @@
+import datetime
+import json
+from typing import Iterable
+
+
+class BatchError(OSError):
+    """Raised when only some of the requests making up a batched call failed.
+
+    results - The merged results of the requests that succeeded, in input order.
+    errors - A list of (chunk, exception) tuples, one per failed request.
+    """
+
+    def __init__(self, results, errors: list):
+        self.results = results
+        self.errors = errors
+        OSError.__init__(self, "%d of the batched requests failed: %s" % (len(errors), "; ".join(str(e) for _, e in errors)))
+
+
+def chunked(items: Iterable, size: int):
+    """Split items into lists of at most size elements."""
+    items = list(items)
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+def windows(start: datetime.datetime, end: datetime.datetime, span: datetime.timedelta):
+    """Split the time range from start to end into consecutive (start, end) windows,
+    each no wider than span. Neighbouring windows share their boundary.
+    """
+    if start > end:
+        start, end = end, start
+
+    spans = []
+    while True:
+        stop = end if end - start <= span else start + span
+        spans.append((start, stop))
+        if stop >= end:
+            return spans
+        start = stop
+
+
+def day_windows(start: datetime.datetime, end: datetime.datetime, span: datetime.timedelta):
+    """Split the time range from start to end into consecutive (start, end) windows, each no
+    wider than span, for calls taking whole days with both ends included. Each window starts
+    the day after the one before it ends, so no day is requested twice.
+    """
+    if start > end:
+        start, end = end, start
+
+    spans = []
+    while True:
+        stop = end if end - start <= span else start + span
+        spans.append((start, stop))
+        if stop >= end:
+            return spans
+        start = stop + datetime.timedelta(days=1)
+
+
+def row_key(row: dict):
+    """A key identifying a raw response element by its entire contents, for elements without an id."""
+    return json.dumps(row, sort_keys=True)
+
+
+def dedupe(rows: list, unique: callable, seen: set=None):
+    """Return the rows whose unique(row) key isn't in seen, in order, adding their keys to seen."""
+    if seen is None:
+        seen = set()
+
+    kept = []
+    for r in rows:
+        k = unique(r)
+        if k not in seen:
+            seen.add(k)
+            kept.append(r)
+    return kept
+
+
+def merge(parts: list, key: str=None, raw: bool=False, unique: callable=None):
+    """Merge the results of several requests into one, as if a single request was made.
+    parts - The per-request results, in order.
+    key - A string, containing the key within the Questrade API response, that contains the response elements.
+    raw - If set, the parts are raw JSON responses rather than lists of objects.
+    unique - If set, a callable returning an identifying key for a raw response element. Later
+             elements with an already seen key are dropped.
+    """
+    if not raw or key is None:
+        rows = [o for p in parts for o in p]
+        return dedupe(rows, unique) if unique is not None else rows
+
+    merged = dict(parts[0]) if parts else {}
+    merged[key] = [o for p in parts for o in p[key]]
+    if unique is not None:
+        merged[key] = dedupe(merged[key], unique)
+    return merged
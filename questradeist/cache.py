@@ -0,0 +1,153 @@
+import json
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+
+
+class Cache(ABC):
+    """The interface for response caches used by Questrade objects. Values are decoded
+    JSON, stored with a time to live in seconds. Subclass this to add a new backend,
+    implementing get, set, delete and clear.
+
+    A cache holds data for a single login, such as its account list. Use a separate
+    cache for every set of credentials.
+    """
+
+    @abstractmethod
+    def get(self, key: str):
+        """Returns the value stored under key, or None if it is missing or has expired."""
+
+    @abstractmethod
+    def set(self, key: str, value, ttl: float):
+        """Store value under key, for ttl seconds."""
+
+    @abstractmethod
+    def delete(self, key: str):
+        """Remove the value stored under key, if any."""
+
+    @abstractmethod
+    def clear(self):
+        """Remove every value."""
+
+    def get_many(self, keys: list):
+        """Returns a dictionary of the values stored under keys, leaving out missing or expired ones."""
+        found = {}
+        for k in keys:
+            v = self.get(k)
+            if v is not None:
+                found[k] = v
+        return found
+
+    def set_many(self, values: dict, ttl: float):
+        """Store every key and value in values, for ttl seconds."""
+        for k, v in values.items():
+            self.set(k, v, ttl)
+
+
+class MemoryCache(Cache):
+    """An in-process cache, evicting the least recently used value once it holds maxsize values.
+    Values are returned as stored, so raw results read from it must not be modified.
+    """
+
+    def __init__(self, maxsize: int=10000):
+        """Constructor
+        maxsize - The most values held at once.
+        """
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires <= time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value, ttl: float):
+        with self._lock:
+            self._data[key] = (time.monotonic() + ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key: str):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class SQLiteCache(Cache):
+    """A cache stored in an SQLite database file, so that it survives restarts. It
+    evicts the least recently used values once it holds maxsize values.
+    """
+
+    # the most keys looked up in a single query
+    BATCH = 500
+
+    def __init__(self, path: str, maxsize: int=None):
+        """Constructor
+        path - The database file. It's created if needed.
+        maxsize - The most values held at once. None for no limit.
+        """
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._db:
+            self._db.execute("CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, value TEXT NOT NULL, expires REAL NOT NULL, used REAL NOT NULL)")
+
+    def get(self, key: str):
+        return self.get_many([key]).get(key)
+
+    def get_many(self, keys: list):
+        found = {}
+        now = time.time()
+        with self._lock, self._db:
+            for i in range(0, len(keys), self.BATCH):
+                batch = keys[i:i + self.BATCH]
+                marks = ",".join("?" * len(batch))
+                rows = self._db.execute("SELECT key, value FROM cache WHERE key IN (%s) AND expires > ?" % marks, batch + [now])
+                for k, v in rows:
+                    found[k] = json.loads(v)
+                self._db.execute("UPDATE cache SET used = ? WHERE key IN (%s)" % marks, [now] + batch)
+        return found
+
+    def set(self, key: str, value, ttl: float):
+        self.set_many({key: value}, ttl)
+
+    def set_many(self, values: dict, ttl: float):
+        now = time.time()
+        rows = [(k, json.dumps(v), now + ttl, now) for k, v in values.items()]
+        with self._lock, self._db:
+            self._db.executemany("INSERT OR REPLACE INTO cache (key, value, expires, used) VALUES (?, ?, ?, ?)", rows)
+            self._db.execute("DELETE FROM cache WHERE expires <= ?", (now,))
+            if self.maxsize is not None:
+                self._db.execute("DELETE FROM cache WHERE key NOT IN (SELECT key FROM cache ORDER BY used DESC LIMIT ?)", (self.maxsize,))
+
+    def delete(self, key: str):
+        with self._lock, self._db:
+            self._db.execute("DELETE FROM cache WHERE key = ?", (key,))
+
+    def clear(self):
+        with self._lock, self._db:
+            self._db.execute("DELETE FROM cache")
+
+    def close(self):
+        self._db.close()
+
+    def __len__(self):
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM cache").fetchone()[0]
@@ -0,0 +1,139 @@
+import datetime
+import json
+import sqlite3
+import threading
+from typing import Optional
+from .questrade import to_wallclock
+from .symbol import Symbol
+from .types import Candle
+
+
+class CandleStore(object):
+    """A local store of historical candles, kept in an SQLite database, in front of
+    Symbol.history. It records which days it holds candles for, per symbol and interval,
+    so a request only fetches the days missing from the store, and serves the rest locally.
+
+    Days are only recorded as held once they're over, so ranges reaching today are always
+    brought up to date, while earlier days are fetched once.
+    """
+
+    def __init__(self, symbol: Symbol, path: str):
+        """Constructor
+        symbol - The Symbol object used to fetch missing candles.
+        path - The database file. It's created if needed.
+        """
+        self.symbol = symbol
+        self.fetched = 0
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._db:
+            # ts orders candles, and local, the time they show, selects them by the days they fall on
+            self._db.execute("CREATE TABLE IF NOT EXISTS candles (id INTEGER NOT NULL, interval TEXT NOT NULL, ts REAL NOT NULL, local REAL NOT NULL, data TEXT NOT NULL, "
+                             "PRIMARY KEY (id, interval, ts))")
+            self._db.execute("CREATE INDEX IF NOT EXISTS candles_local ON candles (id, interval, local)")
+            self._db.execute("CREATE TABLE IF NOT EXISTS coverage (id INTEGER NOT NULL, interval TEXT NOT NULL, start INTEGER NOT NULL, end INTEGER NOT NULL)")
+            self._db.execute("CREATE INDEX IF NOT EXISTS coverage_key ON coverage (id, interval)")
+
+    def history(self, id: int, start: datetime.datetime, end: datetime.datetime, interval: str="OneDay", raw: Optional[bool]=False, format: Optional[str]=None):
+        """Returns historical market data in an OHLC candlestick, for the provided symbol, like
+        Symbol.history, fetching only the days the store doesn't hold yet.
+
+        id - An integer containing the internal questrade ID.
+        start - The start time of the candle.
+        end - The end time of the candle.
+        interval - The interval for the candle data.
+        raw - If set, return the raw JSON rather than objects of qtype.
+        format - If set to "columnar", return a dictionary of NumPy arrays, one per field, or if set to "lazy", views reading fields on access, rather than objects of qtype.
+        """
+        first, last = self.sync(id, start, end, interval)
+        with self._lock:
+            rows = self._db.execute("SELECT data FROM candles WHERE id = ? AND interval = ? AND local >= ? AND local <= ? ORDER BY ts",
+                                    (id, interval, to_wallclock(first), to_wallclock(last)))
+            candles = [json.loads(d) for d, in rows]
+        return self.symbol._deserialize({"candles": candles}, Candle, "candles", raw, format)
+
+    def sync(self, id: int, start: datetime.datetime, end: datetime.datetime=None, interval: str="OneDay"):
+        """Fetch the candles between start and end that the store doesn't hold yet, returning the
+        first and last day of the range.
+        end - Defaults to now.
+        """
+        if interval not in Symbol.INTERVALS:
+            raise AttributeError("Invalid interval. Interval must be one of %s" % list(Symbol.INTERVALS))
+        if end is None:
+            end = datetime.datetime.now()
+
+        first, last = sorted((_day(start), _day(end)))
+        complete = datetime.date.today() - datetime.timedelta(days=1)
+        for gap_start, gap_end in self.gaps(id, first, last, interval):
+            data = self.symbol.history(id, _datetime(gap_start), _datetime(gap_end), interval=interval, raw=True)
+            self._store(id, interval, data["candles"])
+            if gap_start <= complete:
+                self._cover(id, interval, gap_start, min(gap_end, complete))
+        return first, last
+
+    def gaps(self, id: int, first: datetime.date, last: datetime.date, interval: str):
+        """Returns the (first, last) day ranges between first and last that the store doesn't hold.
+        Like the ranges Questrade takes, a range of days holds the candles starting from midnight
+        of its first day up to midnight of its last day, so neighbouring ranges share a day.
+        """
+        with self._lock:
+            held = self._db.execute("SELECT start, end FROM coverage WHERE id = ? AND interval = ? AND end >= ? AND start <= ? ORDER BY start",
+                                    (id, interval, first.toordinal(), last.toordinal())).fetchall()
+
+        gaps = []
+        at = first.toordinal()
+        for s, e in held:
+            if s > at:
+                gaps.append((at, s))
+            at = max(at, e)
+        if at < last.toordinal() or not held:
+            gaps.append((at, last.toordinal()))
+        return [(datetime.date.fromordinal(s), datetime.date.fromordinal(e)) for s, e in gaps]
+
+    def clear(self, id: int=None, interval: str=None):
+        """Forget the stored candles of a symbol, of an interval, both, or every candle."""
+        where, args = [], []
+        if id is not None:
+            where.append("id = ?")
+            args.append(id)
+        if interval is not None:
+            where.append("interval = ?")
+            args.append(interval)
+        clause = " WHERE " + " AND ".join(where) if where else ""
+        with self._lock, self._db:
+            self._db.execute("DELETE FROM candles" + clause, args)
+            self._db.execute("DELETE FROM coverage" + clause, args)
+
+    def close(self):
+        self._db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def _store(self, id: int, interval: str, candles: list):
+        self.fetched += len(candles)
+        rows = [(id, interval, datetime.datetime.fromisoformat(c["start"]).timestamp(), to_wallclock(c["start"]), json.dumps(c)) for c in candles]
+        with self._lock, self._db:
+            self._db.executemany("INSERT OR REPLACE INTO candles (id, interval, ts, local, data) VALUES (?, ?, ?, ?, ?)", rows)
+
+    def _cover(self, id: int, interval: str, first: datetime.date, last: datetime.date):
+        """Record the days from first to last as held, merging the ranges they overlap or touch."""
+        start, end = first.toordinal(), last.toordinal()
+        with self._lock, self._db:
+            touching = self._db.execute("SELECT rowid, start, end FROM coverage WHERE id = ? AND interval = ? AND end >= ? AND start <= ?",
+                                        (id, interval, start, end)).fetchall()
+            for rowid, s, e in touching:
+                start, end = min(start, s), max(end, e)
+                self._db.execute("DELETE FROM coverage WHERE rowid = ?", (rowid,))
+            self._db.execute("INSERT INTO coverage (id, interval, start, end) VALUES (?, ?, ?, ?)", (id, interval, start, end))
+
+
+def _day(d):
+    return d.date() if isinstance(d, datetime.datetime) else d
+
+
+def _datetime(d: datetime.date):
+    return datetime.datetime(d.year, d.month, d.day)
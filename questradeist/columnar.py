@@ -0,0 +1,68 @@
+from .types import QuestradeType
+
+try:
+    import numpy
+except ImportError:  # pragma: no cover
+    numpy = None
+
+
+def columns(rows: list, qtype: QuestradeType):
+    """Build a column-oriented view of raw Questrade response elements: a dictionary
+    mapping each field's (uppercase) name to a NumPy array of its values, in row order.
+    No per-row objects are created.
+
+    rows - The raw response elements, such as the "candles" list of a candles response.
+    qtype - The types.Questrade object describing the elements.
+
+    Fields listed in qtype.DATES become UTC datetime64[us] arrays, fields listed in
+    qtype.FLOATS become float64 arrays. Other fields are typed by their values: int64
+    for integers, float64 for numbers with missing values (as NaN), bool for flags, and
+    object arrays for everything else.
+    """
+    if numpy is None:
+        raise ImportError("numpy is required for columnar output. Install questradeist[columnar].")
+
+    keys = {}
+    layout = None
+    for r in rows:
+        if layout is None or len(r) != len(layout) or tuple(r) != layout:
+            layout = tuple(r)
+            for k in layout:
+                keys.setdefault(k, k.upper())
+
+    cols = {}
+    for k, name in keys.items():
+        values = [r.get(k) for r in rows]
+        if name in qtype.DATES:
+            cols[name] = to_datetime64(values)
+        elif name in qtype.FLOATS:
+            cols[name] = numpy.array(values, dtype=numpy.float64)
+        else:
+            cols[name] = _array(values)
+    return cols
+
+
+def _array(values: list):
+    kinds = set(map(type, values))
+    if kinds == {int}:
+        return numpy.array(values, dtype=numpy.int64)
+    if kinds and kinds <= {int, float, type(None)}:
+        return numpy.array(values, dtype=numpy.float64)
+    if kinds == {bool}:
+        return numpy.array(values, dtype=bool)
+    return numpy.fromiter(values, dtype=object, count=len(values))
+
+
+def to_datetime64(values: list):
+    """Parse Questrade timestamps, such as 2014-10-01T00:00:00.000000-04:00, into an array of
+    UTC datetime64[us]. Missing or empty timestamps become NaT.
+    """
+    local = numpy.array([v[:-6] if v else "NaT" for v in values], dtype="datetime64[us]")
+    offsets = numpy.array([_offset(v) if v else 0 for v in values], dtype="timedelta64[m]")
+    return local - offsets
+
+
+def _offset(v: str):
+    """The UTC offset, in minutes, at the end of a Questrade timestamp."""
+    minutes = int(v[-5:-3]) * 60 + int(v[-2:])
+    return -minutes if v[-6] == "-" else minutes
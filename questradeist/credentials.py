@@ -0,0 +1,142 @@
+import datetime
+import logging
+import threading
+from typing import Optional
+from .auth import QuestradeAuth
+from .types import Auth
+
+
+class Credentials(object):
+    """The Questrade tokens shared by every Symbol and Account object created with them.
+
+    Questrade refresh tokens are single use, so only one refresh may be in flight at once.
+    Refreshes are serialized, and a refresh asked for with a token that was already replaced
+    is skipped, so threads noticing an expired token together cause a single refresh.
+
+    The tokens are held in a single Auth object, replaced whole on every refresh. Read
+    auth once and use its fields, rather than reading the properties one after another,
+    to get a consistent set of tokens while a refresh may be under way.
+
+    Call start() to refresh the access token in the background, margin seconds ahead of
+    its expiry, so that requests never wait for a refresh.
+    """
+
+    LOGGER_NAME = "questrade-logger"
+
+    def __init__(self, access_token: str=None, refresh_token: str=None, expires: datetime.datetime=None, f: callable=None, margin: float=60.0):
+        """Constructor
+        access_token - The token used to access the Questrade API.
+        refresh_token - Upon expiration of the access token, this token is used to trigger a refresh.
+        expires - The time the access token expires.
+        f - If set, called with the new Auth on every refresh, for instance to persist the refresh token.
+        margin - Seconds ahead of expiry at which the access token is refreshed.
+        """
+        self.f = f
+        self.margin = margin
+        self.refreshes = 0
+        self._auth = None
+        self._lock = threading.Lock()
+        self._refresher = None
+        self._stop = threading.Event()
+        self.swap(QuestradeAuth(access_token, refresh_token, expires).AUTH)
+
+    @property
+    def auth(self):
+        """Returns the current Auth."""
+        return self._auth
+
+    @property
+    def access_token(self):
+        """Returns the access token"""
+        return self._auth.ACCESS_TOKEN
+
+    @property
+    def refresh_token(self):
+        """Returns the refresh token"""
+        return getattr(self._auth, "REFRESH_TOKEN", None)
+
+    @property
+    def expires(self):
+        """Returns the time the access token expires, or None if it isn't known"""
+        return getattr(self._auth, "EXPIRES", None)
+
+    @property
+    def server(self):
+        """Returns the API server to be used in Questrade calls"""
+        return getattr(self._auth, "API_SERVER", None)
+
+    def expiring(self, auth: Auth=None):
+        """Returns True if the access token of auth, by default the current one, expires within margin."""
+        auth = auth if auth is not None else self._auth
+        expires = getattr(auth, "EXPIRES", None)
+        if expires is None or getattr(auth, "REFRESH_TOKEN", None) is None:
+            return False
+        return datetime.datetime.now() + datetime.timedelta(seconds=self.margin) >= expires
+
+    def current(self):
+        """Returns the current Auth, refreshing it first if its access token expires within margin."""
+        auth = self._auth
+        if self.expiring(auth):
+            return self.refresh(auth)
+        return auth
+
+    def refresh(self, stale: Optional[Auth]=None):
+        """Exchange the refresh token for new tokens, returning the new Auth.
+        stale - If set, the Auth found not to work. If it was already replaced, no refresh is made,
+                and the Auth that replaced it is returned. Auths are compared by access token, so
+                a copy, such as one sent from another process, works too.
+        """
+        with self._lock:
+            if stale is not None and stale.ACCESS_TOKEN != self._auth.ACCESS_TOKEN:
+                return self._auth
+            refresh_token = self.refresh_token
+            if refresh_token is None:
+                raise AttributeError("a refresh_token is required to refresh the access token")
+            auth = QuestradeAuth(refresh_token=refresh_token).AUTH
+            self.refreshes += 1
+            self.swap(auth)
+            return auth
+
+    def swap(self, auth: Auth):
+        """Replace the current Auth with auth, and hand it to f."""
+        self._auth = auth
+        if self.f:
+            self.f(auth)
+
+    def start(self, retry_after: float=5.0):
+        """Refresh the access token margin seconds ahead of its expiry, on a background thread, until stop() is called.
+        retry_after - Seconds to wait before trying again after a refresh failed.
+        """
+        if self._refresher is not None:
+            raise AttributeError("the credentials are already being refreshed")
+
+        self._stop.clear()
+
+        def run():
+            wait = 0.0
+            while not self._stop.wait(wait):
+                auth = self._auth
+                expires = getattr(auth, "EXPIRES", None)
+                if expires is None:
+                    return
+
+                wait = (expires - datetime.datetime.now()).total_seconds() - self.margin
+                if wait > 0:
+                    continue
+                try:
+                    self.refresh(auth)
+                    wait = 0.0
+                except Exception as e:
+                    logging.getLogger(self.LOGGER_NAME).warning("Refreshing the Questrade access token failed: %s" % e)
+                    wait = retry_after
+
+        self._refresher = threading.Thread(target=run, name="questradeist-credentials", daemon=True)
+        self._refresher.start()
+
+    def stop(self):
+        """Stop refreshing the access token in the background."""
+        if self._refresher is None:
+            return
+        self._stop.set()
+        self._refresher.join()
+        self._refresher = None
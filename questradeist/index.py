@@ -0,0 +1,177 @@
+import bisect
+import json
+import os
+import threading
+import time
+from typing import Optional
+from .symbol import Symbol
+from .types import SearchSymbol
+
+
+class SymbolIndex(object):
+    """A local prefix index over symbol search results, for autocomplete. It fills in
+    as searches come back from Questrade. Once a prefix has been searched, every longer
+    prefix is answered from the index without a round trip.
+
+    Symbols are kept in a sorted array, so the matches for a prefix are the contiguous
+    run of symbols starting with it, found by binary search.
+
+    A search result is trusted to hold every match for its prefix. If Questrade caps
+    the number of results, pass that cap as limit: searches returning that many results
+    are kept, but their prefix isn't marked as covered.
+    """
+
+    def __init__(self, symbol: Symbol, path: str=None, ttl: float=None, limit: int=None):
+        """Constructor
+        symbol - The Symbol object used to search Questrade.
+        path - If set, a JSON file the index is loaded from, if it exists, and saved to by save().
+        ttl - If set, the number of seconds a searched prefix stays covered, after which it's searched again.
+        limit - If set, the most results Questrade returns for a single search.
+        """
+        self.symbol = symbol
+        self.path = path
+        self.ttl = ttl
+        self.limit = limit
+
+        self._keys = []  # the uppercase symbols, sorted
+        self._rows = {}  # uppercase symbol -> raw search result
+        self._prefixes = {}  # covered prefix -> unix time it was searched
+        self._lock = threading.RLock()
+        self._refresher = None
+        self._stop = threading.Event()
+
+        if path is not None and os.path.exists(path):
+            self.load(path)
+
+    def search(self, prefix: str, raw: Optional[bool]=False, format: Optional[str]=None):
+        """Returns the symbols starting with prefix, from the index if the prefix is covered, otherwise from Questrade.
+        prefix - The start of the symbols to find.
+        raw - If set, return the raw JSON rather than SearchSymbol objects.
+        format - If set to "columnar", return a dictionary of NumPy arrays, one per field, or if set to "lazy", views reading fields on access, rather than SearchSymbol objects.
+        """
+        rows = self.lookup(prefix)
+        if rows is None:
+            data = self.symbol.search(prefix, raw=True)
+            self.add(prefix, data["symbols"])
+            rows = self.lookup(prefix) if self.covered(prefix) else data["symbols"]
+        return self.symbol._deserialize({"symbols": rows}, SearchSymbol, "symbols", raw, format)
+
+    def lookup(self, prefix: str):
+        """Returns the raw search results starting with prefix, in symbol order, or None if prefix isn't covered."""
+        prefix = prefix.upper()
+        with self._lock:
+            if not self.covered(prefix):
+                return None
+            lo = bisect.bisect_left(self._keys, prefix)
+            hi = lo
+            while hi < len(self._keys) and self._keys[hi].startswith(prefix):
+                hi += 1
+            return [self._rows[k] for k in self._keys[lo:hi]]
+
+    def covered(self, prefix: str):
+        """Returns True if prefix, or a shorter prefix of it, was searched recently enough."""
+        prefix = prefix.upper()
+        now = time.time()
+        with self._lock:
+            for i in range(len(prefix) + 1):
+                searched = self._prefixes.get(prefix[:i])
+                if searched is not None and (self.ttl is None or now - searched < self.ttl):
+                    return True
+            return False
+
+    def add(self, prefix: str, rows: list, searched: float=None):
+        """Add the raw results of a search for prefix, replacing what the index held for it.
+        searched - The unix time of the search. Defaults to now.
+        """
+        prefix = prefix.upper()
+        complete = self.limit is None or len(rows) < self.limit
+        with self._lock:
+            fresh = {r["symbol"].upper(): r for r in rows}
+            if complete:
+                # symbols under prefix that Questrade no longer returns
+                lo = bisect.bisect_left(self._keys, prefix)
+                hi = lo
+                while hi < len(self._keys) and self._keys[hi].startswith(prefix):
+                    hi += 1
+                for k in self._keys[lo:hi]:
+                    if k not in fresh:
+                        del self._rows[k]
+                self._keys[lo:hi] = [k for k in self._keys[lo:hi] if k in fresh]
+
+            for k, r in fresh.items():
+                if k not in self._rows:
+                    bisect.insort(self._keys, k)
+                self._rows[k] = r
+
+            if complete:
+                self._prefixes[prefix] = searched if searched is not None else time.time()
+
+    def prefixes(self):
+        """Returns the covered prefixes that aren't covered by a shorter one."""
+        with self._lock:
+            found = sorted(self._prefixes)
+        kept = []
+        for p in found:
+            if not kept or not p.startswith(kept[-1]):
+                kept.append(p)
+        return kept
+
+    def refresh(self):
+        """Search Questrade again for every covered prefix, bringing the index up to date."""
+        for p in self.prefixes():
+            data = self.symbol.search(p, raw=True)
+            self.add(p, data["symbols"])
+
+    def start_refresh(self, interval: float):
+        """Refresh the index every interval seconds, on a background thread, until stop() is called."""
+        if self._refresher is not None:
+            raise AttributeError("the index is already being refreshed")
+
+        self._stop.clear()
+
+        def run():
+            while not self._stop.wait(interval):
+                self.refresh()
+                if self.path is not None:
+                    self.save()
+
+        self._refresher = threading.Thread(target=run, name="questradeist-index", daemon=True)
+        self._refresher.start()
+
+    def stop(self):
+        """Stop refreshing the index in the background."""
+        if self._refresher is None:
+            return
+        self._stop.set()
+        self._refresher.join()
+        self._refresher = None
+
+    def save(self, path: str=None):
+        """Write the index to a JSON file.
+        path - The file to write. Defaults to the path the index was created with.
+        """
+        path = path or self.path
+        with self._lock:
+            data = {"prefixes": dict(self._prefixes), "symbols": [self._rows[k] for k in self._keys]}
+
+        # write then rename, so that a reader never sees half a file
+        tmp = "%s.tmp" % path
+        with open(tmp, "w") as fp:
+            json.dump(data, fp)
+        os.replace(tmp, path)
+
+    def load(self, path: str=None):
+        """Replace the contents of the index with those of a JSON file written by save().
+        path - The file to read. Defaults to the path the index was created with.
+        """
+        with open(path or self.path) as fp:
+            data = json.load(fp)
+
+        rows = {r["symbol"].upper(): r for r in data["symbols"]}
+        with self._lock:
+            self._rows = rows
+            self._keys = sorted(rows)
+            self._prefixes = dict(data["prefixes"])
+
+    def __len__(self):
+        return len(self._keys)
@@ -0,0 +1,109 @@
+from collections.abc import Sequence
+from .types import QuestradeType
+
+
+class View(object):
+    """A read-only view of a raw Questrade response element, with the attributes of qtype.
+    Nothing is done up front: a field's key is looked up, and its value converted, only when
+    the field is read. The element itself is shared, not copied.
+
+    Unlike qtype objects, fields missing from the element raise AttributeError when read.
+    """
+
+    __slots__ = ("_row", "_qtype")
+
+    def __init__(self, row: dict, qtype: QuestradeType):
+        self._row = row
+        self._qtype = qtype
+
+    def __getattr__(self, name: str):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        try:
+            key = _keys(self._qtype)[name]
+            value = self._row[key]
+        except KeyError:
+            key = _find(self._qtype, self._row, name)
+            value = self._row[key]
+        if value is not None and name in self._qtype.FLOATS:
+            return float(value)
+        return value
+
+    def __setattr__(self, name: str, value):
+        if name in View.__slots__:
+            object.__setattr__(self, name, value)
+        else:
+            raise AttributeError("views are read-only")
+
+    def materialize(self):
+        """Returns the qtype object for the element."""
+        return self._qtype.from_list([self._row])[0]
+
+    def raw(self):
+        """Returns the raw element viewed."""
+        return self._row
+
+    def __eq__(self, other):
+        return isinstance(other, View) and other._qtype is self._qtype and other._row == self._row
+
+    def __repr__(self):
+        return "%s.View(%r)" % (self._qtype.__name__, self._row)
+
+
+class Views(Sequence):
+    """A list of raw Questrade response elements, read through a View of each. Views are made as elements are read."""
+
+    __slots__ = ("rows", "qtype")
+
+    def __init__(self, rows: list, qtype: QuestradeType):
+        self.rows = rows
+        self.qtype = qtype
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return Views(self.rows[index], self.qtype)
+        return View(self.rows[index], self.qtype)
+
+    def __iter__(self):
+        qtype = self.qtype
+        for row in self.rows:
+            yield View(row, qtype)
+
+    def materialize(self):
+        """Returns the qtype objects for every element, as a list."""
+        return self.qtype.from_list(self.rows)
+
+    def __repr__(self):
+        return "Views(%s, %d rows)" % (self.qtype.__name__, len(self.rows))
+
+
+# per type, the key under which each uppercase field was last found
+_KEYS = {}
+
+
+def views(rows: list, qtype: QuestradeType):
+    """Returns lazy views of raw Questrade response elements, such as the "quotes" list of a quotes response.
+
+    rows - The raw response elements.
+    qtype - The types.Questrade object describing the elements.
+    """
+    return Views(rows, qtype)
+
+
+def _keys(qtype: QuestradeType):
+    keys = _KEYS.get(qtype)
+    if keys is None:
+        keys = _KEYS[qtype] = {}
+    return keys
+
+
+def _find(qtype: QuestradeType, row: dict, name: str):
+    """Find the key of row holding the field name, as the keys differ in case, and remember it."""
+    for k in row:
+        if k.upper() == name:
+            _keys(qtype)[name] = k
+            return k
+    raise AttributeError("%s has no field %s" % (qtype.__name__, name))
@@ -0,0 +1,152 @@
+import datetime
+import json
+import sqlite3
+import threading
+from typing import Optional
+from .account import Account
+from .batch import row_key
+from .questrade import to_wallclock
+from .types import AccountActivity, AccountExecution
+
+
+class Ledger(object):
+    """A local ledger of account activities and executions, kept in an SQLite database.
+
+    sync() fetches what happened since the last sync of each account, recorded as a
+    checkpoint, going back overlap further to catch entries posted late. Entries are
+    stored once, so the overlap never duplicates them. Identical entries, such as two fills
+    of the same size and price on one day, are told apart by their order among the entries
+    fetched, so a sync stores as many of them as Questrade returns. Queries are then
+    answered from the database, for any number of accounts, without calling Questrade.
+    """
+
+    # the kinds of entries kept: the type, the raw field holding its time, and the key identifying an entry
+    KINDS = {
+        "activities": (AccountActivity, "transactionDate", row_key),
+        "executions": (AccountExecution, "timestamp", lambda r: str(r["id"])),
+    }
+
+    def __init__(self, account: Account, path: str, start: datetime.datetime=datetime.datetime(2000, 1, 1), overlap: datetime.timedelta=datetime.timedelta(days=7)):
+        """Constructor
+        account - The Account object used to fetch entries.
+        path - The database file. It's created if needed.
+        start - The time a first sync of an account starts from.
+        overlap - How far before the checkpoint every later sync starts.
+        """
+        self.account = account
+        self.start = start
+        self.overlap = overlap
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._db:
+            # ts orders entries, and local, the time they show, selects them by the days they fall on
+            self._db.execute("CREATE TABLE IF NOT EXISTS entries (account INTEGER NOT NULL, kind TEXT NOT NULL, key TEXT NOT NULL, ts REAL NOT NULL, local REAL NOT NULL, "
+                             "data TEXT NOT NULL, PRIMARY KEY (account, kind, key))")
+            self._db.execute("CREATE INDEX IF NOT EXISTS entries_time ON entries (kind, ts)")
+            self._db.execute("CREATE TABLE IF NOT EXISTS checkpoints (account INTEGER NOT NULL, kind TEXT NOT NULL, mark TEXT NOT NULL, PRIMARY KEY (account, kind))")
+
+    def sync(self, ids: Optional[list]=None, kinds: Optional[list]=None, end: Optional[datetime.datetime]=None):
+        """Fetch the entries since each account's checkpoint, returning the number of new entries stored.
+        ids - The account numbers to sync. Defaults to every account.
+        kinds - The kinds of entries to sync, from KINDS. Defaults to all of them.
+        end - The time to sync up to, which becomes the new checkpoint. Defaults to now.
+        """
+        if ids is None:
+            ids = [int(a.NUMBER) for a in self.account.get_all()]
+        if kinds is None:
+            kinds = list(self.KINDS)
+        for kind in kinds:
+            if kind not in self.KINDS:
+                raise AttributeError("Invalid kind. Kind must be one of %s" % list(self.KINDS))
+        if end is None:
+            end = datetime.datetime.now()
+
+        added = 0
+        for id in ids:
+            for kind in kinds:
+                mark = self.checkpoint(id, kind)
+                start = self.start if mark is None else max(self.start, mark - self.overlap)
+                data = getattr(self.account, kind)(id, start, end, raw=True)
+                added += self._store(id, kind, data[kind])
+                self._set_checkpoint(id, kind, end)
+        return added
+
+    def checkpoint(self, id: int, kind: str):
+        """Returns the time the entries of kind for account id were last synced up to, or None."""
+        with self._lock:
+            row = self._db.execute("SELECT mark FROM checkpoints WHERE account = ? AND kind = ?", (id, kind)).fetchone()
+        return datetime.datetime.fromisoformat(row[0]) if row is not None else None
+
+    def activities(self, id: Optional[int]=None, start: Optional[datetime.datetime]=None, end: Optional[datetime.datetime]=None, raw: Optional[bool]=False, format: Optional[str]=None):
+        """Returns the stored account activities, in time order.
+        id - An integer containing the account ID. Defaults to every account.
+        start - If set, leave out activities before start.
+        end - If set, leave out activities after end.
+        raw - If set, return the raw JSON rather than objects of qtype.
+        format - If set to "columnar", return a dictionary of NumPy arrays, one per field, or if set to "lazy", views reading fields on access, rather than objects of qtype.
+        """
+        return self._query("activities", id, start, end, raw, format)
+
+    def executions(self, id: Optional[int]=None, start: Optional[datetime.datetime]=None, end: Optional[datetime.datetime]=None, raw: Optional[bool]=False, format: Optional[str]=None):
+        """Returns the stored account executions, in time order.
+        id - An integer containing the account ID. Defaults to every account.
+        start - If set, leave out executions before start.
+        end - If set, leave out executions after end.
+        raw - If set, return the raw JSON rather than objects of qtype.
+        format - If set to "columnar", return a dictionary of NumPy arrays, one per field, or if set to "lazy", views reading fields on access, rather than objects of qtype.
+        """
+        return self._query("executions", id, start, end, raw, format)
+
+    def close(self):
+        self._db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def _query(self, kind: str, id: int, start: datetime.datetime, end: datetime.datetime, raw: bool, format: str):
+        where, args = ["kind = ?"], [kind]
+        if id is not None:
+            where.append("account = ?")
+            args.append(id)
+        for bound, op in ((start, ">="), (end, "<=")):
+            if bound is None:
+                continue
+            # times with an offset are compared as such, and naive ones by the time entries show
+            if isinstance(bound, datetime.datetime) and bound.tzinfo is not None:
+                where.append("ts %s ?" % op)
+                args.append(bound.timestamp())
+            else:
+                where.append("local %s ?" % op)
+                args.append(to_wallclock(bound))
+
+        with self._lock:
+            rows = self._db.execute("SELECT data FROM entries WHERE %s ORDER BY ts, account" % " AND ".join(where), args)
+            entries = [json.loads(d) for d, in rows]
+        return self.account._deserialize({kind: entries}, self.KINDS[kind][0], kind, raw, format)
+
+    def _store(self, id: int, kind: str, entries: list):
+        """Store entries not stored yet, returning how many there were.
+
+        Entries fetched cover whole days, and identical entries fall on the same day, so the
+        n-th copy of an entry is keyed by its order among the copies fetched. Fetching a day
+        again only stores the copies beyond those already stored.
+        """
+        _, field, unique = self.KINDS[kind]
+        copies = {}
+        rows = []
+        for e in entries:
+            key = unique(e)
+            n = copies[key] = copies.get(key, -1) + 1
+            stamp = datetime.datetime.fromisoformat(e[field])
+            rows.append((id, kind, key if n == 0 else "%s#%d" % (key, n), stamp.timestamp(), to_wallclock(stamp), json.dumps(e)))
+        with self._lock, self._db:
+            before = self._db.total_changes
+            self._db.executemany("INSERT OR IGNORE INTO entries (account, kind, key, ts, local, data) VALUES (?, ?, ?, ?, ?, ?)", rows)
+            return self._db.total_changes - before
+
+    def _set_checkpoint(self, id: int, kind: str, mark: datetime.datetime):
+        with self._lock, self._db:
+            self._db.execute("INSERT OR REPLACE INTO checkpoints (account, kind, mark) VALUES (?, ?, ?)", (id, kind, mark.isoformat()))
@@ -0,0 +1,200 @@
+import bisect
+import re
+import threading
+import time
+from urllib.parse import urlparse
+
+
+class RequestEvent(object):
+    """What happened during a single API call, handed to every hook of the Questrade object making it.
+
+    method - GET or POST.
+    url - The URL requested.
+    endpoint - The path of url, with ids replaced by {id}, such as /v1/markets/candles/{id}.
+    status - The status of the last response, or None if no response arrived.
+    bytes - The size of the response bodies received, as sent over the wire.
+    attempts - The number of times the request was sent, including retries and resends after a 429.
+    remaining - The requests left in the rate limit budget, as last reported by the API, or None.
+    error - The exception the call raised, or None.
+
+    The time taken is split into phases, in seconds:
+    wait - Held back by the rate limiter.
+    server - From sending a request until its response headers arrived, connecting included.
+             Only measured by the blocking transports; asynchronous calls count it in transfer.
+    transfer - The rest of the time spent in the transport, reading response bodies.
+    decode - Decoding the JSON response.
+    build - Building objects, or columns, out of the response.
+    total - The whole call, including waits between retries.
+    """
+
+    PHASES = ("wait", "server", "transfer", "decode", "build")
+
+    def __init__(self, url: str, method: str="GET"):
+        self.method = method
+        self.url = url
+        self.endpoint = endpoint(url)
+        self.status = None
+        self.bytes = 0
+        self.attempts = 0
+        self.remaining = None
+        self.error = None
+        self.wait = 0.0
+        self.server = 0.0
+        self.transfer = 0.0
+        self.decode = 0.0
+        self.build = 0.0
+        self.total = 0.0
+        self.started = time.perf_counter()
+
+    @property
+    def retries(self):
+        return max(0, self.attempts - 1)
+
+    def response(self, status: int, headers: dict, size: int):
+        """Record a response to one attempt."""
+        self.status = status
+        self.bytes += size
+        remaining = headers.get("X-RateLimit-Remaining")
+        if remaining is not None:
+            self.remaining = int(remaining)
+
+    def finish(self):
+        self.total = time.perf_counter() - self.started
+
+    def __repr__(self):
+        return "RequestEvent(%s %s, status=%s, attempts=%d, total=%.4f)" % (self.method, self.endpoint, self.status, self.attempts, self.total)
+
+
+_IDS = re.compile(r"/\d+(?=/|$)")
+
+
+def endpoint(url: str):
+    """Returns the path of url, with ids replaced by {id}, to group calls to the same endpoint."""
+    return _IDS.sub("/{id}", urlparse(url).path)
+
+
+class Histogram(object):
+    """Counts observations into buckets with fixed upper bounds, like a Prometheus histogram."""
+
+    # seconds, from a cached response to a slow page of candles
+    BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+    def __init__(self, buckets: tuple=None):
+        """Constructor
+        buckets - The increasing upper bounds of the buckets. Observations above the last are counted in an overflow bucket.
+        """
+        self.buckets = tuple(buckets) if buckets is not None else self.BUCKETS
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q: float):
+        """Estimate the q quantile, between 0 and 1, interpolating within its bucket. Returns None if empty."""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            if n and seen + n >= rank:
+                if i == len(self.buckets):
+                    return self.buckets[-1]
+                low = self.buckets[i - 1] if i else 0.0
+                return low + (self.buckets[i] - low) * (rank - seen) / n
+            seen += n
+        return self.buckets[-1]
+
+    def cumulative(self):
+        """Returns (upper bound, count of observations up to it) pairs, ending with +Inf."""
+        total, pairs = 0, []
+        for bound, n in zip(self.buckets + (float("inf"),), self.counts):
+            total += n
+            pairs.append((bound, total))
+        return pairs
+
+
+class RequestMetrics(object):
+    """In-process metrics of API calls, fed by passing record as a hook:
+
+        metrics = RequestMetrics()
+        sym = Symbol(refresh_token=token, hooks=[metrics.record])
+
+    It keeps a latency histogram per endpoint and phase, and counts calls by status, retries,
+    and bytes received, per endpoint. prometheus() renders them in the Prometheus text format.
+    """
+
+    PREFIX = "questradeist"
+
+    def __init__(self, buckets: tuple=None):
+        """Constructor
+        buckets - The upper bounds, in seconds, of the latency histogram buckets.
+        """
+        self.buckets = buckets
+        self.histograms = {}
+        self.calls = {}
+        self.retries = {}
+        self.bytes = {}
+        self.remaining = {}
+        self._lock = threading.Lock()
+
+    def record(self, event: RequestEvent):
+        """Add a finished call. Safe to call from any thread."""
+        key = event.endpoint
+        status = str(event.status) if event.error is None or event.status is not None else type(event.error).__name__
+        with self._lock:
+            for phase in ("total",) + event.PHASES:
+                h = self.histograms.get((key, phase))
+                if h is None:
+                    h = self.histograms[(key, phase)] = Histogram(self.buckets)
+                h.observe(getattr(event, phase))
+            self.calls[(key, event.method, status)] = self.calls.get((key, event.method, status), 0) + 1
+            self.retries[key] = self.retries.get(key, 0) + event.retries
+            self.bytes[key] = self.bytes.get(key, 0) + event.bytes
+            if event.remaining is not None:
+                self.remaining[key] = event.remaining
+
+    def histogram(self, endpoint: str, phase: str="total"):
+        """Returns the Histogram of an endpoint and phase, or None if no call was recorded."""
+        return self.histograms.get((endpoint, phase))
+
+    def reset(self):
+        with self._lock:
+            self.histograms, self.calls, self.retries, self.bytes, self.remaining = {}, {}, {}, {}, {}
+
+    def prometheus(self):
+        """Returns every metric in the Prometheus text exposition format."""
+        p = self.PREFIX
+        with self._lock:
+            lines = [
+                "# HELP %s_request_duration_seconds Time spent on API calls, by phase." % p,
+                "# TYPE %s_request_duration_seconds histogram" % p,
+            ]
+            for (key, phase), h in sorted(self.histograms.items()):
+                labels = 'endpoint="%s",phase="%s"' % (key, phase)
+                for bound, n in h.cumulative():
+                    lines.append('%s_request_duration_seconds_bucket{%s,le="%s"} %d' % (p, labels, _bound(bound), n))
+                lines.append("%s_request_duration_seconds_sum{%s} %r" % (p, labels, h.sum))
+                lines.append("%s_request_duration_seconds_count{%s} %d" % (p, labels, h.count))
+
+            lines += ["# HELP %s_requests_total API calls, by response status." % p, "# TYPE %s_requests_total counter" % p]
+            for (key, method, status), n in sorted(self.calls.items()):
+                lines.append('%s_requests_total{endpoint="%s",method="%s",status="%s"} %d' % (p, key, method, status, n))
+
+            lines += ["# HELP %s_retries_total Requests sent again after a failed attempt." % p, "# TYPE %s_retries_total counter" % p]
+            lines += ['%s_retries_total{endpoint="%s"} %d' % (p, key, n) for key, n in sorted(self.retries.items())]
+
+            lines += ["# HELP %s_response_bytes_total Response bytes received." % p, "# TYPE %s_response_bytes_total counter" % p]
+            lines += ['%s_response_bytes_total{endpoint="%s"} %d' % (p, key, n) for key, n in sorted(self.bytes.items())]
+
+            lines += ["# HELP %s_ratelimit_remaining Requests left in the rate limit budget, as last reported." % p,
+                      "# TYPE %s_ratelimit_remaining gauge" % p]
+            lines += ['%s_ratelimit_remaining{endpoint="%s"} %d' % (p, key, n) for key, n in sorted(self.remaining.items())]
+        return "\n".join(lines) + "\n"
+
+
+def _bound(bound: float):
+    return "+Inf" if bound == float("inf") else repr(bound)
@@ -0,0 +1,33 @@
+from .types import AccountPosition, CurrencyBalance, Quote, TradingAccount
+
+
+class Portfolio(object):
+    """A snapshot of several accounts, as returned by Account.snapshot: their positions and
+    balances, joined with a live quote for every symbol held.
+
+    accounts - The TradingAccount objects of the accounts.
+    positions - A dictionary of account number to the AccountPosition objects it holds.
+    balances - A dictionary of account number to its per currency CurrencyBalance objects.
+    combined_balances - A dictionary of account number to its combined CurrencyBalance objects.
+    quotes - A dictionary of symbol id to the Quote of every symbol held, in any account.
+    """
+
+    def __init__(self, data: dict):
+        """Constructor
+        data - The raw snapshot, as returned by Account.snapshot(raw=True).
+        """
+        self.accounts = TradingAccount.from_list(data["accounts"])
+        self.positions = {id: AccountPosition.from_list(p["positions"]) for id, p in data["positions"].items()}
+        self.balances = {id: CurrencyBalance.from_list(b["perCurrencyBalances"]) for id, b in data["balances"].items()}
+        self.combined_balances = {id: CurrencyBalance.from_list(b["combinedBalances"]) for id, b in data["balances"].items()}
+        self.quotes = {q.SYMBOLID: q for q in Quote.from_list(data["quotes"])}
+
+    def holdings(self):
+        """Returns a list of (account number, AccountPosition, Quote) tuples, one per position held.
+        The Quote is None if Questrade didn't return one for the symbol.
+        """
+        return [(id, p, self.quotes.get(p.SYMBOLID)) for id, positions in self.positions.items() for p in positions]
+
+    def symbol_ids(self):
+        """Returns the ids of the symbols held in any account, once each, in the order first held."""
+        return list(dict.fromkeys(p.SYMBOLID for positions in self.positions.values() for p in positions))
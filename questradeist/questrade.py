@@ -1,8 +1,26 @@
 from questradeist.types import QuestradeType
-from urllib.parse import urljoin
-from .auth import QuestradeAuth
+from urllib.parse import urljoin, urlparse
+from .batch import BatchError, chunked, dedupe, merge
+from .cache import Cache
+from .credentials import Credentials
+from .columnar import columns
+from .lazy import views
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, as_completed, wait
+from .ratelimit import RateLimiter, default_rate_limiter
+from .retry import RetryPolicy
+from .metrics import RequestEvent
+from .transport import Transport, default_transport
 import datetime
-import requests
+import logging
+import threading
+import time
+
+try:
+    # decodes responses several times faster than the json module
+    from orjson import loads
+except ImportError:  # pragma: no cover
+    from json import loads
 
 
 def to_datetime(date):
@@ -15,42 +33,119 @@ def to_datestring(date):
     return datetime.datetime.strftime(date, "%Y-%m-%dT00:00:00.00-05:00")
 
 
+def to_wallclock(date):
+    """A uniform function for turning a date or datetime into the unix timestamp of the day and
+    time it shows, ignoring any offset. Questrade stamps times -05:00 or -04:00, depending on
+    daylight saving time, so times are compared by the day they fall on this way.
+    """
+    if isinstance(date, str):
+        date = datetime.datetime.fromisoformat(date)
+    if isinstance(date, datetime.date) and not isinstance(date, datetime.datetime):
+        date = datetime.datetime(date.year, date.month, date.day)
+    return date.replace(tzinfo=datetime.timezone.utc).timestamp()
+
+
+def _no_body(chunk):
+    """The body_for of batched GET requests."""
+    return None
+
+
 class Questrade(object):
-    """This is the base call for all questrade operations."""
+    """This is the base call for all questrade operations.
+
+    Every object shares the process-wide pooled transport unless a transport is
+    passed in, so Symbol and Account objects reuse the same keep-alive connections.
+    Likewise, they share the process-wide rate limiter, pacing requests to stay
+    within Questrade's rate limits.
+
+    Failed requests are retried according to a RetryPolicy. If hedge_after is set, a
+    duplicate of any request still unanswered after hedge_after seconds is sent, and
+    whichever response arrives first is used. All Questrade calls made here are
+    idempotent reads, so this trades some rate limit budget for lower tail latency.
+
+    The tokens are held by a credentials.Credentials object. Pass the same one to several
+    objects, for instance Account(credentials=sym.credentials), to share a single login
+    between them, rather than each exchanging the refresh token. f is called with the new
+    tokens on every refresh, so that they can be persisted.
+
+    Objects are thread safe: a single Symbol or Account may be shared by any number of
+    threads. Requests read the tokens once, from the Auth the credentials replace whole on
+    a refresh, and are sent to the API server of that Auth, whichever server their URL was
+    built for, so no request ever mixes the token of one login with the server of another.
+    The transport, rate limiter and cache are shared between threads as well. For many
+    threads, a PooledTransport with pool_block set keeps the number of connections bounded.
+
+    If a cache is given, reference data that rarely changes (symbols, symbol searches,
+    option chains and the account list) is cached for the time to live, in seconds, listed in TTLS
+    for its endpoint. Pass cache_ttls to override them; a ttl of None disables caching.
 
-    def __init__(self, access_token: str=None, refresh_token: str=None, f: callable=None, expires: datetime.datetime=None):
-        qtauth = QuestradeAuth(access_token, refresh_token, expires)
-        self._setup(qtauth, f)
+    hooks is a list of callables, each called with a metrics.RequestEvent after every API
+    call, recording its endpoint, status, size, retries and the time spent in each phase.
+    metrics.RequestMetrics.record is one, keeping histograms. Without hooks, calls aren't timed.
+    """
 
-    def _setup(self, qtauth, f: callable=None):
-        """Setup embeds the questrade AUTH api results into this class."""
-        setattr(self, "ACCESS_TOKEN", qtauth.AUTH.ACCESS_TOKEN)
-        setattr(self, "REFRESH_TOKEN", qtauth.AUTH.REFRESH_TOKEN)
-        setattr(self, "API_SERVER", qtauth.AUTH.API_SERVER)
-        setattr(self, "EXPIRES", qtauth.AUTH.EXPIRES)
+    TTLS = {
+        "accounts": 3600,
+        "options": 3600,
+        "search": 3600,
+        "symbols": 86400,
+    }
 
-        if f:
-            f(qtauth.AUTH)
+    # the most requests a single batched call will have in flight at once
+    MAX_WORKERS = 8
+
+    # the values of format, besides None
+    FORMATS = ("columnar", "lazy")
+
+    LOGGER_NAME = "questrade-logger"
+
+    def __init__(self, access_token: str=None, refresh_token: str=None, f: callable=None, expires: datetime.datetime=None, transport: Transport=None, rate_limiter: RateLimiter=None, retry: RetryPolicy=None, hedge_after: float=None, cache: Cache=None, cache_ttls: dict=None, credentials: Credentials=None, hooks: list=None):
+        if transport is None:
+            transport = default_transport()
+        self.transport = transport
+
+        if rate_limiter is None:
+            rate_limiter = default_rate_limiter()
+        self.rate_limiter = rate_limiter
+
+        self.retry = retry if retry is not None else RetryPolicy()
+        self.hedge_after = hedge_after
+        self._hedge_pool = ThreadPoolExecutor(max_workers=2 * self.MAX_WORKERS) if hedge_after is not None else None
+
+        self.cache = cache
+        self.cache_ttls = dict(self.TTLS)
+        if cache_ttls:
+            self.cache_ttls.update(cache_ttls)
+
+        if credentials is None:
+            credentials = Credentials(access_token, refresh_token, expires, f)
+        self.credentials = credentials
+        self.hooks = list(hooks) if hooks else []
 
     @property
     def access_token(self):
         """Returns the access token"""
-        return self.ACCESS_TOKEN
+        return self.credentials.access_token
 
     @property
     def refresh_token(self):
         """Returns the refresh token"""
-        return self.REFRESH_TOKEN
+        return self.credentials.refresh_token
 
     @property
     def expires(self):
         """Returns the time the access token expires"""
-        return self.EXPIRES
+        return self.credentials.expires
 
     @property
     def server(self):
         """Returns the API server to be used in Questrade calls"""
-        return self.API_SERVER
+        return self.credentials.server
+
+    ACCESS_TOKEN = access_token
+    REFRESH_TOKEN = refresh_token
+    EXPIRES = expires
+    API_SERVER = server
 
     def time(self):
         """Call the Questrade time api, and return the time associated
@@ -59,37 +154,372 @@ class Questrade(object):
         url = urljoin(self.server, "/v1/time")
         return self._request(url, qtype=None, raw=True)
 
-    def _request(self, url: str, qtype: QuestradeType, key: str=None, raw: bool=False):
+    def _request(self, url: str, qtype: QuestradeType, key: str=None, raw: bool=False, format: str=None, body: dict=None):
         """This is a request wrapper. It's meant to be called by other functions.
         qtype - The types.Questrade object that should be used for deserializing data.
         key - A string, containing the key within the Questrade API response, that contains the response elements.
         raw - If set, return the raw JSON rather than objects of qtype.
+        format - If set to "columnar", return a dictionary of NumPy arrays, one per field, or if set to "lazy", views reading fields on access, rather than objects of qtype.
+        body - If set, the request is a POST, sending body as JSON.
         """
+        event = RequestEvent(url, "GET" if body is None else "POST") if self.hooks else None
+        try:
+            auth = self.credentials.current()
+            url = self._rebase(url, auth)
+            r = self._send(url, {"Authorization": "Bearer %s" % auth.ACCESS_TOKEN}, body, event)
+            if r.status_code != 200:
 
-        header = {"Authorization": "Bearer %s" % self.access_token}
-        r = requests.get(url, headers=header)
-        if r.status_code != 200:
-
-            # at least try to trigger a refresh if authentication fails.
-            if datetime.datetime.now() > self.expires:
-                qtauth = QuestradeAuth(refresh_token=self.refresh_token)
-                self._setup(qtauth)
-                r = requests.get(url, headers=header)
-                if r.status_code != 200:
+                # at least try to trigger a refresh if authentication fails.
+                if self._unauthorized(r.status_code, auth):
+                    fresh = self.credentials.refresh(auth)
+                    r = self._send(self._rebase(url, fresh), {"Authorization": "Bearer %s" % fresh.ACCESS_TOKEN}, body, event)
+                    if r.status_code != 200:
+                        raise OSError(r.content.decode('utf-8'))
+                else:
                     raise OSError(r.content.decode('utf-8'))
+
+            if event is None:
+                return self._deserialize(loads(r.content), qtype, key, raw, format)
+            return self._measured(event, r.content, qtype, key, raw, format)
+        except Exception as e:
+            if event is not None:
+                event.error = e
+            raise
+        finally:
+            if event is not None:
+                self._emit(event)
+
+    def _measured(self, event: RequestEvent, content: bytes, qtype: QuestradeType, key: str, raw: bool, format: str):
+        """Decode and deserialize a response body, timing both into event."""
+        start = time.perf_counter()
+        data = loads(content)
+        decoded = time.perf_counter()
+        result = self._deserialize(data, qtype, key, raw, format)
+        event.decode, event.build = decoded - start, time.perf_counter() - decoded
+        return result
+
+    def _emit(self, event: RequestEvent):
+        """Hand a finished call to every hook. A failing hook is logged, never failing the call."""
+        event.finish()
+        for hook in self.hooks:
+            try:
+                hook(event)
+            except Exception as e:
+                logging.getLogger(self.LOGGER_NAME).warning("A request hook failed: %s" % e)
+
+    def _unauthorized(self, status: int, auth):
+        """Returns True if a failed response, sent with auth, is worth retrying with refreshed tokens."""
+        if self.credentials.refresh_token is None:
+            return False
+        expires = getattr(auth, "EXPIRES", None)
+        return status == 401 or expires is not None and datetime.datetime.now() > expires
+
+    def _rebase(self, url: str, auth):
+        """Move url to the API server of auth, keeping its path and query. The tokens may have
+        been refreshed, onto another server, since url was built, and a token is only sent to
+        the server it was issued with.
+        """
+        server = getattr(auth, "API_SERVER", None)
+        if not server or url.startswith(server):
+            return url
+        parts = urlparse(url)
+        return urljoin(server, parts.path + ("?" + parts.query if parts.query else ""))
+
+    def _send(self, url: str, headers: dict, body: dict=None, event: RequestEvent=None):
+        """Send a GET request, or a POST request if body is set, retrying it according to the retry
+        policy. The response of the last attempt is returned, and the exception of the last attempt raised.
+        """
+        attempt = 0
+        while True:
+            try:
+                if self.hedge_after is not None:
+                    r = self._hedged(url, headers, body, event)
+                else:
+                    r = self._get(url, headers, body, event)
+            except Exception as e:
+                if not self.retry.retry_error(e, attempt):
+                    raise
+            else:
+                if not self.retry.retry_status(r.status_code, attempt):
+                    return r
+
+            time.sleep(self.retry.delay(attempt))
+            attempt += 1
+
+    def _hedged(self, url: str, headers: dict, body: dict=None, event: RequestEvent=None):
+        """Send a request, and a duplicate of it if no response arrives within hedge_after
+        seconds, returning whichever response arrives first.
+
+        The hedge_after clock starts once the request is sent, not while the rate limiter holds it
+        back, and a request queued behind the limiter is never duplicated: a slow budget isn't a
+        slow server, and duplicates would only spend more of it.
+        """
+        on_wire = threading.Event()
+        futures = [self._hedge_pool.submit(self._get, url, headers, body, event, on_wire)]
+        while True:
+            if not on_wire.wait(timeout=self.hedge_after):
+                if futures[0].done():
+                    break
+                continue
+            done, _ = wait(futures, timeout=self.hedge_after)
+            if done:
+                break
+            if on_wire.is_set():
+                futures.append(self._hedge_pool.submit(self._get, url, headers, body, event))
+                break
+
+        while True:
+            done, pending = wait(futures, return_when=FIRST_COMPLETED)
+            for f in done:
+                if f.exception() is None:
+                    return f.result()
+            if not pending:
+                return futures[0].result()
+            futures = list(pending)
+
+    def _get(self, url: str, headers: dict, body: dict=None, event: RequestEvent=None, on_wire: threading.Event=None):
+        """Send a GET request, or a POST request if body is set, through the transport, paced by the rate
+        limiter. Requests refused for exceeding the rate limit are queued until the limit resets, and sent again.
+        If event is set, the attempt is recorded in it. If on_wire is set, it's set while the request is sent,
+        and cleared while it waits on the rate limiter.
+        """
+        while True:
+            if on_wire is not None:
+                on_wire.clear()
+            if event is not None:
+                start = time.perf_counter()
+            self.rate_limiter.acquire(url)
+            if event is not None:
+                sent = time.perf_counter()
+            if on_wire is not None:
+                on_wire.set()
+            if body is None:
+                r = self.transport.get(url, headers=headers)
+            else:
+                r = self.transport.post(url, body, headers=headers)
+            if event is not None:
+                self._attempted(event, r, start, sent)
+            self.rate_limiter.update(url, r.status_code, r.headers)
+            if r.status_code != 429:
+                return r
+
+    def _attempted(self, event: RequestEvent, r, start: float, sent: float):
+        """Record an attempt, sent at sent after waiting on the rate limiter since start, in event."""
+        spent = time.perf_counter() - sent
+        server = min(r.elapsed.total_seconds(), spent) if r.elapsed is not None else 0.0
+        event.attempts += 1
+        event.wait += sent - start
+        event.server += server
+        event.transfer += spent - server
+        event.response(r.status_code, r.headers, int(r.headers.get("Content-Length", len(r.content))))
+
+    def _cached_request(self, endpoint: str, url: str, qtype: QuestradeType, key: str=None, raw: bool=False, format: str=None):
+        """Like _request, but the response is served from the cache while it's fresh.
+        endpoint - The name of the endpoint in TTLS.
+        """
+        ttl = self._ttl(endpoint)
+        if ttl is None:
+            return self._request(url, qtype=qtype, key=key, raw=raw, format=format)
+
+        ckey = self._url_key(endpoint, url)
+        data = self.cache.get(ckey)
+        if data is None:
+            data = self._request(url, qtype=qtype, key=key, raw=True)
+            self.cache.set(ckey, data, ttl)
+        return self._deserialize(data, qtype, key, raw, format)
+
+    def _request_each(self, endpoint: str, items: list, chunk_size: int, url_for: callable, qtype: QuestradeType, key: str, field: str, raw: bool=False, format: str=None):
+        """Like _request_all over chunks of items, but every response element is cached on its
+        own, under the value of its field. Only items missing from the cache are requested, and
+        the results are merged with the cached ones in the order of items.
+        endpoint - The name of the endpoint in TTLS.
+        items - The ids or names to look up.
+        chunk_size - The most items requested at once.
+        field - The key of a raw response element holding its item.
+        """
+        ttl = self._ttl(endpoint)
+        if ttl is None:
+            return self._request_all(chunked(items, chunk_size), url_for, qtype=qtype, key=key, raw=raw, format=format)
+
+        found, missing = self._cache_lookup(endpoint, items)
+        if missing:
+            data = self._request_all(chunked(missing, chunk_size), url_for, qtype=qtype, key=key, raw=True)
+            self._cache_store(endpoint, field, data[key], ttl, found)
+        return self._cache_merge(items, found, qtype, key, raw, format)
+
+    def _ttl(self, endpoint: str):
+        if self.cache is None:
+            return None
+        return self.cache_ttls.get(endpoint)
+
+    def _url_key(self, endpoint: str, url: str):
+        # the API server differs between logins, so it's left out of the key
+        parsed = urlparse(url)
+        return "%s:%s?%s" % (endpoint, parsed.path, parsed.query)
+
+    def _item_key(self, endpoint: str, item):
+        return "%s:%s" % (endpoint, str(item).upper())
+
+    def _cache_lookup(self, endpoint: str, items: list):
+        """Returns the cached elements for items, keyed by the uppercase item, and the distinct items missing."""
+        keys = {self._item_key(endpoint, i): str(i).upper() for i in items}
+        cached = self.cache.get_many(list(keys))
+        found = {keys[k]: v for k, v in cached.items()}
+        missing = list(dict.fromkeys(i for i in items if str(i).upper() not in found))
+        return found, missing
+
+    def _cache_store(self, endpoint: str, field: str, rows: list, ttl: float, found: dict):
+        """Cache freshly requested elements, adding them to found, keyed by the uppercase value of field."""
+        values = {}
+        for row in rows:
+            values[self._item_key(endpoint, row[field])] = row
+            found[str(row[field]).upper()] = row
+        self.cache.set_many(values, ttl)
+
+    def _cache_merge(self, items: list, found: dict, qtype: QuestradeType, key: str, raw: bool, format: str):
+        """Deserialize the elements found for items, in the order of items."""
+        rows = [found[str(i).upper()] for i in items if str(i).upper() in found]
+        return self._deserialize({key: rows}, qtype, key, raw, format)
+
+    def _quotes_url(self, chunk: list):
+        """The URL of the quotes of the symbol ids in chunk."""
+        qids = ','.join(str(i) for i in chunk)
+        return urljoin(self.server, "/v1/markets/quotes?ids=%s" % qids)
+
+    def _request_all(self, chunks: list, url_for: callable, qtype: QuestradeType, key: str=None, raw: bool=False, unique: callable=None, format: str=None, body_for: callable=None):
+        """Make one request per chunk, concurrently, merging the results in chunk order.
+        chunks - The pieces a call was split into, such as lists of ids.
+        url_for - A callable returning the URL to request for a chunk.
+        qtype - The types.Questrade object that should be used for deserializing data.
+        key - A string, containing the key within the Questrade API response, that contains the response elements.
+        raw - If set, return the raw JSON rather than objects of qtype.
+        unique - If set, a callable returning an identifying key for a raw response element. Only
+                 the first element with a given key is kept, removing overlaps between chunks.
+        format - If set to "columnar", return a dictionary of NumPy arrays, one per field, or if set to "lazy", views reading fields on access, rather than objects of qtype.
+        body_for - If set, a callable returning the JSON body to POST for a chunk.
+
+        If some of the requests fail, a BatchError holding the successful results is raised.
+        """
+        if body_for is None:
+            body_for = _no_body
+
+        if len(chunks) == 1:
+            return self._request(url_for(chunks[0]), qtype=qtype, key=key, raw=raw, format=format, body=body_for(chunks[0]))
+
+        fetch_raw = raw or unique is not None or format is not None
+        with ThreadPoolExecutor(max_workers=max(1, min(self.MAX_WORKERS, len(chunks)))) as pool:
+            futures = [pool.submit(self._request, url_for(c), qtype, key, fetch_raw, None, body_for(c)) for c in chunks]
+
+        parts, errors = [], []
+        for c, f in zip(chunks, futures):
+            try:
+                parts.append(f.result())
+            except Exception as e:
+                errors.append((c, e))
+
+        results = self._combine(parts, qtype, key, raw, unique, format)
+        if errors:
+            raise BatchError(results, errors)
+        return results
+
+    def _iter_all(self, chunks: list, url_for: callable, qtype: QuestradeType, key: str=None, raw: bool=False, unique: callable=None, format: str=None):
+        """A generator making one request per chunk, concurrently, and yielding the results
+        of each request as soon as it arrives. The arguments are those of _request_all.
+
+        A failed request raises a BatchError, naming the chunk that failed.
+        """
+        seen = set()
+        with ThreadPoolExecutor(max_workers=max(1, min(self.MAX_WORKERS, len(chunks)))) as pool:
+            futures = {pool.submit(self._request, url_for(c), qtype, key, True): c for c in chunks}
+            try:
+                for f in as_completed(futures):
+                    try:
+                        data = f.result()
+                    except Exception as e:
+                        raise BatchError([] if not raw else {}, [(futures[f], e)])
+                    yield self._window(data, qtype, key, raw, unique, seen, format)
+            finally:
+                for f in futures:
+                    f.cancel()
+
+    def _iter_ordered(self, chunks: list, url_for: callable, qtype: QuestradeType, key: str=None, raw: bool=False, unique: callable=None, max_workers: int=1):
+        """A generator making one request per chunk, yielding the elements of every response in chunk order.
+        The arguments are those of _request_all. At most max_workers requests are in flight at once.
+
+        Elements are only checked against the previous chunk for duplicates, so memory use stays
+        bounded by a few responses, however many chunks there are.
+        """
+        max_workers = max(1, max_workers)
+        chunks = iter(chunks)
+        previous = set()
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            pending = deque()
+
+            def submit():
+                for c in chunks:
+                    pending.append((c, pool.submit(self._request, url_for(c), qtype, key, True)))
+                    return
+
+            for _ in range(max_workers):
+                submit()
+
+            try:
+                while pending:
+                    c, f = pending.popleft()
+                    try:
+                        data = f.result()
+                    except Exception as e:
+                        raise BatchError([], [(c, e)])
+                    submit()
+
+                    rows = data[key] if key is not None else data
+                    if unique is not None:
+                        current = set(unique(r) for r in rows)
+                        rows = [r for r in rows if unique(r) not in previous]
+                        previous = current
+                    yield from self._deserialize(rows, qtype, raw=raw)
+            finally:
+                for _, f in pending:
+                    f.cancel()
+
+    def _combine(self, parts: list, qtype: QuestradeType, key: str=None, raw: bool=False, unique: callable=None, format: str=None):
+        """Merge the per-chunk results of _request_all. When unique or format is set, the parts are raw JSON."""
+        if unique is None and format is None:
+            return merge(parts, key=key, raw=raw)
+        merged = merge(parts, key=key, raw=True, unique=unique)
+        return self._deserialize(merged, qtype, key, raw, format)
+
+    def _window(self, data, qtype: QuestradeType, key: str=None, raw: bool=False, unique: callable=None, seen: set=None, format: str=None):
+        """Deserialize the raw JSON of one chunk of _iter_all, dropping elements already seen."""
+        if unique is not None:
+            if key is not None:
+                data = dict(data)
+                data[key] = dedupe(data[key], unique, seen)
             else:
-                raise OSError(r.content.decode('utf-8'))
+                data = dedupe(data, unique, seen)
+        return self._deserialize(data, qtype, key, raw, format)
 
+    def _deserialize(self, data, qtype: QuestradeType, key: str=None, raw: bool=False, format: str=None):
+        """Turn a decoded Questrade response into a list of qtype objects.
+        data - The decoded JSON response.
+        qtype - The types.Questrade object that should be used for deserializing data.
+        key - A string, containing the key within the Questrade API response, that contains the response elements.
+        raw - If set, return the raw JSON rather than objects of qtype.
+        format - If set to "columnar", return a dictionary of NumPy arrays, one per field, or if set to "lazy",
+                 lazy.View objects reading the raw JSON on access, rather than objects of qtype.
+        """
         if raw:
-            return r.json()
+            return data
 
         if key is not None:
-            objs = r.json()[key]
+            objs = data[key]
         else:
-            objs = r.json()
+            objs = data
 
-        qts = []
-        for o in objs:
-            qt = qtype(d=o)
-            qts.append(qt)
-        return qts
+        if format == "columnar":
+            return columns(objs, qtype)
+        if format == "lazy":
+            return views(objs, qtype)
+        if format is not None:
+            raise AttributeError("Invalid format. Format must be one of %s" % list(self.FORMATS))
+        return qtype.from_list(objs)
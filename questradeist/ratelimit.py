@@ -0,0 +1,123 @@
+import threading
+import time
+from urllib.parse import urlparse
+
+
+class TokenBucket(object):
+    """A token bucket pacing requests to a steady rate, while allowing short bursts.
+    It also tracks the remaining budget the API reports, holding requests back
+    until the budget resets once it runs out.
+    """
+
+    def __init__(self, rate: float, capacity: float=1):
+        """Constructor
+        rate - The number of requests allowed per second.
+        capacity - The largest burst of requests allowed. A burst is sent on top of the steady
+                   rate, so the default of 1 keeps any one second within the rate, plus one.
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = self.capacity
+        self.last = time.monotonic()
+        self.remaining = None
+        self.reset = None
+        self._lock = threading.Lock()
+
+    def reserve(self):
+        """Take a token, returning the number of seconds to wait before the request may be sent."""
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.last) * self.rate)
+            self.last = now
+            self.tokens -= 1
+            delay = -self.tokens / self.rate if self.tokens < 0 else 0.0
+
+            if self.remaining is not None:
+                if self.remaining <= 0 and self.reset is not None:
+                    delay += max(self.reset - time.time(), 0.0)
+                self.remaining -= 1
+            return max(delay, 0.0)
+
+    def update(self, remaining: int, reset: float=None):
+        """Record the budget reported by the API.
+        remaining - The number of requests left before the limit resets.
+        reset - The unix time at which the limit resets.
+        """
+        with self._lock:
+            if reset is not None and self.reset is not None and reset < self.reset:
+                # a response that was overtaken by one reporting a later window
+                return
+            self.remaining = remaining
+            self.reset = reset
+
+    def exhaust(self, reset: float=None):
+        """Mark the budget as used up until reset, after the API refused a request."""
+        with self._lock:
+            self.remaining = 0
+            self.reset = reset if reset is not None else time.time() + 1.0 / self.rate
+
+
+class RateLimiter(object):
+    """This class schedules requests within Questrade's rate limits. Account calls and
+    market data calls have separate budgets, each paced by its own TokenBucket.
+    https://www.questrade.com/api/documentation/rate-limiting
+
+    A single limiter is shared by every Questrade object in the process, unless one is passed in.
+    """
+
+    ACCOUNT = "account"
+    MARKET = "market"
+
+    def __init__(self, account_rate: float=30, market_rate: float=20):
+        """Constructor
+        account_rate - Account calls allowed per second.
+        market_rate - Market data calls allowed per second.
+        """
+        self.buckets = {
+            self.ACCOUNT: TokenBucket(account_rate),
+            self.MARKET: TokenBucket(market_rate),
+        }
+
+    def bucket(self, url: str):
+        """Returns the TokenBucket for the endpoint class of url."""
+        if urlparse(url).path.startswith("/v1/accounts"):
+            return self.buckets[self.ACCOUNT]
+        return self.buckets[self.MARKET]
+
+    def reserve(self, url: str):
+        """Reserve a request to url, returning the number of seconds to wait before sending it."""
+        return self.bucket(url).reserve()
+
+    def acquire(self, url: str):
+        """Block until a request to url may be sent."""
+        delay = self.reserve(url)
+        if delay > 0:
+            time.sleep(delay)
+
+    def update(self, url: str, status: int, headers: dict):
+        """Record the rate limit headers of a response from url. A 429 status exhausts the budget
+        until the reset time, so that the request, and those queued behind it, wait for it.
+        """
+        remaining = headers.get("X-RateLimit-Remaining")
+        reset = headers.get("X-RateLimit-Reset")
+        reset = float(reset) if reset is not None else None
+
+        if status == 429:
+            self.bucket(url).exhaust(reset)
+        elif remaining is not None:
+            self.bucket(url).update(int(remaining), reset)
+
+
+_default = None
+_default_lock = threading.Lock()
+
+
+def default_rate_limiter():
+    """Returns the process-wide RateLimiter, shared by every Questrade object
+    that wasn't given a rate limiter of its own.
+    """
+    global _default
+    with _default_lock:
+        if _default is None:
+            _default = RateLimiter()
+    return _default
@@ -0,0 +1,52 @@
+import asyncio
+import random
+import requests
+
+try:
+    import aiohttp
+    _ASYNC_EXCEPTIONS = (aiohttp.ClientConnectionError, aiohttp.ServerTimeoutError)
+except ImportError:  # pragma: no cover
+    _ASYNC_EXCEPTIONS = ()
+
+
+class RetryPolicy(object):
+    """This class decides which failed requests are worth retrying, and how long to
+    wait before each new attempt. Waits grow exponentially, with full jitter, so that
+    clients failing together don't retry together.
+
+    Server errors and dropped connections are retried. Anything else, such as a bad
+    request or a missing resource, is fatal and raised straight away.
+    """
+
+    STATUSES = (500, 502, 503, 504)
+    EXCEPTIONS = (requests.ConnectionError, requests.Timeout, ConnectionError, TimeoutError, asyncio.TimeoutError) + _ASYNC_EXCEPTIONS
+
+    def __init__(self, attempts: int=3, backoff: float=0.25, max_backoff: float=8.0, statuses: tuple=None, exceptions: tuple=None):
+        """Constructor
+        attempts - The most times a request is sent, including the first. 1 disables retries.
+        backoff - The upper bound, in seconds, of the wait before the first retry. It doubles on every retry.
+        max_backoff - The largest upper bound of any wait, in seconds.
+        statuses - The HTTP status codes worth retrying.
+        exceptions - The exception types, raised while sending a request, worth retrying.
+        """
+        self.attempts = attempts
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.statuses = statuses if statuses is not None else self.STATUSES
+        self.exceptions = exceptions if exceptions is not None else self.EXCEPTIONS
+
+    def retry_status(self, status: int, attempt: int):
+        """Returns True if a response with status, on the given (zero based) attempt, should be retried."""
+        return status in self.statuses and attempt + 1 < self.attempts
+
+    def retry_error(self, error: Exception, attempt: int):
+        """Returns True if the error raised by the given (zero based) attempt should be retried."""
+        return isinstance(error, self.exceptions) and attempt + 1 < self.attempts
+
+    def delay(self, attempt: int):
+        """Returns the number of seconds to wait after the given (zero based) attempt failed."""
+        return random.uniform(0, min(self.max_backoff, self.backoff * (2 ** attempt)))
+
+
+# a policy sending every request once, raising any error straight away
+NO_RETRY = RetryPolicy(attempts=1)
@@ -0,0 +1,110 @@
+import threading
+from operator import itemgetter
+from typing import Optional
+from .types import Quote
+
+
+class QuoteStore(object):
+    """The latest quote of every symbol seen, keyed by symbol id, for polling a large
+    watchlist. Each response applied is compared against the stored quotes, and only
+    the quotes that changed are built into Quote objects and handed to subscribers.
+
+    Quotes are stored as the raw response elements, rather than as objects, so applying
+    a response costs one dictionary comparison per quote, done in C. Fields are only
+    compared one by one for quotes that did change.
+    """
+
+    def __init__(self, fields: Optional[list]=None):
+        """Constructor
+        fields - If set, the raw field names, such as "lastTradePrice", that count as a change.
+                 Changes to other fields, such as timestamps, are stored but not reported.
+        """
+        self.fields = tuple(fields) if fields else None
+        self._compare = itemgetter(*self.fields) if self.fields else None
+        self._rows = {}
+        self._callbacks = []
+        self._lock = threading.Lock()
+
+    def subscribe(self, callback: callable):
+        """Call callback(changes) whenever quotes change, with a list of (Quote, changed fields)
+        tuples. The changed fields are uppercase names, and every field for a symbol seen for the
+        first time. Returns callback, so this works as a decorator.
+        """
+        self._callbacks.append(callback)
+        return callback
+
+    def unsubscribe(self, callback: callable):
+        """Stop calling callback."""
+        self._callbacks.remove(callback)
+
+    def apply(self, data):
+        """Store the quotes of a response, returning a list of (Quote, changed fields) tuples for
+        those that changed, in response order. Subscribers are called with the same list.
+        data - A raw quotes response, or its list of quotes.
+        """
+        rows = data["quotes"] if isinstance(data, dict) else data
+
+        changed = []
+        with self._lock:
+            stored = self._rows
+            compare = self._compare
+            for new in rows:
+                id = new["symbolId"]
+                old = stored.get(id)
+                stored[id] = new
+                if old is None:
+                    changed.append((new, None))
+                elif old != new and (compare is None or self._differ(old, new)):
+                    changed.append((new, old))
+
+        if not changed:
+            return []
+
+        quotes = Quote.from_list([new for new, _ in changed])
+        changes = [(q, self._changed_fields(new, old)) for q, (new, old) in zip(quotes, changed)]
+        for callback in self._callbacks:
+            callback(changes)
+        return changes
+
+    def poll(self, symbol, ids: list):
+        """Request quotes for ids and apply them, returning the changes.
+        symbol - The Symbol object used to request quotes.
+        ids - A list of questrade IDs whose stock quote data is to be retrieved.
+        """
+        return self.apply(symbol.quotes(ids, raw=True))
+
+    def get(self, id: int):
+        """Returns the latest Quote for the symbol id, or None if it hasn't been seen."""
+        row = self._rows.get(id)
+        return Quote(row) if row is not None else None
+
+    def quotes(self, ids: Optional[list]=None):
+        """Returns the latest Quote of every symbol in ids, or of every symbol seen, skipping unseen ids."""
+        rows = self._rows
+        if ids is None:
+            return Quote.from_list(list(rows.values()))
+        return Quote.from_list([rows[i] for i in ids if i in rows])
+
+    def clear(self):
+        """Forget every stored quote, so the next response reports all of them."""
+        with self._lock:
+            self._rows = {}
+
+    def _differ(self, old: dict, new: dict):
+        try:
+            return self._compare(old) != self._compare(new)
+        except KeyError:
+            # a field appeared or disappeared
+            return any(old.get(k) != new.get(k) for k in self.fields)
+
+    def _changed_fields(self, new: dict, old: Optional[dict]):
+        if old is None:
+            return tuple(k.upper() for k in new)
+        keys = self.fields if self.fields else list(new) + [k for k in old if k not in new]
+        return tuple(k.upper() for k in keys if old.get(k) != new.get(k))
+
+    def __len__(self):
+        return len(self._rows)
+
+    def __contains__(self, id: int):
+        return id in self._rows
@@ -0,0 +1,159 @@
+import asyncio
+import inspect
+import json
+from urllib.parse import urljoin, urlparse
+from .retry import RetryPolicy
+from .types import Quote
+
+try:
+    import aiohttp
+except ImportError:  # pragma: no cover
+    aiohttp = None
+
+
+class StreamError(ConnectionError):
+    """Raised when the streaming server drops the connection or sends an error."""
+
+    def __init__(self, message: str, code: int=None):
+        self.code = code
+        ConnectionError.__init__(self, message)
+
+
+class QuoteStream(object):
+    """Live Level 1 quotes, pushed over a WebSocket by Questrade's streaming server.
+    https://www.questrade.com/api/documentation/streaming
+
+    Iterate over the stream with async for, or register callbacks with on_quote() and
+    await run(). Questrade sends only the fields that changed, so every update is merged
+    into table, which holds the current state of each symbol, and a Quote of the merged
+    state is delivered.
+
+    Dropped connections are reopened on a new streaming port, waiting between attempts
+    according to the retry policy. An expired or rejected access token is refreshed
+    before reconnecting.
+    """
+
+    # the error codes Questrade sends for a missing, invalid or expired access token
+    AUTH_ERRORS = (1014, 1016, 1017)
+
+    def __init__(self, symbol, ids: list, retry: RetryPolicy=None, heartbeat: float=30.0):
+        """Constructor
+        symbol - The Symbol or AsyncSymbol object used to ask for a streaming port.
+        ids - The Questrade symbol ids to stream quotes for.
+        retry - The policy for reconnecting. Its attempts are counted since the last quote received.
+        heartbeat - Seconds between pings, to detect a connection that died silently.
+        """
+        if aiohttp is None:
+            raise ImportError("aiohttp is required for streaming. Install questradeist[async].")
+        if not ids:
+            raise AttributeError("a list of ids must be specified")
+
+        self.symbol = symbol
+        self.ids = list(ids)
+        self.retry = retry if retry is not None else RetryPolicy(attempts=10)
+        self.heartbeat = heartbeat
+        self.table = {}
+        self.connects = 0
+        self._callbacks = []
+        self._ws = None
+        self._auth = None
+        self._closed = False
+
+    def on_quote(self, callback: callable):
+        """Call callback(quote) with every Quote delivered. Returns callback, so this works as a decorator."""
+        self._callbacks.append(callback)
+        return callback
+
+    def snapshot(self):
+        """Returns a Quote of the current state of every symbol with data, in ids order."""
+        return [Quote(dict(self.table[i])) for i in self.ids if i in self.table]
+
+    async def run(self):
+        """Deliver quotes to the registered callbacks until close() is called."""
+        async for _ in self:
+            pass
+
+    async def close(self):
+        """Stop streaming, closing the connection."""
+        self._closed = True
+        if self._ws is not None:
+            await self._ws.close()
+
+    def __aiter__(self):
+        return self.updates()
+
+    async def updates(self):
+        """An async generator of Quote objects, one per update received, until close() is called."""
+        attempt = 0
+        while not self._closed:
+            try:
+                async for data in self._connect():
+                    attempt = 0
+                    for q in self._merge(data):
+                        yield q
+                if not self._closed:
+                    raise StreamError("The streaming server closed the connection")
+            except self.retry.exceptions as e:
+                if self._closed:
+                    return
+                code = getattr(e, "code", None)
+                if code is not None and code not in self.AUTH_ERRORS or not self.retry.retry_error(e, attempt):
+                    raise
+                if code is not None:
+                    await self._refresh()
+                else:
+                    await asyncio.sleep(self.retry.delay(attempt))
+                attempt += 1
+
+    async def _connect(self):
+        """Open a connection on a new streaming port, yielding each decoded message with quotes."""
+        loop = asyncio.get_running_loop()
+        self._auth = await loop.run_in_executor(None, self.symbol.credentials.current)
+
+        port = await self._port()
+        parsed = urlparse(self.symbol.server)
+        url = "%s://%s:%d/" % ("wss" if parsed.scheme == "https" else "ws", parsed.hostname, port)
+
+        async with aiohttp.ClientSession() as session:
+            async with session.ws_connect(url, heartbeat=self.heartbeat) as ws:
+                self._ws = ws
+                self.connects += 1
+                try:
+                    await ws.send_str(self._auth.ACCESS_TOKEN)
+                    async for msg in ws:
+                        if msg.type != aiohttp.WSMsgType.TEXT:
+                            break
+                        data = json.loads(msg.data)
+                        if "code" in data:
+                            raise StreamError(data.get("message", "Streaming error"), data["code"])
+                        if "quotes" in data:
+                            yield data
+                finally:
+                    self._ws = None
+
+    async def _port(self):
+        """Ask Questrade for a port streaming quotes for ids."""
+        qids = ",".join(str(i) for i in self.ids)
+        url = urljoin(self.symbol.server, "/v1/markets/quotes?ids=%s&stream=true&mode=WebSocket" % qids)
+        if inspect.iscoroutinefunction(self.symbol._request):
+            data = await self.symbol._request(url, qtype=None, raw=True)
+        else:
+            loop = asyncio.get_running_loop()
+            data = await loop.run_in_executor(None, lambda: self.symbol._request(url, qtype=None, raw=True))
+        return data["streamPort"]
+
+    async def _refresh(self):
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self.symbol.credentials.refresh, self._auth)
+
+    def _merge(self, data: dict):
+        """Merge the partial quotes of a message into table, returning a Quote of each merged state."""
+        quotes = []
+        for update in data["quotes"]:
+            row = self.table.setdefault(update["symbolId"], {})
+            row.update(update)
+            q = Quote(dict(row))
+            for callback in self._callbacks:
+                callback(q)
+            quotes.append(q)
+        return quotes
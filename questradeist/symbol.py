@@ -1,62 +1,163 @@
 from .questrade import Questrade, to_datestring
+from .batch import chunked, windows
+from .retry import RetryPolicy
 import datetime
 from typing import Optional
 from urllib.parse import urljoin
-from .types import Candle, Quote, SymbolData, SearchSymbol
+from .types import Candle, OptionQuote, OptionStrike, Quote, SymbolData, SearchSymbol
 
 
 class Symbol(Questrade):
     """This class communicates with the various symbol APIs in order to provide
     symbol data such as price history and current quotes.
+
+    Calls taking a list of ids or symbols split it into chunks of at most CHUNK_SIZE,
+    requested concurrently. If only some chunks fail, a batch.BatchError is raised,
+    holding the results that did arrive.
     """
 
+    CHUNK_SIZE = 100
+
+    OPTION_TYPES = ("Call", "Put")
+
+    # the most candles the API returns for a single request
+    MAX_CANDLES = 2000
+
+    INTERVALS = {
+        "OneMinute": datetime.timedelta(minutes=1),
+        "TwoMinutes": datetime.timedelta(minutes=2),
+        "ThreeMinutes": datetime.timedelta(minutes=3),
+        "FourMinutes": datetime.timedelta(minutes=4),
+        "FiveMinutes": datetime.timedelta(minutes=5),
+        "TenMinutes": datetime.timedelta(minutes=10),
+        "FifteenMinutes": datetime.timedelta(minutes=15),
+        "TwentyMinutes": datetime.timedelta(minutes=20),
+        "HalfHour": datetime.timedelta(minutes=30),
+        "OneHour": datetime.timedelta(hours=1),
+        "TwoHours": datetime.timedelta(hours=2),
+        "FourHours": datetime.timedelta(hours=4),
+        "OneDay": datetime.timedelta(days=1),
+        "OneWeek": datetime.timedelta(weeks=1),
+        "OneMonth": datetime.timedelta(days=31),
+        "OneYear": datetime.timedelta(days=366),
+    }
+
     def __init__(self, **kwargs):
         Questrade.__init__(self, **kwargs)
 
-    def get(self, ids: Optional[int]=None, symbols: Optional[str]=None, raw: Optional[bool]=False):
+    def get(self, ids: Optional[int]=None, symbols: Optional[str]=None, raw: Optional[bool]=False, format: Optional[str]=None):
         """Retrieve detailed information about one or more symbol.
         https://www.questrade.com/api/documentation/rest-operations/market-calls/symbols-id
 
         ids - A list of one or more questrade stock symbol ids.
         symbols - A list of one or more stock symbols.
         raw - If set, return the raw JSON rather than objects of qtype.
+        format - If set to "columnar", return a dictionary of NumPy arrays, one per field, or if set to "lazy", views reading fields on access, rather than objects of qtype.
         """
         if not ids and not symbols or ids is not None and symbols is not None:
             raise AttributeError("either a list of ids or symbols must be specified")
 
-        url = None
         if ids:
-            qids = ','.join(str(i) for i in ids)
-            url = urljoin(self.server, "/v1/symbols/?ids=%s" % qids)
+            items, field, param = ids, "symbolId", "ids"
+        else:
+            items, field, param = symbols, "symbol", "names"
 
-        if symbols:
-            qnames = ','.join(symbols)
-            url = urljoin(self.server, "/v1/symbols/?names=%s" % qnames)
+        def url_for(chunk):
+            query = ','.join(str(i) for i in chunk)
+            return urljoin(self.server, "/v1/symbols/?%s=%s" % (param, query))
 
-        return self._request(url, qtype=SymbolData, key="symbols", raw=raw)
+        return self._request_each("symbols", items, self.CHUNK_SIZE, url_for, qtype=SymbolData, key="symbols", field=field,
+                                  raw=raw, format=format)
 
-    def search(self, sym: str, raw: Optional[bool]=False):
+    def search(self, sym: str, raw: Optional[bool]=False, format: Optional[str]=None):
         """Search questrade for a matching stock symbol.
         https://www.questrade.com/api/documentation/rest-operations/market-calls/symbols-search
 
         sym: A string containing a stock symbol
         raw - If set, return the raw JSON rather than objects of qtype.
+        format - If set to "columnar", return a dictionary of NumPy arrays, one per field, or if set to "lazy", views reading fields on access, rather than objects of qtype.
         """
         url = urljoin(self.server, "/v1/symbols/search?prefix=%s" % sym)
-        return self._request(url, qtype=SearchSymbol, key="symbols", raw=raw)
+        return self._cached_request("search", url, qtype=SearchSymbol, key="symbols", raw=raw, format=format)
 
-    def quotes(self, ids: list[int], raw: Optional[bool]=False):
+    def quotes(self, ids: list[int], raw: Optional[bool]=False, format: Optional[str]=None):
         """Retrieves the most recent quote data for a list of stock symbols.
         https://www.questrade.com/api/documentation/rest-operations/market-calls/markets-quotes-id
 
         ids - A list of questrade IDs whose stock quote data is to be retrieved.
         raw - If set, return the raw JSON rather than objects of qtype.
+        format - If set to "columnar", return a dictionary of NumPy arrays, one per field, or if set to "lazy", views reading fields on access, rather than objects of qtype.
+        """
+        return self._request_all(chunked(ids, self.CHUNK_SIZE), self._quotes_url, qtype=Quote, key="quotes", raw=raw, format=format)
+
+    def option_chain(self, id: int, raw: Optional[bool]=False, format: Optional[str]=None):
+        """Retrieves the option chain of a symbol: the strike prices of every expiry, with the ids of their calls and puts.
+        https://www.questrade.com/api/documentation/rest-operations/market-calls/symbols-id-options
+
+        id - An integer containing the internal questrade ID of the underlying symbol.
+        raw - If set, return the raw JSON, nested by expiry and root, rather than objects of qtype.
+        format - If set to "columnar", return a dictionary of NumPy arrays, one per field, or if set to "lazy", views reading fields on access, rather than objects of qtype.
+
+        The chain is flattened into one OptionStrike per strike price of every expiry and root.
+        """
+        return self._chain(self._cached_request("options", self._options_url(id), qtype=None, key="optionChain", raw=True), raw, format)
+
+    def option_quotes(self, ids: Optional[list[int]]=None, underlying: Optional[int]=None, expiries: Optional[list[datetime.datetime]]=None,
+                      option_type: Optional[str]=None, min_strike: Optional[float]=None, max_strike: Optional[float]=None,
+                      raw: Optional[bool]=False, format: Optional[str]=None):
+        """Retrieves quotes, including greeks, for options, by id, by underlying symbol and expiry, or both.
+        https://www.questrade.com/api/documentation/rest-operations/market-calls/markets-quotes-options
+
+        ids - A list of questrade IDs of options.
+        underlying - The questrade ID of an underlying symbol, whose options are quoted.
+        expiries - With underlying, the expiry dates of the options quoted.
+        option_type - With underlying, one of OPTION_TYPES to only quote calls or puts.
+        min_strike - With underlying, the lowest strike price quoted.
+        max_strike - With underlying, the highest strike price quoted.
+        raw - If set, return the raw JSON rather than objects of qtype.
+        format - If set to "columnar", return a dictionary of NumPy arrays, one per field, or if set to "lazy", views reading fields on access, rather than objects of qtype.
+
+        Ids are sent in chunks of at most CHUNK_SIZE, and every expiry is a filter of its own,
+        all requested concurrently. An option matched more than once is returned once.
+        """
+        if not ids and underlying is None:
+            raise AttributeError("either a list of ids or an underlying symbol must be specified")
+        if underlying is not None and not expiries:
+            raise AttributeError("expiries are required to quote the options of an underlying symbol")
+        if option_type is not None and option_type not in self.OPTION_TYPES:
+            raise AttributeError("Invalid option type. Option type must be one of %s" % list(self.OPTION_TYPES))
+
+        bodies = [{"optionIds": chunk} for chunk in chunked(ids or [], self.CHUNK_SIZE)]
+        if underlying is not None:
+            for expiry in expiries:
+                f = {"underlyingId": underlying, "expiryDate": to_datestring(expiry)}
+                if option_type is not None:
+                    f["optionType"] = option_type
+                if min_strike is not None:
+                    f["minstrikePrice"] = min_strike
+                if max_strike is not None:
+                    f["maxstrikePrice"] = max_strike
+                bodies.append({"filters": [f]})
+
+        url = urljoin(self.server, "/v1/markets/quotes/options")
+        unique = (lambda q: q["symbolId"]) if len(bodies) > 1 else None
+        return self._request_all(bodies, lambda body: url, qtype=OptionQuote, key="optionQuotes", raw=raw, unique=unique,
+                                 format=format, body_for=lambda body: body)
+
+    def stream(self, ids: list[int], retry: RetryPolicy=None):
+        """Stream live quotes for a list of stock symbols, rather than polling quotes().
+        https://www.questrade.com/api/documentation/streaming
+
+        ids - A list of questrade IDs whose stock quote data is to be streamed.
+        retry - The policy for reconnecting after the connection drops.
+
+        Returns a stream.QuoteStream, to be iterated over with async for, or run with callbacks.
+        Requires aiohttp.
         """
-        qids = ','.join(str(i) for i in ids)
-        url = urljoin(self.server, "/v1/markets/quotes?ids=%s" % qids)
-        return self._request(url, qtype=Quote, key="quotes", raw=raw)
+        from .stream import QuoteStream
+        return QuoteStream(self, ids, retry=retry)
 
-    def history(self, id: int, start: datetime.datetime, end: datetime.datetime, interval: str="OneDay", raw: Optional[bool]=False):
+    def history(self, id: int, start: datetime.datetime, end: datetime.datetime, interval: str="OneDay", raw: Optional[bool]=False, format: Optional[str]=None):
         """Returns historical market data in an OHLC candlesick, for the provided symbol.
         https://www.questrade.com/api/documentation/rest-operations/market-calls/markets-candles-id
 
@@ -65,13 +166,65 @@ class Symbol(Questrade):
         end - The end time of the candle.
         interval - The interval for the candle data.
         raw - If set, return the raw JSON rather than objects of qtype.
+        format - If set to "columnar", return a dictionary of NumPy arrays, one per field, or if set to "lazy", views reading fields on access, rather than objects of qtype.
+
+        Ranges holding more than MAX_CANDLES candles are split into sub-ranges, fetched concurrently.
         """
-        if start > end:
-            start_date = to_datestring(end)
-            end_date = to_datestring(start)
-        else:
-            start_date = to_datestring(start)
-            end_date = to_datestring(end)
+        chunks = self._candle_windows(start, end, interval)
+        return self._request_all(chunks, self._candles_url(id, interval), qtype=Candle, key="candles", raw=raw,
+                                 unique=lambda c: c["start"], format=format)
+
+    def iter_history(self, id: int, start: datetime.datetime, end: datetime.datetime, interval: str="OneDay", raw: Optional[bool]=False, max_workers: Optional[int]=1):
+        """Returns a generator of historical candles for the provided symbol, in time order.
+        Unlike history, only a few sub-ranges of MAX_CANDLES candles are held in memory at once.
+
+        id - An integer containing the internal questrade ID.
+        start - The start time of the candle.
+        end - The end time of the candle.
+        interval - The interval for the candle data.
+        raw - If set, yield the raw JSON candles rather than objects of qtype.
+        max_workers - The number of sub-ranges fetched ahead, concurrently.
+        """
+        chunks = self._candle_windows(start, end, interval)
+        return self._iter_ordered(chunks, self._candles_url(id, interval), qtype=Candle, key="candles", raw=raw,
+                                  unique=lambda c: c["start"], max_workers=max_workers)
+
+    def _options_url(self, id: int):
+        return urljoin(self.server, "/v1/symbols/%d/options" % id)
+
+    def _chain(self, data: dict, raw: bool, format: str):
+        """Flatten a raw option chain into one row per strike price, and deserialize the rows."""
+        if raw:
+            return data
+        rows = []
+        for expiry in data["optionChain"]:
+            for root in expiry["chainPerRoot"]:
+                for strike in root["chainPerStrikePrice"]:
+                    rows.append({
+                        "expiryDate": expiry["expiryDate"],
+                        "description": expiry["description"],
+                        "listingExchange": expiry["listingExchange"],
+                        "optionExerciseType": expiry["optionExerciseType"],
+                        "root": root["optionRoot"],
+                        "multiplier": root["multiplier"],
+                        "strikePrice": strike["strikePrice"],
+                        "callSymbolId": strike["callSymbolId"],
+                        "putSymbolId": strike["putSymbolId"],
+                    })
+        return self._deserialize(rows, OptionStrike, raw=False, format=format)
+
+    def _candle_windows(self, start: datetime.datetime, end: datetime.datetime, interval: str):
+        """Split a time range into whole-day sub-ranges, each holding at most MAX_CANDLES candles of interval."""
+        step = self.INTERVALS.get(interval)
+        if step is None:
+            raise AttributeError("Invalid interval. Interval must be one of %s" % list(self.INTERVALS))
+
+        # boundaries are shared by neighbouring sub-ranges, leaving room for one extra candle
+        days = (step * (self.MAX_CANDLES - 1)).days
+        return windows(start, end, datetime.timedelta(days=max(1, days)))
 
-        url = urljoin(self.server, "/v1/markets/candles/%s?startTime=%s&endTime=%s&interval=%s" % (id, start_date, end_date, interval))
-        return self._request(url, qtype=Candle, key="candles", raw=raw)
\ No newline at end of file
+    def _candles_url(self, id: int, interval: str):
+        def url_for(window):
+            start_date, end_date = to_datestring(window[0]), to_datestring(window[1])
+            return urljoin(self.server, "/v1/markets/candles/%s?startTime=%s&endTime=%s&interval=%s" % (id, start_date, end_date, interval))
+        return url_for
@@ -0,0 +1,89 @@
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+
+
+class Transport(object):
+    """This class is the HTTP layer used by all Questrade calls. It issues every
+    request through the module-level requests API, which means a new connection
+    (and TLS handshake) per call. Subclass it to change how requests are sent.
+    """
+
+    def __init__(self, timeout: float=30.0, compress: bool=True):
+        """Constructor
+        timeout - Seconds to wait for the server to connect and respond.
+        compress - If set, ask the server for a gzip/deflate compressed response.
+        """
+        self.timeout = timeout
+        self.headers = {"Accept-Encoding": "gzip, deflate" if compress else "identity"}
+
+    def _headers(self, headers: dict=None):
+        h = dict(self.headers)
+        if headers:
+            h.update(headers)
+        return h
+
+    def get(self, url: str, headers: dict=None):
+        """Issue a GET request, returning the requests.Response."""
+        return requests.get(url, headers=self._headers(headers), timeout=self.timeout)
+
+    def post(self, url: str, body: dict, headers: dict=None):
+        """Issue a POST request with a JSON body, returning the requests.Response."""
+        return requests.post(url, json=body, headers=self._headers(headers), timeout=self.timeout)
+
+    def close(self):
+        """Release any resources held by the transport."""
+        pass
+
+
+class PooledTransport(Transport):
+    """A transport backed by a requests.Session, keeping connections to the API
+    server alive and pooled between calls. A single instance is safe to share
+    between threads, and between Symbol and Account objects.
+    """
+
+    def __init__(self, pool_connections: int=4, pool_maxsize: int=16, timeout: float=30.0, compress: bool=True, keep_alive: bool=True, pool_block: bool=False):
+        """Constructor
+        pool_connections - The number of distinct hosts to keep connection pools for.
+        pool_maxsize - The maximum number of connections kept open per host.
+        timeout - Seconds to wait for the server to connect and respond.
+        compress - If set, ask the server for a gzip/deflate compressed response.
+        keep_alive - If unset, connections are closed after every response.
+        pool_block - If set, once pool_maxsize connections are in use, threads wait for one to
+                     be free, rather than opening a connection that's closed after a single call.
+        """
+        Transport.__init__(self, timeout=timeout, compress=compress)
+        if not keep_alive:
+            self.headers["Connection"] = "close"
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize, pool_block=pool_block)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def get(self, url: str, headers: dict=None):
+        """Issue a GET request over a pooled connection, returning the requests.Response."""
+        return self.session.get(url, headers=self._headers(headers), timeout=self.timeout)
+
+    def post(self, url: str, body: dict, headers: dict=None):
+        """Issue a POST request with a JSON body over a pooled connection, returning the requests.Response."""
+        return self.session.post(url, json=body, headers=self._headers(headers), timeout=self.timeout)
+
+    def close(self):
+        """Close every pooled connection."""
+        self.session.close()
+
+
+_default = None
+_default_lock = threading.Lock()
+
+
+def default_transport():
+    """Returns the process-wide PooledTransport, shared by every Questrade object
+    that wasn't given a transport of its own.
+    """
+    global _default
+    with _default_lock:
+        if _default is None:
+            _default = PooledTransport()
+    return _default
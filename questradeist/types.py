@@ -2,31 +2,115 @@ import logging
 from typing import Optional
 
 
-class QuestradeType:
+class _Schema(type):
+    """Builds every QuestradeType subclass with __slots__ named after its fields, so that
+    instances hold their values in a fixed layout rather than a per-instance __dict__.
+    The field set, and a cache of key mappings, are computed once per class.
+    """
+
+    def __new__(mcs, name, bases, namespace):
+        fields = namespace.get("fields")
+        if isinstance(fields, property) and "__slots__" not in namespace:
+            namespace["__slots__"] = tuple(fields.fget(None))
+        namespace["FIELDS"] = frozenset(namespace.get("__slots__", ())) - {"__dict__"}
+        namespace["_LAYOUTS"] = {}
+        return type.__new__(mcs, name, bases, namespace)
+
+
+class QuestradeType(metaclass=_Schema):
     """This class maps the questrade type data back to python objects. An active choice has been made to raise
     an AttributeError when the Questrade API no longer contains a field, or contains new fields.
+
+    Fields are stored in slots. Fields the type doesn't know about are still set, in the
+    instance __dict__, which is only created when needed. Fields listed in FLOATS are
+    converted to float, as JSON drops the decimal point from whole numbers. Fields listed
+    in DATES hold timestamps, parsed when building columnar output.
     """
 
+    __slots__ = ("__dict__",)
+
     LOGGER_NAME = "questrade-logger"
+    FLOATS = ()
+    DATES = ()
 
     def __init__(self, d: Optional[dict]=None, logger_name: Optional[str]=None):
         """Given that Questrade returns JSON items, all returns result in a dictionary.
         This function takes the dictionary and sets variables on the class object, for
         each key in the dictionary.
         """
-        if logger_name is None:
-            logger = logging.getLogger(self.LOGGER_NAME)
-        else:
-            logger = logging.getLogger(logger_name)
         if d is None:
             return
 
-        for k, v in d.items():
-
-            # sometimes fields are uppercase, sometimes they aren't
-            if k.upper() not in self.fields:
+        names, floats = self._layout(tuple(d), d, logger_name)
+        for name, v in zip(names, d.values()):
+            setattr(self, name, v)
+        for k in floats:
+            v = getattr(self, k)
+            if v is not None:
+                setattr(self, k, float(v))
+
+    @classmethod
+    def from_list(cls, rows: list, logger_name: Optional[str]=None):
+        """Build a list of objects from a list of Questrade response dictionaries. Rows
+        are checked against the fields once for each distinct set of keys in the response,
+        rather than once per row, which is what makes this faster than calling the constructor.
+        """
+        objs = []
+        new = object.__new__
+        keys, names, floats, seen = None, None, None, set()
+        for d in rows:
+            if keys is None or len(d) != len(keys) or tuple(d) != keys:
+                keys = tuple(d)
+                names, floats = cls._layout(keys, d, logger_name, warn=keys not in seen)
+                seen.add(keys)
+
+            obj = new(cls)
+            for name, v in zip(names, d.values()):
+                setattr(obj, name, v)
+            for k in floats:
+                v = getattr(obj, k)
+                if v is not None:
+                    setattr(obj, k, float(v))
+            objs.append(obj)
+        return objs
+
+    @classmethod
+    def _layout(cls, keys: tuple, d: dict, logger_name: Optional[str]=None, warn: bool=True):
+        """Returns the attribute names for a row with the given keys, and the FLOATS among them.
+        The mapping is cached per class, while unknown fields are logged whenever warn is set.
+        """
+        layout = cls._LAYOUTS.get(keys)
+        if layout is None:
+            names = tuple(k.upper() for k in keys)
+            floats = tuple(n for n in names if n in cls.FLOATS)
+            unknown = tuple(k for k, n in zip(keys, names) if n not in cls.FIELDS)
+            layout = names, floats, unknown
+            if len(cls._LAYOUTS) < 256:
+                cls._LAYOUTS[keys] = layout
+
+        names, floats, unknown = layout
+        if warn and unknown:
+            logger = cls._logger(logger_name)
+            for k in unknown:
+                # sometimes fields are uppercase, sometimes they aren't
                 logger.warning("Invalid questrade field response. Missing %s. Received fields: %s" % (k, d.keys()))
-            setattr(self, k.upper(), v)
+        return names, floats
+
+    @classmethod
+    def _logger(cls, logger_name: Optional[str]=None):
+        if logger_name is not None:
+            return logging.getLogger(logger_name)
+        logger = _loggers.get(cls.LOGGER_NAME)
+        if logger is None:
+            logger = _loggers[cls.LOGGER_NAME] = logging.getLogger(cls.LOGGER_NAME)
+        return logger
+
+    def __repr__(self):
+        values = ", ".join("%s=%r" % (k, getattr(self, k)) for k in self.__slots__ if hasattr(self, k))
+        return "%s(%s)" % (type(self).__name__, values)
+
+
+_loggers = {}
 
 
 class Auth(QuestradeType):
@@ -43,9 +127,34 @@ class Auth(QuestradeType):
         ]
 
 
+class OptionStrike(QuestradeType):
+    """A strike price of an option chain, with the ids of its call and put"""
+
+    FLOATS = ("STRIKEPRICE",)
+    DATES = ("EXPIRYDATE",)
+
+    @property
+    def fields(self):
+        return [
+            "EXPIRYDATE",
+            "DESCRIPTION",
+            "LISTINGEXCHANGE",
+            "OPTIONEXERCISETYPE",
+            "ROOT",
+            "MULTIPLIER",
+            "STRIKEPRICE",
+            "CALLSYMBOLID",
+            "PUTSYMBOLID",
+        ]
+
+
 class OptionQuote(QuestradeType):
     """This type returns option types"""
 
+    FLOATS = ("BIDPRICE", "ASKPRICE", "LASTTRADEPRICETRHRS", "LASTTRADEPRICE", "OPENPRICE", "LOWPRICE",
+              "HIGHPRICE", "VOLATILITY", "DELTA", "GAMMA", "THETA", "VEGA", "RHO", "VWAP")
+    DATES = ("LASTTRADETIME",)
+
     @property
     def fields(self):
         return [
@@ -64,7 +173,7 @@ class OptionQuote(QuestradeType):
             "LASTTRADETIME",
             "VOLUME",
             "OPENPRICE",
-            "HIGHPRICEHIGHPRICE",
+            "HIGHPRICE",
             "LOWPRICE",
             "VOLATILITY",
             "DELTA",
@@ -82,6 +191,10 @@ class OptionQuote(QuestradeType):
 class Quote(QuestradeType):
     """This type contains the results of a stock quote"""
 
+    FLOATS = ("BIDPRICE", "ASKPRICE", "LASTTRADEPRICETRHRS", "LASTTRADEPRICE", "OPENPRICE", "HIGHPRICE",
+              "LOWPRICE", "HIGH52W", "LOW52W", "VWAP")
+    DATES = ("LASTTRADETIME",)
+
     @property
     def fields(self):
         return [
@@ -129,6 +242,10 @@ class SearchSymbol(QuestradeType):
 class SymbolData(QuestradeType):
     """This type contains the results of a stock symbol fetch"""
 
+    FLOATS = ("PREVDAYCLOSEPRICE", "HIGHPRICE52", "LOWPRICE52", "EPS", "PE", "DIVIDEND", "YIELD", "MARKETCAP",
+              "OPTIONSTRIKEPRICE")
+    DATES = ("EXDATE", "DIVIDENDDATE", "OPTIONEXPIRYDATE")
+
     @property
     def fields(self):
         return [
@@ -172,6 +289,9 @@ class SymbolData(QuestradeType):
 class Candle(QuestradeType):
     """Historic end of day data"""
 
+    FLOATS = ("LOW", "HIGH", "OPEN", "CLOSE", "VWAP")
+    DATES = ("START", "END")
+
     @property
     def fields(self):
         return [
@@ -204,6 +324,8 @@ class TradingAccount(QuestradeType):
 class AccountPosition(QuestradeType):
     """The positions, i.e shares held by a trading account"""
 
+    FLOATS = ("CURRENTMARKETVALUE", "CURRENTPRICE", "AVERAGEENTRYPRICE", "DAYPNL", "CLOSEDPNL", "OPENPNL", "TOTALCOST")
+
     @property
     def fields(self):
         return [
@@ -226,6 +348,9 @@ class AccountPosition(QuestradeType):
 class AccountActivity(QuestradeType):
     """Account activities - the actions (dividends, buy, sell, etc) that took place in a trading account"""
 
+    FLOATS = ("PRICE", "GROSSAMOUNT", "COMMISSION", "NETAMOUNT")
+    DATES = ("TRADEDATE", "TRANSACTIONDATE", "SETTLEMENTDATE")
+
     @property
     def fields(self):
         return [
@@ -249,6 +374,9 @@ class AccountActivity(QuestradeType):
 class AccountExecution(QuestradeType):
     """Executions - The individual actions that took place within an account, to close trades."""
 
+    FLOATS = ("PRICE", "TOTALCOST", "ORDERPLACEMENTCOMMISSION", "COMMISSION", "EXECUTIONFEE", "SECFEE", "CANADIANEXECUTIONFEE")
+    DATES = ("TIMESTAMP",)
+
     @property
     def fields(self):
         return [
@@ -278,6 +406,8 @@ class AccountExecution(QuestradeType):
 class CurrencyBalance(QuestradeType):
     """CurrencyBalance - the object contained in all sub balance calls."""
 
+    FLOATS = ("CASH", "MARKETVALUE", "TOTALEQUITY", "BUYINGPOWER", "MAINTENANCEEXCESS")
+
     @property
     def fields(self):
         return [
@@ -294,51 +424,55 @@ class CurrencyBalance(QuestradeType):
 class Order(QuestradeType):
     """Order - An order created on an account."""
 
+    FLOATS = ("LIMITPRICE", "STOPPRICE", "AVGEXECPRICE", "LASTEXECPRICE", "COMISSIONCHARGED", "PLACEMENTCOMMISSION",
+              "TRIGGERSTOPPRICE")
+    DATES = ("GTDDATE", "CREATIONTIME", "UPDATETIME")
+
     @property
     def fields(self):
         return [
-			"ID",
-			"SYMBOL",
-			"SYMBOLID",
-			"TOTALQUANTITY",
-			"OPENQUANTITY",
-			"FILLEDQUANTITY",
-			"CANCELEDQUANTITY",
-			"SIDE",
-			"TYPE",
-			"LIMITPRICE",
-			"STOPPRICE",
-			"ISALLORNONE",
-			"ISANONYMOUS",
-			"ICEBERGQUANTITY",
-			"MINQUANTITY",
-			"AVGEXECPRICE",
-			"LASTEXECPRICE",
-			"SOURCE",
-			"TIMEINFORCE",
-			"GTDDATE",
-			"STATE",
-            "REJECTIONREASON"
-			"CHAINID",
-			"CREATIONTIME",
-			"UPDATETIME",
-			"NOTES",
-			"PRIMARYROUTE",
-			"SECONDARYROUTE",
-			"ORDERROUTE",
-			"VENUEHOLDINGORDER",
-			"COMISSIONCHARGED",
-			"EXCHANGEORDERID",
-			"ISSIGNIFICANTSHAREHOLDER",
-			"ISINSIDER",
-			"ISLIMITOFFSETINDOLLAR",
-			"USERID",
-			"PLACEMENTCOMMISSION",
-			"LEGS",
-			"STRATEGYTYPE",
-			"TRIGGERSTOPPRICE",
-			"ORDERGROUPID",
-			"ORDERCLASS",
+            "ID",
+            "SYMBOL",
+            "SYMBOLID",
+            "TOTALQUANTITY",
+            "OPENQUANTITY",
+            "FILLEDQUANTITY",
+            "CANCELEDQUANTITY",
+            "SIDE",
+            "TYPE",
+            "LIMITPRICE",
+            "STOPPRICE",
+            "ISALLORNONE",
+            "ISANONYMOUS",
+            "ICEBERGQUANTITY",
+            "MINQUANTITY",
+            "AVGEXECPRICE",
+            "LASTEXECPRICE",
+            "SOURCE",
+            "TIMEINFORCE",
+            "GTDDATE",
+            "STATE",
+            "REJECTIONREASON",
+            "CHAINID",
+            "CREATIONTIME",
+            "UPDATETIME",
+            "NOTES",
+            "PRIMARYROUTE",
+            "SECONDARYROUTE",
+            "ORDERROUTE",
+            "VENUEHOLDINGORDER",
+            "COMISSIONCHARGED",
+            "EXCHANGEORDERID",
+            "ISSIGNIFICANTSHAREHOLDER",
+            "ISINSIDER",
+            "ISLIMITOFFSETINDOLLAR",
+            "USERID",
+            "PLACEMENTCOMMISSION",
+            "LEGS",
+            "STRATEGYTYPE",
+            "TRIGGERSTOPPRICE",
+            "ORDERGROUPID",
+            "ORDERCLASS",
             "ORDERTYPE",
             "ISCROSSZERO",
         ]
\ No newline at end of file
@@ -0,0 +1,117 @@
+import asyncio
+import gc
+import time
+import warnings
+import pytest
+from fakeserver import quote
+from questradeist.types import AccountPosition, CurrencyBalance, Quote
+
+pytest.importorskip("aiohttp")
+from questradeist.aio import AsyncAccount, AsyncSymbol, AsyncTransport, default_async_transport  # noqa: E402
+
+
+class TestAsync():
+
+    def test_quotes(self, server):
+        """Async quotes deserialize to the same types, and support raw"""
+        async def run():
+            async with AsyncSymbol(refresh_token="abc", async_transport=AsyncTransport()) as sym:
+                quotes = await sym.quotes([1, 2, 3])
+                raw = await sym.quotes([1], raw=True)
+            return quotes, raw
+
+        quotes, raw = asyncio.run(run())
+        assert [q.SYMBOLID for q in quotes] == [1, 2, 3]
+        assert isinstance(quotes[0], Quote)
+        assert isinstance(raw, dict)
+
+    def test_gather_accounts(self, server):
+        """Fanning out over all accounts takes about as long as one call"""
+        server.latency = 0.2
+
+        async def run():
+            async with AsyncAccount(refresh_token="abc", async_transport=AsyncTransport()) as acct:
+                accounts = await acct.get_all()
+                ids = [int(a.NUMBER) for a in accounts]
+                calls = [acct.positions(i) for i in ids] + [acct.balances(i) for i in ids]
+                start = time.perf_counter()
+                results = await asyncio.gather(*calls)
+                return results, time.perf_counter() - start
+
+        results, elapsed = asyncio.run(run())
+        assert len(results) == 6
+        assert isinstance(results[0][0], AccountPosition)
+        assert isinstance(results[-1][0], CurrencyBalance)
+        assert elapsed < 1.0
+
+    def test_options(self, server):
+        """Option chains and quotes work the same, with option quotes sent as POST requests"""
+        async def run():
+            async with AsyncSymbol(refresh_token="abc", async_transport=AsyncTransport()) as sym:
+                chain = await sym.option_chain(7)
+                quotes = await sym.option_quotes([s.CALLSYMBOLID for s in chain])
+            return chain, quotes
+
+        chain, quotes = asyncio.run(run())
+        assert len(chain) == 15
+        assert [q.SYMBOLID for q in quotes] == [s.CALLSYMBOLID for s in chain]
+
+    def test_error(self, server):
+        """Failed calls raise OSError, as with the blocking client"""
+        server.route(r"/v1/symbols/search", lambda m, query, headers: (400, {"code": 1002, "message": "Invalid prefix"}))
+
+        async def run():
+            async with AsyncSymbol(refresh_token="abc", async_transport=AsyncTransport()) as sym:
+                await sym.search("ENB")
+
+        with pytest.raises(OSError):
+            asyncio.run(run())
+
+    def test_server_moves(self, server):
+        """A token refreshed before a request, onto another API server, is sent to that server"""
+        seen = []
+        server.route(r"/v1/markets/quotes", lambda m, query, headers: seen.append(headers["Host"]) or (200, {"quotes": [quote(1)]}))
+
+        async def run():
+            async with AsyncSymbol(refresh_token="abc", async_transport=AsyncTransport()) as sym:
+                server.api_server = server.url.replace("127.0.0.1", "localhost")
+                sym.credentials.margin = 3600
+                await sym.quotes([1])
+
+        asyncio.run(run())
+        assert seen[-1].startswith("localhost:")
+
+    def test_shared_transport(self, server):
+        """Leaving an object using the process-wide transport leaves it open for the others"""
+        async def run():
+            transport = default_async_transport()
+            try:
+                async with AsyncSymbol(refresh_token="abc") as first:
+                    async with AsyncSymbol(refresh_token="abc") as second:
+                        await second.quotes([1])
+                    session = await transport._get_session()
+                    assert not session.closed
+                    assert [q.SYMBOLID for q in await first.quotes([2])] == [2]
+                    assert await transport._get_session() is session
+            finally:
+                await transport.close()
+
+        asyncio.run(run())
+
+    def test_event_loops(self, server):
+        """The sessions of event loops that have closed are closed, rather than leaked"""
+        transport = AsyncTransport()
+
+        async def run():
+            async with AsyncSymbol(refresh_token="abc", async_transport=transport) as sym:
+                await sym.quotes([1])
+            return await transport._get_session()
+
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter("always")
+            sessions = [asyncio.run(run()) for _ in range(3)]
+            assert [s.closed for s in sessions] == [True, True, False]
+            asyncio.run(transport.close())
+            del sessions
+            gc.collect()
+        assert [w for w in caught if "Unclosed" in str(w.message)] == []
@@ -0,0 +1,96 @@
+import datetime
+import math
+import pytest
+from fakeserver import candle
+from questradeist import Symbol
+from questradeist.columnar import columns
+from questradeist.types import Candle
+
+numpy = pytest.importorskip("numpy")
+from questradeist import analytics  # noqa: E402
+
+
+def minutes(days: int=2):
+    """Columnar minute candles for the trading hours of days weekdays, from Thursday 2020-01-02."""
+    rows = []
+    day = datetime.datetime(2020, 1, 2)
+    while days:
+        if day.weekday() < 5:
+            opening = day + datetime.timedelta(hours=9, minutes=30)
+            rows += [candle(7, opening + datetime.timedelta(minutes=n), datetime.timedelta(minutes=1)) for n in range(390)]
+            days -= 1
+        day += datetime.timedelta(days=1)
+    return rows, columns(rows, Candle)
+
+
+class TestAnalytics():
+
+    def test_indicators(self):
+        """Indicators match the same computations looped over Candle objects"""
+        rows, cols = minutes(1)
+        candles = Candle.from_list(rows)
+        close = [c.CLOSE for c in candles]
+
+        r = analytics.returns(cols)
+        assert math.isnan(r[0])
+        assert r[5] == pytest.approx(close[5] / close[4] - 1)
+
+        ma = analytics.sma(cols["CLOSE"], 20)
+        assert numpy.isnan(ma[:19]).all()
+        assert ma[100] == pytest.approx(sum(close[81:101]) / 20)
+
+        vwap = analytics.rolling_vwap(cols, 30)
+        window = candles[71:101]
+        assert vwap[100] == pytest.approx(sum(c.VWAP * c.VOLUME for c in window) / sum(c.VOLUME for c in window))
+
+        vol = analytics.volatility(cols, 30, periods=252 * 390)
+        logs = [math.log(close[i] / close[i - 1]) for i in range(71, 101)]
+        mean = sum(logs) / 30
+        expected = math.sqrt(sum((x - mean) ** 2 for x in logs) / 29) * math.sqrt(252 * 390)
+        assert numpy.isnan(vol[:30]).all()
+        assert vol[100] == pytest.approx(expected)
+
+    def test_resample_hours(self):
+        """Minute candles resample into hour candles aligned on the hour"""
+        rows, cols = minutes(1)
+        hours = analytics.resample(cols, "OneHour")
+        # 9:30 to 16:00 spans seven hours, the first and last partial
+        assert len(hours["START"]) == 7
+        assert str(hours["START"][1]) == "2020-01-02T15:00:00.000000"
+
+        candles = Candle.from_list(rows)[30:90]
+        assert hours["OPEN"][1] == candles[0].OPEN
+        assert hours["CLOSE"][1] == candles[-1].CLOSE
+        assert hours["HIGH"][1] == max(c.HIGH for c in candles)
+        assert hours["LOW"][1] == min(c.LOW for c in candles)
+        assert hours["VOLUME"][1] == sum(c.VOLUME for c in candles)
+        assert hours["VOLUME"].dtype == numpy.int64
+        assert hours["END"][1] - hours["START"][1] == numpy.timedelta64(1, "h")
+
+    def test_resample_days(self):
+        """Days start at midnight at the offset, and weeks on Mondays"""
+        _, cols = minutes(3)
+        days = analytics.resample(cols, "OneDay")
+        assert len(days["START"]) == 3
+        assert [str(d) for d in days["START"]] == ["2020-01-02T05:00:00.000000", "2020-01-03T05:00:00.000000", "2020-01-06T05:00:00.000000"]
+        assert days["VOLUME"].sum() == cols["VOLUME"].sum()
+
+        weeks = analytics.resample(cols, "OneWeek")
+        assert [str(d) for d in weeks["START"]] == ["2019-12-30T05:00:00.000000", "2020-01-06T05:00:00.000000"]
+
+    def test_resample_history(self, server):
+        """Columnar history resamples without more requests"""
+        sym = Symbol(refresh_token="abc")
+        cols = sym.history(7, datetime.datetime(2020, 1, 1), datetime.datetime(2020, 1, 3), interval="OneMinute", format="columnar")
+        hours = analytics.resample(cols, "OneHour")
+        assert len(hours["START"]) == 49
+        assert (hours["VOLUME"][:-1] == 60 * 1007).all()
+
+    def test_invalid(self):
+        """Unknown intervals and short windows are refused"""
+        _, cols = minutes(1)
+        with pytest.raises(AttributeError):
+            analytics.resample(cols, "OneFortnight")
+        with pytest.raises(AttributeError):
+            analytics.volatility(cols, 1)
+        assert len(analytics.resample({k: v[:0] for k, v in cols.items()}, "OneDay")["START"]) == 0
@@ -0,0 +1,78 @@
+import datetime
+import os
+import pytest
+from questradeist import Symbol
+from questradeist.backfill import backfill, load, path
+from questradeist.batch import BatchError
+from questradeist.ratelimit import RateLimiter
+
+numpy = pytest.importorskip("numpy")
+
+START = datetime.datetime(2020, 1, 1)
+END = datetime.datetime(2020, 1, 31)
+
+
+class CountingRateLimiter(RateLimiter):
+
+    def __init__(self):
+        super().__init__(account_rate=10000, market_rate=10000)
+        self.reserved = []
+
+    def reserve(self, url: str):
+        self.reserved.append(url)
+        return super().reserve(url)
+
+
+class TestBackfill():
+
+    def test_backfill(self, server, tmp_path):
+        """Every symbol is written as columns, through the rate limiter of the symbol passed in"""
+        limiter = CountingRateLimiter()
+        sym = Symbol(refresh_token="abc", rate_limiter=limiter)
+        seen = []
+        counts = backfill(sym, [7, 8, 9], START, END, str(tmp_path), processes=2, progress=lambda *a: seen.append(a))
+        assert counts == {7: 31, 8: 31, 9: 31}
+        assert sorted(id for _, _, id in seen) == [7, 8, 9]
+        assert [(done, total) for done, total, _ in seen] == [(1, 3), (2, 3), (3, 3)]
+        assert len([u for u in limiter.reserved if "/candles/" in u]) == 3
+
+        columns = load(str(tmp_path), 8)
+        expected = sym.history(8, START, END, format="columnar")
+        assert set(columns) == set(expected)
+        numpy.testing.assert_array_equal(columns["CLOSE"], expected["CLOSE"])
+        numpy.testing.assert_array_equal(columns["START"], expected["START"])
+
+    def test_restart(self, server, tmp_path):
+        """Symbols written by an earlier run are skipped"""
+        sym = Symbol(refresh_token="abc")
+        backfill(sym, [7, 8, 9], START, END, str(tmp_path), processes=2)
+        os.remove(path(str(tmp_path), 8))
+
+        before = server.requests
+        assert backfill(sym, [7, 8, 9], START, END, str(tmp_path), processes=2) == {8: 31}
+        assert server.requests == before + 1
+
+    def test_failures(self, server, tmp_path):
+        """A failing symbol doesn't stop the others, and is retried by the next run"""
+        server.route(r"/v1/markets/candles/8", lambda m, query, headers: (400, {"code": 1002, "message": "Invalid symbol"}))
+        sym = Symbol(refresh_token="abc")
+        with pytest.raises(BatchError) as e:
+            backfill(sym, [7, 8, 9], START, END, str(tmp_path), processes=2)
+        assert e.value.results == {7: 31, 9: 31}
+        assert [ids for ids, _ in e.value.errors] == [[8]]
+        assert not os.path.exists(path(str(tmp_path), 8))
+
+    def test_manifest(self, server, tmp_path):
+        """A directory only holds a backfill of one range and interval"""
+        sym = Symbol(refresh_token="abc")
+        backfill(sym, [7], START, END, str(tmp_path), processes=1)
+        with pytest.raises(AttributeError):
+            backfill(sym, [7], START, END, str(tmp_path), interval="OneHour", processes=1)
+
+    def test_shared_login(self, server, tmp_path):
+        """Workers finding the access token revoked share a single refresh, made by the symbol passed in"""
+        sym = Symbol(refresh_token="abc")
+        server.strict = True
+        server._issued.clear()
+        assert backfill(sym, [7, 8, 9, 10], START, END, str(tmp_path), processes=2) == {7: 31, 8: 31, 9: 31, 10: 31}
+        assert sym.credentials.refreshes == 1
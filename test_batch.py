@@ -0,0 +1,219 @@
+import asyncio
+import datetime
+import pytest
+from fakeserver import quote
+from questradeist.account import Account
+from questradeist.batch import BatchError, chunked, day_windows, windows
+from questradeist.symbol import Symbol
+
+
+def fail_on(bad_id):
+    """A quotes handler failing any request that includes bad_id"""
+    def handler(m, query, headers):
+        ids = [int(i) for i in query["ids"][0].split(",")]
+        if bad_id in ids:
+            return 500, {"code": 1000, "message": "Internal server error"}
+        return 200, {"quotes": [quote(i) for i in ids]}
+    return handler
+
+
+class TestBatch():
+
+    def test_chunked(self):
+        """Chunks hold at most size items, in order"""
+        assert chunked(range(5), 2) == [[0, 1], [2, 3], [4]]
+        assert chunked([], 2) == []
+
+    def test_large_quotes(self, server):
+        """Thousands of ids are split into chunks and merged back in input order"""
+        sym = Symbol(refresh_token="abc")
+        ids = list(range(5000, 0, -1))
+        before = server.requests
+        quotes = sym.quotes(ids)
+        assert [q.SYMBOLID for q in quotes] == ids
+        assert server.requests - before == 50
+
+        raw = sym.quotes(ids, raw=True)
+        assert [q["symbolId"] for q in raw["quotes"]] == ids
+
+    def test_large_get(self, server):
+        """Symbol lookups by id or name are chunked"""
+        sym = Symbol(refresh_token="abc")
+        sym.CHUNK_SIZE = 7
+        ids = list(range(1, 31))
+        assert [s.SYMBOLID for s in sym.get(ids=ids)] == ids
+        names = ["S%d" % i for i in ids]
+        assert [s.SYMBOL for s in sym.get(symbols=names)] == names
+
+    def test_partial_failure(self, server):
+        """A failed chunk is reported, along with the results of the others"""
+        server.route(r"/v1/markets/quotes", fail_on(150))
+        sym = Symbol(refresh_token="abc")
+        with pytest.raises(BatchError) as e:
+            sym.quotes(list(range(1, 301)))
+        assert [q.SYMBOLID for q in e.value.results] == list(range(1, 101)) + list(range(201, 301))
+        assert len(e.value.errors) == 1
+        chunk, error = e.value.errors[0]
+        assert chunk == list(range(101, 201))
+        assert isinstance(error, OSError)
+
+    def test_async_partial_failure(self, server):
+        """Async batched calls behave the same way"""
+        aio = pytest.importorskip("questradeist.aio")
+        server.route(r"/v1/markets/quotes", fail_on(150))
+
+        async def run():
+            async with aio.AsyncSymbol(refresh_token="abc", async_transport=aio.AsyncTransport()) as sym:
+                assert len(await sym.quotes(list(range(1, 101)))) == 100
+                await sym.quotes(list(range(1, 301)))
+
+        with pytest.raises(BatchError) as e:
+            asyncio.run(run())
+        assert len(e.value.results) == 200
+
+
+class TestWindows():
+
+    START = datetime.datetime(2018, 1, 1)
+    END = datetime.datetime(2020, 12, 31)
+
+    def test_windows(self):
+        """Ranges are split into windows sharing their boundaries"""
+        day = datetime.timedelta(days=1)
+        w = windows(self.START + 10 * day, self.START, 4 * day)
+        assert w == [(self.START, self.START + 4 * day), (self.START + 4 * day, self.START + 8 * day),
+                     (self.START + 8 * day, self.START + 10 * day)]
+        assert windows(self.START, self.START, day) == [(self.START, self.START)]
+
+    def test_day_windows(self):
+        """Day windows start the day after the one before ends"""
+        day = datetime.timedelta(days=1)
+        w = day_windows(self.START + 10 * day, self.START, 4 * day)
+        assert w == [(self.START, self.START + 4 * day), (self.START + 5 * day, self.START + 9 * day),
+                     (self.START + 10 * day, self.START + 10 * day)]
+
+    def test_executions(self, server):
+        """A multi-year range is fetched in windows, without boundary duplicates"""
+        acct = Account(refresh_token="abc")
+        before = server.requests
+        executions = acct.executions(10000001, self.END, self.START)
+        days = (self.END - self.START).days + 1
+        assert [e.ID for e in executions] == [self.START.toordinal() + n for n in range(days)]
+        assert server.requests - before == 36
+
+        raw = acct.executions(10000001, self.START, self.END, raw=True)
+        assert len(raw["executions"]) == days
+
+        assert len(acct.executions(10000001)) == 5
+
+    def test_activities_and_orders(self, server):
+        """Activities, without ids, and orders are deduplicated too"""
+        acct = Account(refresh_token="abc")
+        days = (self.END - self.START).days + 1
+        assert len(acct.activities(10000001, self.START, self.END)) == days
+        orders = acct.orders(10000001, self.START, self.END, state="Closed")
+        assert len(orders) == days
+        assert len(acct.orders(10000001)) == 5
+
+    def test_identical_activities(self, server):
+        """Identical activities are all kept, however many windows the range is split into"""
+        fill = {"tradeDate": "2020-01-15T00:00:00.000000-05:00", "transactionDate": "2020-01-15T00:00:00.000000-05:00",
+                "settlementDate": "2020-01-17T00:00:00.000000-05:00", "action": "Buy", "symbol": "SYM1", "symbolId": 1,
+                "description": "BUY", "currency": "CAD", "quantity": 100, "price": 10.5, "grossAmount": -1050,
+                "commission": 0, "netAmount": -1050, "type": "Trades"}
+
+        def handler(m, query, headers):
+            start, end = query["startTime"][0][:10], query["endTime"][0][:10]
+            return 200, {"activities": [dict(fill), dict(fill)] if start <= "2020-01-15" <= end else []}
+
+        server.route(r"/v1/accounts/(\d+)/activities/?", handler)
+        acct = Account(refresh_token="abc")
+        jan1 = datetime.datetime(2020, 1, 1)
+        assert len(acct.activities(1, jan1, datetime.datetime(2020, 1, 21))) == 2
+        assert len(acct.activities(1, jan1, datetime.datetime(2020, 3, 31))) == 2
+        assert len(acct.activities(1, datetime.datetime(2019, 12, 15), datetime.datetime(2020, 1, 15), raw=True)["activities"]) == 2
+        assert sum(len(w) for w in acct.activities(1, jan1, datetime.datetime(2020, 3, 31), stream=True)) == 2
+
+    def test_stream(self, server):
+        """Streaming yields each window's unique elements as it arrives"""
+        acct = Account(refresh_token="abc")
+        windows = list(acct.executions(10000001, self.START, self.END, stream=True))
+        assert len(windows) == 36
+        ids = [e.ID for w in windows for e in w]
+        assert len(ids) == len(set(ids)) == (self.END - self.START).days + 1
+
+    def test_stream_failure(self, server):
+        """A failed window is reported while streaming"""
+        server.route(r"/v1/accounts/(\d+)/activities/?", lambda m, q, h: (500, {"code": 1000, "message": "error"}))
+        acct = Account(refresh_token="abc")
+        with pytest.raises(BatchError) as e:
+            list(acct.activities(10000001, self.START, self.END, stream=True))
+        assert isinstance(e.value.errors[0][0], tuple)
+
+    def test_async_stream(self, server):
+        """Async accounts stream windows with an async generator"""
+        aio = pytest.importorskip("questradeist.aio")
+
+        async def run():
+            async with aio.AsyncAccount(refresh_token="abc", async_transport=aio.AsyncTransport()) as acct:
+                merged = await acct.executions(10000001, self.START, self.END)
+                streamed = [w async for w in acct.executions(10000001, self.START, self.END, stream=True)]
+                return merged, streamed
+
+        merged, streamed = asyncio.run(run())
+        assert len(merged) == sum(len(w) for w in streamed) == (self.END - self.START).days + 1
+
+
+class TestHistory():
+
+    START = datetime.datetime(2020, 1, 1)
+
+    def test_long_intraday_history(self, server):
+        """Minute candles over weeks are fetched in sub-ranges, without duplicates"""
+        sym = Symbol(refresh_token="abc")
+        end = self.START + datetime.timedelta(days=10)
+        candles = sym.history(1, self.START, end, interval="OneMinute")
+        assert len(candles) == 10 * 1440 + 1
+        starts = [c.START for c in candles]
+        assert starts == sorted(starts)
+        assert len(set(starts)) == len(starts)
+
+    def test_short_history(self, server):
+        """Daily candles over a month take a single request"""
+        sym = Symbol(refresh_token="abc")
+        before = server.requests
+        candles = sym.history(1, self.START + datetime.timedelta(days=30), self.START)
+        assert len(candles) == 31
+        assert server.requests - before == 1
+
+    def test_invalid_interval(self, server):
+        """Unknown intervals are refused"""
+        sym = Symbol(refresh_token="abc")
+        with pytest.raises(AttributeError):
+            sym.history(1, self.START, self.START, interval="Fortnightly")
+
+    def test_iter_history(self, server):
+        """Streamed candles arrive in time order, matching history"""
+        sym = Symbol(refresh_token="abc")
+        end = self.START + datetime.timedelta(days=5)
+        expected = [c.START for c in sym.history(1, self.START, end, interval="FiveMinutes")]
+        for workers in (1, 4):
+            it = sym.iter_history(1, self.START, end, interval="FiveMinutes", max_workers=workers)
+            assert [c.START for c in it] == expected
+        raw = list(sym.iter_history(1, self.START, end, interval="FiveMinutes", raw=True))
+        assert [c["start"] for c in raw] == expected
+
+    def test_async_iter_history(self, server):
+        """Async symbols stream candles with an async generator"""
+        aio = pytest.importorskip("questradeist.aio")
+        end = self.START + datetime.timedelta(days=3)
+
+        async def run():
+            async with aio.AsyncSymbol(refresh_token="abc", async_transport=aio.AsyncTransport()) as sym:
+                merged = await sym.history(1, self.START, end, interval="OneMinute")
+                streamed = [c async for c in sym.iter_history(1, self.START, end, interval="OneMinute", max_workers=2)]
+                return merged, streamed
+
+        merged, streamed = asyncio.run(run())
+        assert [c.START for c in merged] == [c.START for c in streamed]
+        assert len(streamed) == 3 * 1440 + 1
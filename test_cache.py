@@ -0,0 +1,129 @@
+import asyncio
+import time
+import pytest
+from questradeist import Account, Symbol
+from questradeist.cache import Cache, MemoryCache, SQLiteCache
+from questradeist.types import SearchSymbol, SymbolData, TradingAccount
+
+
+class TestCache():
+
+    def test_ttl(self):
+        """Values expire once their time to live has passed"""
+        c = MemoryCache()
+        c.set("a", {"x": 1}, 0.05)
+        c.set("b", {"x": 2}, 60)
+        assert c.get("a") == {"x": 1}
+        time.sleep(0.06)
+        assert c.get("a") is None
+        assert c.get_many(["a", "b"]) == {"b": {"x": 2}}
+
+    def test_lru(self):
+        """The least recently used value is evicted once the cache is full"""
+        c = MemoryCache(maxsize=2)
+        c.set("a", 1, 60)
+        c.set("b", 2, 60)
+        c.get("a")
+        c.set("c", 3, 60)
+        assert c.get("b") is None
+        assert c.get("a") == 1 and c.get("c") == 3
+        assert len(c) == 2
+
+    def test_incomplete_backend(self):
+        """A backend missing part of the interface can't be created"""
+        class GetOnly(Cache):
+            def get(self, key: str):
+                return None
+
+        with pytest.raises(TypeError):
+            GetOnly()
+
+    def test_sqlite(self, tmp_path):
+        """The SQLite cache survives being reopened, and evicts the least recently used values"""
+        path = str(tmp_path / "cache.db")
+        c = SQLiteCache(path, maxsize=2)
+        c.set_many({"a": {"x": 1}, "b": [1, 2]}, 60)
+        c.set("gone", 1, -1)
+        c.close()
+
+        c = SQLiteCache(path, maxsize=2)
+        assert c.get_many(["a", "b", "gone"]) == {"a": {"x": 1}, "b": [1, 2]}
+        time.sleep(0.01)
+        c.get("a")
+        c.set("c", 3, 60)
+        assert c.get("b") is None
+        assert len(c) == 2
+        c.delete("a")
+        assert c.get("a") is None
+        c.close()
+
+    def test_symbols_by_id(self, server):
+        """Only the ids missing from the cache are requested, and results keep the input order"""
+        sym = Symbol(refresh_token="abc", cache=MemoryCache())
+        first = sym.get(ids=[1, 2, 3])
+        assert [s.SYMBOLID for s in first] == [1, 2, 3]
+
+        before = server.requests
+        second = sym.get(ids=[4, 3, 2])
+        assert server.requests == before + 1
+        assert [s.SYMBOLID for s in second] == [4, 3, 2]
+        assert isinstance(second[0], SymbolData)
+
+        before = server.requests
+        raw = sym.get(ids=[2, 4], raw=True)
+        assert server.requests == before
+        assert [s["symbolId"] for s in raw["symbols"]] == [2, 4]
+
+    def test_symbols_by_name(self, server):
+        """Symbol names are cached regardless of case"""
+        sym = Symbol(refresh_token="abc", cache=MemoryCache())
+        sym.get(symbols=["AAPL", "MSFT"])
+        before = server.requests
+        found = sym.get(symbols=["msft"])
+        assert server.requests == before
+        assert [s.SYMBOL for s in found] == ["MSFT"]
+
+    def test_search_and_accounts(self, server):
+        """Searches and the account list are served from the cache until they expire"""
+        sym = Symbol(refresh_token="abc", cache=MemoryCache(), cache_ttls={"search": 0.05})
+        sym.search("AA")
+        before = server.requests
+        found = sym.search("AA")
+        assert server.requests == before
+        assert isinstance(found[0], SearchSymbol)
+        time.sleep(0.06)
+        sym.search("AA")
+        assert server.requests == before + 1
+
+        acct = Account(refresh_token="abc", cache=MemoryCache())
+        acct.get_all()
+        before = server.requests
+        accounts = acct.get_all()
+        assert server.requests == before
+        assert isinstance(accounts[0], TradingAccount)
+
+    def test_disabled(self, server):
+        """A ttl of None turns caching off for an endpoint"""
+        sym = Symbol(refresh_token="abc", cache=MemoryCache(), cache_ttls={"symbols": None})
+        sym.get(ids=[1])
+        before = server.requests
+        sym.get(ids=[1])
+        assert server.requests == before + 1
+
+    def test_async(self, server):
+        """The asyncio clients share the same caching"""
+        pytest.importorskip("aiohttp")
+        from questradeist.aio import AsyncSymbol, AsyncTransport
+
+        async def run():
+            async with AsyncSymbol(refresh_token="abc", async_transport=AsyncTransport(), cache=MemoryCache()) as sym:
+                await sym.get(ids=[1, 2])
+                await sym.search("AA")
+                before = server.requests
+                found = await sym.get(ids=[2, 3])
+                await sym.search("AA")
+                return found, server.requests - before
+
+        found, sent = asyncio.run(run())
+        assert [s.SYMBOLID for s in found] == [2, 3]
+        assert sent == 1
@@ -0,0 +1,92 @@
+import datetime
+import pytest
+from fakeserver import candle
+from questradeist import Symbol
+from questradeist.candles import CandleStore
+from questradeist.types import Candle
+
+
+def day(m: int, d: int):
+    return datetime.datetime(2020, m, d)
+
+
+class TestCandleStore():
+
+    def test_served_locally(self, server, tmp_path):
+        """A range fetched once is served from the store, with the same candles"""
+        sym = Symbol(refresh_token="abc")
+        with CandleStore(sym, str(tmp_path / "candles.db")) as store:
+            candles = store.history(7, day(1, 1), day(1, 31))
+            assert len(candles) == 31
+            assert isinstance(candles[0], Candle)
+
+            before = server.requests
+            raw = store.history(7, day(1, 1), day(1, 31), raw=True)
+            assert server.requests == before
+            assert raw == sym.history(7, day(1, 1), day(1, 31), raw=True)
+
+    def test_gaps(self, server, tmp_path):
+        """Only the days missing from the store are fetched"""
+        with CandleStore(Symbol(refresh_token="abc"), str(tmp_path / "candles.db")) as store:
+            store.history(7, day(1, 1), day(1, 31))
+            store.history(7, day(3, 1), day(3, 31))
+            assert store.gaps(7, datetime.date(2020, 1, 10), datetime.date(2020, 3, 10), "OneDay") == [
+                (datetime.date(2020, 1, 31), datetime.date(2020, 3, 1))]
+
+            store.fetched = 0
+            candles = store.history(7, day(1, 10), day(3, 10))
+            assert store.fetched == 31
+            assert len(candles) == 61
+            starts = [c.START for c in candles]
+            assert starts == sorted(set(starts))
+
+            assert store.gaps(7, datetime.date(2019, 12, 1), datetime.date(2020, 4, 1), "OneDay") == [
+                (datetime.date(2019, 12, 1), datetime.date(2020, 1, 1)),
+                (datetime.date(2020, 3, 31), datetime.date(2020, 4, 1))]
+            assert store.gaps(8, datetime.date(2020, 1, 1), datetime.date(2020, 1, 1), "OneDay") == [
+                (datetime.date(2020, 1, 1), datetime.date(2020, 1, 1))]
+            assert store.gaps(7, datetime.date(2020, 1, 1), datetime.date(2020, 1, 31), "OneHour") != []
+
+    def test_daylight_time(self, server, tmp_path):
+        """Candles stamped -04:00 in the summer are served for the days they fall on"""
+        def handler(m, query, headers):
+            start = datetime.datetime.fromisoformat(query["startTime"][0][:19])
+            end = datetime.datetime.fromisoformat(query["endTime"][0][:19])
+            step = datetime.timedelta(days=1)
+            candles = [candle(int(m.group(1)), start + n * step, step) for n in range((end - start).days + 1)]
+            return 200, {"candles": [{k: v.replace("-05:00", "-04:00") if k in ("start", "end") else v for k, v in c.items()} for c in candles]}
+
+        server.route(r"/v1/markets/candles/(\d+)", handler)
+        sym = Symbol(refresh_token="abc")
+        with CandleStore(sym, str(tmp_path / "candles.db")) as store:
+            expected = [c.START for c in sym.history(7, day(7, 1), day(7, 5))]
+            assert len(expected) == 5
+            assert [c.START for c in store.history(7, day(7, 1), day(7, 5))] == expected
+            assert [c.START for c in store.history(7, day(7, 2), day(7, 3))] == expected[1:3]
+
+    def test_persisted(self, server, tmp_path):
+        """The store survives being reopened"""
+        path = str(tmp_path / "candles.db")
+        with CandleStore(Symbol(refresh_token="abc"), path) as store:
+            store.history(7, day(1, 1), day(1, 5), interval="OneHour")
+
+        sym = Symbol(refresh_token="abc")
+        before = server.requests
+        with CandleStore(sym, path) as store:
+            columns = store.history(7, day(1, 1), day(1, 5), interval="OneHour", format="columnar")
+        assert server.requests == before
+        assert len(columns["CLOSE"]) == 4 * 24 + 1
+
+    def test_today(self, server, tmp_path):
+        """Days that aren't over yet are fetched again"""
+        with CandleStore(Symbol(refresh_token="abc"), str(tmp_path / "candles.db")) as store:
+            today = datetime.datetime.combine(datetime.date.today(), datetime.time())
+            store.history(7, today - datetime.timedelta(days=5), today)
+            assert store.gaps(7, today.date() - datetime.timedelta(days=5), today.date(), "OneDay") == [
+                (today.date() - datetime.timedelta(days=1), today.date())]
+
+    def test_invalid_interval(self, server, tmp_path):
+        """Invalid intervals raise AttributeError, like Symbol.history"""
+        with CandleStore(Symbol(refresh_token="abc"), str(tmp_path / "candles.db")) as store:
+            with pytest.raises(AttributeError):
+                store.history(7, day(1, 1), day(1, 5), interval="Fortnightly")
@@ -0,0 +1,74 @@
+import datetime
+import pytest
+from questradeist.account import Account
+from questradeist.symbol import Symbol
+
+numpy = pytest.importorskip("numpy")
+from questradeist.columnar import columns, to_datetime64  # noqa: E402
+from questradeist.types import AccountExecution, Candle, Quote  # noqa: E402
+
+
+class TestColumnar():
+
+    START = datetime.datetime(2020, 1, 1)
+
+    def test_datetimes(self):
+        """Timestamps are parsed to UTC, honouring their offset"""
+        parsed = to_datetime64(["2014-10-01T00:00:00.000000-04:00", "2014-12-01T09:30:00.000000-05:00", "", None])
+        assert parsed.dtype == numpy.dtype("datetime64[us]")
+        assert parsed[0] == numpy.datetime64("2014-10-01T04:00:00")
+        assert parsed[1] == numpy.datetime64("2014-12-01T14:30:00")
+        assert numpy.isnat(parsed[2]) and numpy.isnat(parsed[3])
+
+    def test_column_types(self):
+        """Columns are typed by the type's FLOATS and DATES, and otherwise by value"""
+        rows = [
+            {"symbol": "A", "symbolId": 1, "lastTradePrice": 10, "bidSize": 1, "isHalted": False, "lastTradeTime": "2020-01-02T15:59:59.000000-05:00"},
+            {"symbol": "B", "symbolId": 2, "lastTradePrice": None, "bidSize": None, "isHalted": True, "lastTradeTime": "2020-01-02T15:59:59.000000-05:00"},
+        ]
+        cols = columns(rows, Quote)
+        assert cols["SYMBOLID"].dtype == numpy.int64
+        assert cols["LASTTRADEPRICE"].dtype == numpy.float64
+        assert numpy.isnan(cols["LASTTRADEPRICE"][1])
+        assert cols["BIDSIZE"].dtype == numpy.float64
+        assert cols["ISHALTED"].dtype == bool
+        assert list(cols["SYMBOL"]) == ["A", "B"]
+        assert cols["LASTTRADETIME"][0] == numpy.datetime64("2020-01-02T20:59:59")
+
+        executions = columns([{"id": 1, "quantity": 100, "price": 10, "commission": 0}], AccountExecution)
+        assert executions["PRICE"].dtype == executions["COMMISSION"].dtype == numpy.float64
+        assert executions["QUANTITY"].dtype == numpy.int64
+
+    def test_history(self, server):
+        """Candles come back as columns, across sub-ranges"""
+        sym = Symbol(refresh_token="abc")
+        end = self.START + datetime.timedelta(days=3)
+        cols = sym.history(1, self.START, end, interval="OneMinute", format="columnar")
+        candles = sym.history(1, self.START, end, interval="OneMinute")
+        assert len(cols["CLOSE"]) == len(candles) == 3 * 1440 + 1
+        assert numpy.allclose(cols["CLOSE"], [c.CLOSE for c in candles])
+        assert cols["VOLUME"].dtype == numpy.int64
+        assert cols["START"][0] == numpy.datetime64("2020-01-01T05:00:00")
+        assert (numpy.diff(cols["START"]) == numpy.timedelta64(1, "m")).all()
+
+    def test_quotes_and_positions(self, server):
+        """Quotes and positions, single or batched, come back as columns"""
+        sym = Symbol(refresh_token="abc")
+        ids = list(range(1, 251))
+        cols = sym.quotes(ids, format="columnar")
+        assert list(cols["SYMBOLID"]) == ids
+        assert cols["LASTTRADEPRICE"].dtype == numpy.float64
+
+        acct = Account(refresh_token="abc")
+        cols = acct.positions(10000001, format="columnar")
+        assert cols["CURRENTMARKETVALUE"].dtype == numpy.float64
+        assert len(cols["SYMBOLID"]) == 5
+
+    def test_invalid_format(self, server):
+        """Unknown formats are refused"""
+        with pytest.raises(AttributeError):
+            Symbol(refresh_token="abc").quotes([1], format="parquet")
+
+    def test_empty(self):
+        """An empty response has no columns"""
+        assert columns([], Candle) == {}
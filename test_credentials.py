@@ -0,0 +1,99 @@
+import threading
+import time
+import pytest
+from fakeserver import quote
+from questradeist import Account, Symbol
+from questradeist.credentials import Credentials
+
+
+class TestCredentials():
+
+    def test_background_refresh(self, server):
+        """Tokens are refreshed ahead of expiry, and handed to f every time"""
+        server.strict = True
+        server.token_ttl = 1.0
+        saved = []
+        creds = Credentials(refresh_token="abc", f=saved.append, margin=0.5)
+        creds.start()
+        try:
+            sym = Symbol(credentials=creds)
+            deadline = time.time() + 5
+            while creds.refreshes < 2 and time.time() < deadline:
+                sym.quotes([1])
+                time.sleep(0.05)
+        finally:
+            creds.stop()
+
+        assert creds.refreshes >= 2
+        assert [a.REFRESH_TOKEN for a in saved[:3]] == ["refresh-abc", "refresh-refresh-abc", "refresh-refresh-refresh-abc"]
+        assert server.refused == 0
+
+    def test_single_refresh(self, server):
+        """Threads refreshing the same stale token cause a single refresh"""
+        server.strict = True
+        creds = Credentials(refresh_token="abc")
+        stale = creds.auth
+        barrier = threading.Barrier(8)
+        results = []
+
+        def refresh():
+            barrier.wait()
+            results.append(creds.refresh(stale))
+
+        threads = [threading.Thread(target=refresh) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert creds.refreshes == 1
+        assert server.logins == 2
+        assert all(r is creds.auth for r in results)
+
+    def test_shared(self, server):
+        """Objects sharing credentials log in once, and see each other's refreshes"""
+        sym = Symbol(refresh_token="abc")
+        acct = Account(credentials=sym.credentials)
+        assert server.logins == 1
+        acct.credentials.refresh()
+        assert sym.access_token == acct.access_token == "access-refresh-abc"
+        assert sym.ACCESS_TOKEN == "access-refresh-abc"
+
+    def test_refresh_before_request(self, server):
+        """A token about to expire is refreshed before the request, rather than after it fails"""
+        server.strict = True
+        sym = Symbol(refresh_token="abc")
+        server.token_ttl = 0.2
+        sym.credentials.margin = 1800
+        sym.quotes([1])
+        assert sym.credentials.refreshes == 1
+        assert server.refused == 0
+
+    def test_server_moves(self, server):
+        """A token refreshed before a request, onto another API server, is sent to that server"""
+        seen = []
+        server.route(r"/v1/markets/quotes", lambda m, query, headers: seen.append((headers["Host"], headers["Authorization"])) or (200, {"quotes": [quote(1)]}))
+        sym = Symbol(refresh_token="abc")
+        server.api_server = server.url.replace("127.0.0.1", "localhost")
+        sym.credentials.margin = 3600
+        sym.quotes([1])
+        assert sym.credentials.refreshes == 1
+        host, token = seen[-1]
+        assert host.startswith("localhost:") and token == "Bearer access-refresh-abc"
+
+    def test_reactive_refresh(self, server):
+        """A rejected token is refreshed once, and the request retried"""
+        server.strict = True
+        sym = Symbol(refresh_token="abc")
+        sym.credentials.margin = 0
+        server._issued.clear()
+        assert sym.quotes([1])[0].SYMBOLID == 1
+        assert server.refused == 1
+        assert sym.credentials.refreshes == 1
+
+    def test_access_token_only(self, server):
+        """Without a refresh token, a rejected token is an error"""
+        sym = Symbol(access_token="nope")
+        assert sym.credentials.refresh_token is None
+        with pytest.raises(AttributeError):
+            sym.credentials.refresh()
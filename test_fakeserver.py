@@ -0,0 +1,40 @@
+import json
+import pytest
+from fakeserver import RecordingTransport
+from questradeist import Symbol
+from questradeist.retry import RetryPolicy
+
+
+class TestFakeServer():
+
+    def test_replay(self, server, tmp_path):
+        """Recorded responses are served in place of synthetic ones"""
+        path = str(tmp_path / "recorded.jsonl")
+        sym = Symbol(refresh_token="abc", transport=RecordingTransport(path))
+        sym.quotes([1, 2])
+        sym.option_quotes([7000, 7001])
+
+        with open(path) as fp:
+            lines = [json.loads(line) for line in fp]
+        assert [(r["method"], r["path"]) for r in lines] == [("GET", "/v1/markets/quotes"), ("POST", "/v1/markets/quotes/options")]
+        for r in lines:
+            key = "quotes" if r["method"] == "GET" else "optionQuotes"
+            r["response"][key][0]["lastTradePrice"] = 999.0
+        with open(path, "w") as fp:
+            fp.writelines(json.dumps(r) + "\n" for r in lines)
+
+        server.replay(path)
+        assert sym.quotes([1, 2])[0].LASTTRADEPRICE == 999.0
+        assert sym.option_quotes([7000, 7001])[0].LASTTRADEPRICE == 999.0
+        assert sym.quotes([1, 3])[0].LASTTRADEPRICE != 999.0
+
+    def test_errors(self, server):
+        """Injected errors are retried, and raised once retries run out"""
+        sym = Symbol(refresh_token="abc", retry=RetryPolicy(attempts=3, backoff=0.01))
+        server.error_rate = 1.0
+        with pytest.raises(OSError):
+            sym.quotes([1])
+        assert server.errors == 3
+
+        server.error_rate = 0.0
+        assert len(sym.quotes([1])) == 1
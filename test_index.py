@@ -0,0 +1,70 @@
+import time
+from questradeist import Symbol
+from questradeist.index import SymbolIndex
+from questradeist.types import SearchSymbol
+
+
+class TestSymbolIndex():
+
+    def test_local_prefixes(self, server):
+        """Longer forms of a searched prefix are answered locally"""
+        index = SymbolIndex(Symbol(refresh_token="abc"))
+        found = index.search("aa")
+        assert [s.SYMBOL for s in found] == ["AAA", "AAB", "AAC"]
+        assert isinstance(found[0], SearchSymbol)
+
+        before = server.requests
+        assert [s.SYMBOL for s in index.search("AAB")] == ["AAB"]
+        assert index.search("AAZ") == []
+        assert index.search("AA", raw=True)["symbols"][0]["symbol"] == "AAA"
+        assert server.requests == before
+
+        index.search("B")
+        assert server.requests == before + 1
+        assert len(index) == 6
+
+    def test_ttl(self, server):
+        """Prefixes searched too long ago are searched again"""
+        index = SymbolIndex(Symbol(refresh_token="abc"), ttl=0.05)
+        index.search("AA")
+        assert index.covered("AAB")
+        time.sleep(0.06)
+        assert index.lookup("AAB") is None
+
+    def test_limit(self, server):
+        """Truncated results are kept, but don't cover their prefix"""
+        index = SymbolIndex(Symbol(refresh_token="abc"), limit=3)
+        assert len(index.search("AA")) == 3
+        assert not index.covered("AA")
+        assert len(index) == 3
+
+    def test_refresh(self, server):
+        """Refreshing replaces the symbols under every covered prefix"""
+        index = SymbolIndex(Symbol(refresh_token="abc"))
+        index.search("AA")
+        index.search("AAB")
+        assert index.prefixes() == ["AA"]
+
+        server.route(r"/v1/symbols/search", lambda m, query, headers: (200, {"symbols": [
+            {"symbol": "AAX", "symbolId": 1, "description": "", "securityType": "Stock", "listingExchange": "TSX",
+             "isTradable": True, "isQuotable": True, "currency": "CAD"}]}))
+        index.start_refresh(0.01)
+        deadline = time.time() + 2
+        while [r["symbol"] for r in index.lookup("AA")] != ["AAX"] and time.time() < deadline:
+            time.sleep(0.01)
+        index.stop()
+        assert [r["symbol"] for r in index.lookup("AA")] == ["AAX"]
+
+    def test_persist(self, server, tmp_path):
+        """An index saved to disk is answered locally after being loaded"""
+        path = str(tmp_path / "symbols.json")
+        index = SymbolIndex(Symbol(refresh_token="abc"), path=path)
+        index.search("AA")
+        index.save()
+
+        before = server.requests
+        loaded = SymbolIndex(Symbol(refresh_token="abc"), path=path)
+        after_login = server.requests
+        assert [s.SYMBOL for s in loaded.search("AAC")] == ["AAC"]
+        assert server.requests == after_login
+        assert after_login - before == 1
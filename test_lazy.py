@@ -0,0 +1,53 @@
+import datetime
+import pickle
+import pytest
+from questradeist import Account, Symbol
+from questradeist.lazy import View, Views
+from questradeist.types import AccountExecution, Quote
+
+
+class TestLazy():
+
+    def test_quotes(self, server):
+        """Lazy views read the same values as objects"""
+        sym = Symbol(refresh_token="abc")
+        views = sym.quotes(list(range(1, 251)), format="lazy")
+        quotes = sym.quotes(list(range(1, 251)))
+        assert isinstance(views, Views)
+        assert len(views) == 250
+        for v, q in zip(views, quotes):
+            assert v.SYMBOLID == q.SYMBOLID
+            assert v.LASTTRADEPRICE == q.LASTTRADEPRICE
+            assert v.VWAP == q.VWAP
+        assert [v.SYMBOLID for v in views if v.LASTTRADEPRICE > 30] == [q.SYMBOLID for q in quotes if q.LASTTRADEPRICE > 30]
+
+    def test_conversion(self):
+        """Fields are converted on access, and views can be turned into objects"""
+        views = Symbol._deserialize(None, {"quotes": [{"symbolId": 1, "bidPrice": 10, "VWAP": None}]}, Quote, "quotes", format="lazy")
+        v = views[0]
+        assert isinstance(v.BIDPRICE, float)
+        assert v.VWAP is None
+        with pytest.raises(AttributeError):
+            v.NOSUCHFIELD
+        with pytest.raises(AttributeError):
+            v.SYMBOLID = 2
+
+        q = v.materialize()
+        assert isinstance(q, Quote) and q.BIDPRICE == 10.0
+        assert [o.SYMBOLID for o in views.materialize()] == [1]
+        assert isinstance(views[:1], Views)
+        assert v.raw() == {"symbolId": 1, "bidPrice": 10, "VWAP": None}
+        assert pickle.loads(pickle.dumps(v)) == v
+
+    def test_windows(self, server):
+        """Lazy views work across merged windows"""
+        acct = Account(refresh_token="abc")
+        execs = acct.executions(server.accounts[0], datetime.datetime(2020, 1, 1), datetime.datetime(2020, 3, 1), format="lazy")
+        assert len(execs) == len(acct.executions(server.accounts[0], datetime.datetime(2020, 1, 1), datetime.datetime(2020, 3, 1)))
+        assert isinstance(execs[0], View)
+        assert isinstance(execs[0].materialize(), AccountExecution)
+
+    def test_invalid_format(self, server):
+        """Unknown formats are refused"""
+        with pytest.raises(AttributeError):
+            Symbol(refresh_token="abc").quotes([1], format="rows")
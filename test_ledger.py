@@ -0,0 +1,95 @@
+import datetime
+import pytest
+from questradeist import Account
+from questradeist.ledger import Ledger
+from questradeist.types import AccountActivity, AccountExecution
+
+
+def fill(day: str):
+    """A buy of 100 shares, on a day during daylight saving time or not"""
+    offset = "-04:00" if "2020-03-08" < day < "2020-11-01" else "-05:00"
+    stamp = "%sT00:00:00.000000%s" % (day, offset)
+    return {"tradeDate": stamp, "transactionDate": stamp, "settlementDate": stamp, "action": "Buy", "symbol": "SYM1",
+            "symbolId": 1, "description": "BUY", "currency": "CAD", "quantity": 100, "price": 10.5,
+            "grossAmount": -1050, "commission": 0, "netAmount": -1050, "type": "Trades"}
+
+
+class TestLedger():
+
+    def test_sync(self, server, tmp_path):
+        """A first sync stores every entry since start, for every account"""
+        with Ledger(Account(refresh_token="abc"), str(tmp_path / "ledger.db"), start=datetime.datetime(2020, 1, 1)) as ledger:
+            added = ledger.sync(end=datetime.datetime(2020, 3, 1))
+            assert added == 3 * 2 * 61
+
+            activities = ledger.activities(10000001)
+            assert len(activities) == 61
+            assert isinstance(activities[0], AccountActivity)
+            assert activities[0].TRANSACTIONDATE < activities[-1].TRANSACTIONDATE
+            assert len(ledger.executions()) == 3 * 61
+            assert isinstance(ledger.executions()[0], AccountExecution)
+            assert ledger.checkpoint(10000001, "executions") == datetime.datetime(2020, 3, 1)
+
+    def test_incremental(self, server, tmp_path):
+        """Later syncs only fetch from the checkpoint, less the overlap, without duplicating entries"""
+        with Ledger(Account(refresh_token="abc"), str(tmp_path / "ledger.db"), start=datetime.datetime(2020, 1, 1),
+                    overlap=datetime.timedelta(days=3)) as ledger:
+            ledger.sync(ids=[10000001], end=datetime.datetime(2020, 3, 1))
+
+            before = server.requests
+            added = ledger.sync(ids=[10000001], end=datetime.datetime(2020, 3, 11))
+            assert added == 2 * 10
+            # one request per kind, starting three days before the checkpoint
+            assert server.requests - before == 2
+            assert len(ledger.activities(10000001)) == 71
+            assert [e.ID for e in ledger.executions(start=datetime.datetime(2020, 3, 10))] == [
+                datetime.date(2020, 3, 10).toordinal(), datetime.date(2020, 3, 11).toordinal()]
+
+    def test_identical_entries(self, server, tmp_path):
+        """Identical activities are each stored once, and a sync fetching them again adds only new copies"""
+        fills = {"2020-01-15": 2}
+
+        def handler(m, query, headers):
+            start, end = query["startTime"][0][:10], query["endTime"][0][:10]
+            return 200, {"activities": [fill(day) for day, n in sorted(fills.items()) if start <= day <= end for _ in range(n)]}
+
+        server.route(r"/v1/accounts/(\d+)/activities/?", handler)
+        with Ledger(Account(refresh_token="abc"), str(tmp_path / "ledger.db"), start=datetime.datetime(2020, 1, 1),
+                    overlap=datetime.timedelta(days=10)) as ledger:
+            assert ledger.sync(ids=[1], kinds=["activities"], end=datetime.datetime(2020, 1, 20)) == 2
+            assert len(ledger.activities(1)) == 2
+
+            # a third fill posted late on the same day, and one on a later day
+            fills.update({"2020-01-15": 3, "2020-01-22": 1})
+            assert ledger.sync(ids=[1], kinds=["activities"], end=datetime.datetime(2020, 1, 25)) == 2
+            assert ledger.sync(ids=[1], kinds=["activities"], end=datetime.datetime(2020, 1, 25)) == 0
+            assert len(ledger.activities(1)) == 4
+
+    def test_daylight_time(self, server, tmp_path):
+        """Entries stamped -04:00 in the summer are found by the days they fall on"""
+        server.route(r"/v1/accounts/(\d+)/activities/?", lambda m, query, headers: (200, {"activities": [fill("2020-07-01"), fill("2020-07-02")]}))
+        with Ledger(Account(refresh_token="abc"), str(tmp_path / "ledger.db"), start=datetime.datetime(2020, 7, 1)) as ledger:
+            ledger.sync(ids=[1], kinds=["activities"], end=datetime.datetime(2020, 7, 5))
+            assert len(ledger.activities(1, start=datetime.datetime(2020, 7, 1))) == 2
+            assert len(ledger.activities(1, start=datetime.date(2020, 7, 2), end=datetime.date(2020, 7, 2))) == 1
+            utc = datetime.timezone.utc
+            assert len(ledger.activities(1, start=datetime.datetime(2020, 7, 1, 4, 30, tzinfo=utc))) == 1
+
+    def test_persisted(self, server, tmp_path):
+        """The ledger survives being reopened, and answers queries without the API"""
+        path = str(tmp_path / "ledger.db")
+        with Ledger(Account(refresh_token="abc"), path, start=datetime.datetime(2020, 1, 1)) as ledger:
+            ledger.sync(ids=[10000002], kinds=["executions"], end=datetime.datetime(2020, 1, 10))
+
+        with Ledger(Account(refresh_token="abc"), path) as ledger:
+            before = server.requests
+            raw = ledger.executions(10000002, raw=True)
+            assert server.requests == before
+            assert len(raw["executions"]) == 10
+            assert ledger.activities() == []
+
+    def test_invalid_kind(self, server, tmp_path):
+        """Unknown kinds raise AttributeError"""
+        with Ledger(Account(refresh_token="abc"), str(tmp_path / "ledger.db")) as ledger:
+            with pytest.raises(AttributeError):
+                ledger.sync(ids=[10000001], kinds=["dividends"])
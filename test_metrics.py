@@ -0,0 +1,106 @@
+import asyncio
+import datetime
+import pytest
+from questradeist import Account, Symbol
+from questradeist.metrics import Histogram, RequestMetrics, endpoint
+from questradeist.retry import RetryPolicy
+
+
+class TestMetrics():
+
+    def test_events(self, server):
+        """Every call hands its endpoint, status, size and phases to the hooks"""
+        events = []
+        sym = Symbol(refresh_token="abc", hooks=[events.append])
+        sym.history(7, datetime.datetime(2020, 1, 1), datetime.datetime(2020, 1, 31))
+        event, = events
+        assert event.endpoint == "/v1/markets/candles/{id}"
+        assert event.method == "GET"
+        assert event.status == 200
+        assert event.attempts == 1 and event.retries == 0
+        assert event.bytes > 0
+        assert event.error is None
+        phases = sum(getattr(event, p) for p in event.PHASES)
+        assert 0 < phases <= event.total
+        assert event.server > 0 and event.decode > 0 and event.build > 0
+
+    def test_retries_and_errors(self, server):
+        """Retries are counted, and failed calls are reported with their error"""
+        calls = []
+
+        def flaky(m, query, headers):
+            calls.append(1)
+            return (503, {"code": 1000, "message": "down"}) if len(calls) < 2 else (200, {"quotes": []})
+
+        server.route(r"/v1/markets/quotes", flaky)
+        server.route(r"/v1/symbols/search", lambda m, query, headers: (400, {"code": 1002, "message": "Invalid prefix"}))
+        events = []
+        sym = Symbol(refresh_token="abc", retry=RetryPolicy(backoff=0.01), hooks=[events.append])
+        sym.quotes([1])
+        with pytest.raises(OSError):
+            sym.search("A")
+
+        assert events[0].attempts == 2 and events[0].status == 200
+        assert events[1].status == 400 and isinstance(events[1].error, OSError)
+
+    def test_rate_limit_headroom(self, server):
+        """The remaining rate limit budget is recorded"""
+        server.rate_limit = 100
+        events = []
+        Account(refresh_token="abc", hooks=[events.append]).get_all()
+        assert events[0].remaining == 99
+
+    def test_failing_hook(self, server):
+        """A failing hook doesn't fail the call"""
+        def broken(event):
+            raise ValueError("broken")
+
+        assert len(Symbol(refresh_token="abc", hooks=[broken]).quotes([1, 2])) == 2
+
+    def test_prometheus(self, server):
+        """Recorded calls are exported as Prometheus histograms and counters"""
+        metrics = RequestMetrics()
+        acct = Account(refresh_token="abc", hooks=[metrics.record])
+        for n in server.accounts:
+            acct.positions(n)
+
+        h = metrics.histogram("/v1/accounts/{id}/positions")
+        assert h.count == 3
+        text = metrics.prometheus()
+        assert 'questradeist_requests_total{endpoint="/v1/accounts/{id}/positions",method="GET",status="200"} 3' in text
+        assert 'questradeist_request_duration_seconds_bucket{endpoint="/v1/accounts/{id}/positions",phase="total",le="+Inf"} 3' in text
+        assert 'questradeist_request_duration_seconds_count{endpoint="/v1/accounts/{id}/positions",phase="decode"} 3' in text
+        assert "# TYPE questradeist_request_duration_seconds histogram" in text
+
+    def test_async(self, server):
+        """Async calls report to the hooks too"""
+        pytest.importorskip("aiohttp")
+        from questradeist.aio import AsyncSymbol, AsyncTransport
+
+        events = []
+
+        async def run():
+            async with AsyncSymbol(refresh_token="abc", async_transport=AsyncTransport(), hooks=[events.append]) as sym:
+                await sym.quotes([1, 2])
+
+        asyncio.run(run())
+        assert events[0].endpoint == "/v1/markets/quotes"
+        assert events[0].status == 200 and events[0].transfer > 0
+
+
+class TestHistogram():
+
+    def test_quantiles(self):
+        """Quantiles are interpolated within buckets, and buckets are cumulative"""
+        h = Histogram(buckets=(1.0, 2.0, 4.0))
+        for v in (0.5, 0.5, 1.5, 3.0, 10.0):
+            h.observe(v)
+        assert h.cumulative() == [(1.0, 2), (2.0, 3), (4.0, 4), (float("inf"), 5)]
+        assert h.quantile(0.5) == pytest.approx(1.5)
+        assert h.quantile(0.99) == 4.0
+        assert Histogram().quantile(0.5) is None
+
+    def test_endpoint(self):
+        """Ids in paths are grouped"""
+        assert endpoint("https://api01.iq.questrade.com/v1/accounts/26598145/activities?startTime=x") == "/v1/accounts/{id}/activities"
+        assert endpoint("https://api01.iq.questrade.com/v1/markets/quotes?ids=1,2") == "/v1/markets/quotes"
@@ -0,0 +1,77 @@
+import datetime
+import pytest
+from fakeserver import option_id
+from questradeist import Symbol
+from questradeist.cache import MemoryCache
+from questradeist.types import OptionQuote, OptionStrike
+
+
+class TestOptions():
+
+    def test_chain(self, server):
+        """The chain is flattened into one row per strike of every expiry"""
+        sym = Symbol(refresh_token="abc")
+        strikes = sym.option_chain(7)
+        assert len(strikes) == 15
+        assert isinstance(strikes[0], OptionStrike)
+        assert isinstance(strikes[0].STRIKEPRICE, float)
+        assert strikes[0].CALLSYMBOLID == option_id(7, 0, 0)
+        assert strikes[0].PUTSYMBOLID == option_id(7, 0, 0, put=True)
+        assert strikes[0].ROOT == "SYM7"
+
+        raw = sym.option_chain(7, raw=True)
+        assert len(raw["optionChain"]) == 3
+
+    def test_chain_cached(self, server):
+        """Chains are served from the cache while fresh"""
+        sym = Symbol(refresh_token="abc", cache=MemoryCache())
+        sym.option_chain(7)
+        before = server.requests
+        assert len(sym.option_chain(7)) == 15
+        assert server.requests == before
+
+    def test_chain_columnar(self, server):
+        """Chains can be returned as columns"""
+        pytest.importorskip("numpy")
+        cols = Symbol(refresh_token="abc").option_chain(7, format="columnar")
+        assert len(cols["STRIKEPRICE"]) == 15
+        assert str(cols["EXPIRYDATE"].dtype) == "datetime64[us]"
+
+    def test_quotes_by_id(self, server):
+        """Ids are requested in chunks, and quotes come back in order"""
+        sym = Symbol(refresh_token="abc")
+        ids = [option_id(u, e, s) for u in range(1, 18) for e in range(3) for s in range(5)]
+        before = server.requests
+        quotes = sym.option_quotes(ids)
+        assert server.requests - before == 3
+        assert [q.SYMBOLID for q in quotes] == ids
+        assert isinstance(quotes[0], OptionQuote)
+        assert quotes[0].DELTA == 0.5
+
+    def test_quotes_by_filter(self, server):
+        """Every expiry is a filter of its own, on type and strike range"""
+        sym = Symbol(refresh_token="abc")
+        expiries = [datetime.datetime(2020, 1, 17), datetime.datetime(2020, 2, 21)]
+        strikes = [s.STRIKEPRICE for s in sym.option_chain(7)[:5]]
+
+        before = server.requests
+        quotes = sym.option_quotes(underlying=7, expiries=expiries, option_type="Call", min_strike=strikes[1], max_strike=strikes[3])
+        assert server.requests - before == 2
+        assert sorted(q.SYMBOLID for q in quotes) == sorted(option_id(7, e, s) for e in range(2) for s in range(1, 4))
+
+    def test_quotes_merged(self, server):
+        """An option matched by id and by filter is returned once"""
+        sym = Symbol(refresh_token="abc")
+        quotes = sym.option_quotes([option_id(7, 0, 0), option_id(8, 0, 0)], underlying=7, expiries=[datetime.datetime(2020, 1, 17)],
+                                   raw=True)
+        assert len(quotes["optionQuotes"]) == 11
+
+    def test_invalid(self, server):
+        """Quotes need ids, or an underlying symbol with expiries"""
+        sym = Symbol(refresh_token="abc")
+        with pytest.raises(AttributeError):
+            sym.option_quotes()
+        with pytest.raises(AttributeError):
+            sym.option_quotes(underlying=7)
+        with pytest.raises(AttributeError):
+            sym.option_quotes(underlying=7, expiries=[datetime.datetime(2020, 1, 17)], option_type="Straddle")
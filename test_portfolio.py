@@ -0,0 +1,76 @@
+import asyncio
+import time
+import pytest
+from fakeserver import quote
+from questradeist import Account
+from questradeist.portfolio import Portfolio
+from questradeist.types import AccountPosition, CurrencyBalance, Quote
+
+
+def record_quotes(server):
+    """Route quote calls through a handler recording the ids of each."""
+    calls = []
+
+    def handler(m, query, headers):
+        ids = [int(i) for i in query["ids"][0].split(",")]
+        calls.append(ids)
+        return 200, {"quotes": [quote(i) for i in ids]}
+
+    server.route(r"/v1/markets/quotes", handler)
+    return calls
+
+
+class TestSnapshot():
+
+    def test_snapshot(self, server):
+        """Positions and balances are joined with one quote per distinct symbol"""
+        calls = record_quotes(server)
+        portfolio = Account(refresh_token="abc").snapshot()
+        assert isinstance(portfolio, Portfolio)
+        assert [a.NUMBER for a in portfolio.accounts] == ["10000001", "10000002", "10000003"]
+        assert isinstance(portfolio.positions[10000001][0], AccountPosition)
+        assert isinstance(portfolio.balances[10000002][0], CurrencyBalance)
+        assert len(portfolio.combined_balances[10000003]) == 2
+
+        # the accounts hold symbols 2-6, 3-7 and 4-8
+        assert calls == [[2, 3, 4, 5, 6, 7, 8]]
+        assert portfolio.symbol_ids() == [2, 3, 4, 5, 6, 7, 8]
+        holdings = portfolio.holdings()
+        assert len(holdings) == 15
+        number, position, q = holdings[-1]
+        assert number == 10000003 and isinstance(q, Quote) and q.SYMBOLID == position.SYMBOLID == 8
+
+    def test_round_trips(self, server):
+        """Given account ids, a snapshot takes about two round trips"""
+        acct = Account(refresh_token="abc")
+        server.latency = 0.2
+        start = time.perf_counter()
+        raw = acct.snapshot(ids=[10000001, 10000003], raw=True)
+        elapsed = time.perf_counter() - start
+        assert [a["number"] for a in raw["accounts"]] == ["10000001", "10000003"]
+        assert sorted(raw["positions"]) == [10000001, 10000003]
+        assert elapsed < 0.6
+
+    def test_no_positions(self, server):
+        """Accounts holding nothing need no quote calls"""
+        calls = record_quotes(server)
+        server.route(r"/v1/accounts/(\d+)/positions", lambda m, query, headers: (200, {"positions": []}))
+        portfolio = Account(refresh_token="abc").snapshot()
+        assert calls == []
+        assert portfolio.holdings() == [] and portfolio.quotes == {}
+
+    def test_async(self, server):
+        """AsyncAccount snapshots the same way"""
+        pytest.importorskip("aiohttp")
+        from questradeist.aio import AsyncAccount, AsyncTransport
+
+        calls = record_quotes(server)
+
+        async def run():
+            async with AsyncAccount(refresh_token="abc", async_transport=AsyncTransport()) as acct:
+                return await acct.snapshot(), await acct.snapshot(ids=[10000002])
+
+        everything, one = asyncio.run(run())
+        assert everything.symbol_ids() == [2, 3, 4, 5, 6, 7, 8]
+        assert [a.NUMBER for a in one.accounts] == ["10000002"]
+        assert calls == [[2, 3, 4, 5, 6, 7, 8], [3, 4, 5, 6, 7]]
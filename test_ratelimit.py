@@ -0,0 +1,57 @@
+import time
+from questradeist.account import Account
+from questradeist.ratelimit import RateLimiter, TokenBucket, default_rate_limiter
+from questradeist.symbol import Symbol
+
+
+class TestRateLimit():
+
+    def test_bucket_pacing(self):
+        """Once the burst is spent, reservations are spaced at the bucket's rate"""
+        bucket = TokenBucket(rate=10, capacity=2)
+        delays = [bucket.reserve() for _ in range(5)]
+        assert delays[:2] == [0.0, 0.0]
+        assert 0.25 < delays[4] <= 0.3
+
+    def test_bucket_budget(self):
+        """A used up budget holds requests until it resets"""
+        bucket = TokenBucket(rate=1000)
+        bucket.update(remaining=1, reset=time.time() + 0.5)
+        assert bucket.reserve() < 0.01
+        assert 0.4 < bucket.reserve() <= 0.51
+
+    def test_endpoint_classes(self):
+        """Account and market data calls have separate budgets"""
+        limiter = RateLimiter()
+        accounts = limiter.bucket("https://api01.iq.questrade.com/v1/accounts/1/positions")
+        quotes = limiter.bucket("https://api01.iq.questrade.com/v1/markets/quotes?ids=1")
+        symbols = limiter.bucket("https://api01.iq.questrade.com/v1/symbols/?ids=1")
+        assert accounts.rate == 30
+        assert quotes is symbols
+        assert quotes.rate == 20
+
+    def test_shared(self, server):
+        """Every client shares the process-wide limiter"""
+        assert Symbol(refresh_token="abc").rate_limiter is Account(refresh_token="abc").rate_limiter
+        assert Symbol(refresh_token="abc").rate_limiter is default_rate_limiter()
+
+    def test_paced_within_limit(self, server):
+        """Requests paced below the server's rate aren't refused"""
+        server.rate_limit = 25
+        server.rate_window = 0.5
+        sym = Symbol(refresh_token="abc", rate_limiter=RateLimiter(market_rate=40))
+        sym.CHUNK_SIZE = 1
+        quotes = sym.quotes(list(range(1, 51)))
+        assert [q.SYMBOLID for q in quotes] == list(range(1, 51))
+        assert server.rejected == 0
+
+    def test_queued_not_failed(self, server):
+        """Requests refused for exceeding the limit wait for it to reset, rather than failing"""
+        server.rate_limit = 10
+        server.rate_window = 0.5
+        sym = Symbol(refresh_token="abc", rate_limiter=RateLimiter(market_rate=1000, account_rate=1000))
+        sym.CHUNK_SIZE = 1
+        start = time.perf_counter()
+        quotes = sym.quotes(list(range(1, 31)))
+        assert [q.SYMBOLID for q in quotes] == list(range(1, 31))
+        assert time.perf_counter() - start >= 1.0
@@ -0,0 +1,146 @@
+import asyncio
+import threading
+import time
+import pytest
+import requests
+from fakeserver import quote
+from questradeist.ratelimit import RateLimiter
+from questradeist.retry import RetryPolicy
+from questradeist.symbol import Symbol
+from questradeist.transport import PooledTransport
+
+FAST = RetryPolicy(attempts=3, backoff=0.01)
+
+
+def flaky(failures: int, status: int=503):
+    """A quotes handler failing the first failures requests with status"""
+    calls = []
+
+    def handler(m, query, headers):
+        calls.append(1)
+        if len(calls) <= failures:
+            return status, {"code": 1000, "message": "failure %d" % len(calls)}
+        return 200, {"quotes": [quote(int(i)) for i in query["ids"][0].split(",")]}
+    return handler
+
+
+def slow_first(delay: float):
+    """A quotes handler answering the first request after delay seconds"""
+    lock = threading.Lock()
+    calls = []
+
+    def handler(m, query, headers):
+        with lock:
+            calls.append(1)
+            first = len(calls) == 1
+        if first:
+            time.sleep(delay)
+        return 200, {"quotes": [quote(int(i)) for i in query["ids"][0].split(",")]}
+    return handler
+
+
+class DroppingTransport(PooledTransport):
+    """Drops the first connection attempts"""
+
+    def __init__(self, drops: int):
+        PooledTransport.__init__(self)
+        self.drops = drops
+
+    def get(self, url, headers=None):
+        if self.drops:
+            self.drops -= 1
+            raise requests.ConnectionError("connection reset by peer")
+        return PooledTransport.get(self, url, headers)
+
+
+class TestRetry():
+
+    def test_delay(self):
+        """Backoff grows exponentially, with jitter, up to a limit"""
+        policy = RetryPolicy(backoff=1.0, max_backoff=3.0)
+        for attempt, bound in ((0, 1.0), (1, 2.0), (5, 3.0)):
+            delays = [policy.delay(attempt) for _ in range(100)]
+            assert all(0 <= d <= bound for d in delays)
+            assert len(set(delays)) > 1
+
+    def test_server_errors_retried(self, server):
+        """Server errors are retried"""
+        server.route(r"/v1/markets/quotes", flaky(2))
+        sym = Symbol(refresh_token="abc", retry=FAST)
+        assert sym.quotes([1])[0].SYMBOLID == 1
+
+    def test_retries_exhausted(self, server):
+        """The last failure is raised once every attempt has been made"""
+        server.route(r"/v1/markets/quotes", flaky(3))
+        sym = Symbol(refresh_token="abc", retry=FAST)
+        with pytest.raises(OSError) as e:
+            sym.quotes([1])
+        assert "failure 3" in str(e.value)
+
+    def test_fatal_errors_raised(self, server):
+        """Client errors aren't retried"""
+        server.route(r"/v1/markets/quotes", flaky(1, status=400))
+        sym = Symbol(refresh_token="abc", retry=FAST)
+        with pytest.raises(OSError) as e:
+            sym.quotes([1])
+        assert "failure 1" in str(e.value)
+
+    def test_connection_errors_retried(self, server):
+        """Dropped connections are retried, unless retries are disabled"""
+        sym = Symbol(refresh_token="abc", retry=FAST, transport=DroppingTransport(2))
+        assert sym.quotes([1])[0].SYMBOLID == 1
+
+        sym = Symbol(refresh_token="abc", retry=RetryPolicy(attempts=1), transport=DroppingTransport(1))
+        with pytest.raises(requests.ConnectionError):
+            sym.quotes([1])
+
+    def test_hedged(self, server):
+        """A slow request is overtaken by its duplicate"""
+        server.route(r"/v1/markets/quotes", slow_first(2.0))
+        sym = Symbol(refresh_token="abc", hedge_after=0.05)
+        start = time.perf_counter()
+        assert sym.quotes([1])[0].SYMBOLID == 1
+        assert time.perf_counter() - start < 1.0
+        assert server.requests >= 2
+
+    def test_not_hedged(self, server):
+        """Fast requests aren't duplicated"""
+        sym = Symbol(refresh_token="abc", hedge_after=0.5)
+        before = server.requests
+        sym.quotes([1])
+        assert server.requests - before == 1
+
+    def test_not_hedged_while_queued(self, server):
+        """Time spent waiting on the rate limiter doesn't count towards hedge_after"""
+        sym = Symbol(refresh_token="abc", hedge_after=0.05, rate_limiter=RateLimiter(1000, 10))
+        before = server.requests
+        for n in range(10):
+            sym.quotes([n + 1])
+        assert server.requests - before == 10
+
+        aio = pytest.importorskip("questradeist.aio")
+
+        async def run():
+            async with aio.AsyncSymbol(refresh_token="abc", hedge_after=0.05, rate_limiter=RateLimiter(1000, 10), async_transport=aio.AsyncTransport()) as sym:
+                before = server.requests
+                for n in range(10):
+                    await sym.quotes([n + 1])
+                return server.requests - before
+
+        assert asyncio.run(run()) == 10
+
+    def test_async_retry_and_hedge(self, server):
+        """Async clients retry and hedge too"""
+        aio = pytest.importorskip("questradeist.aio")
+
+        async def run():
+            async with aio.AsyncSymbol(refresh_token="abc", retry=FAST, async_transport=aio.AsyncTransport()) as sym:
+                server.route(r"/v1/markets/quotes", flaky(2))
+                assert (await sym.quotes([1]))[0].SYMBOLID == 1
+            async with aio.AsyncSymbol(refresh_token="abc", hedge_after=0.05, async_transport=aio.AsyncTransport()) as sym:
+                server.route(r"/v1/markets/quotes", slow_first(2.0))
+                start = time.perf_counter()
+                assert (await sym.quotes([2]))[0].SYMBOLID == 2
+                return time.perf_counter() - start
+
+        assert asyncio.run(run()) < 1.0
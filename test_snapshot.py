@@ -0,0 +1,52 @@
+from fakeserver import quote
+from questradeist import Symbol
+from questradeist.snapshot import QuoteStore
+from questradeist.types import Quote
+
+
+class TestQuoteStore():
+
+    def test_changes(self):
+        """Only quotes that changed are reported, with the fields that changed"""
+        store = QuoteStore()
+        first = store.apply({"quotes": [quote(1), quote(2)]})
+        assert [q.SYMBOLID for q, _ in first] == [1, 2]
+        assert "LASTTRADEPRICE" in first[0][1]
+
+        assert store.apply({"quotes": [quote(1), quote(2)]}) == []
+
+        moved = dict(quote(2), lastTradePrice=99.0, volume=5)
+        changes = store.apply([quote(1), moved])
+        assert len(changes) == 1
+        q, fields = changes[0]
+        assert isinstance(q, Quote)
+        assert q.SYMBOLID == 2 and q.LASTTRADEPRICE == 99.0
+        assert fields == ("LASTTRADEPRICE", "VOLUME")
+        assert store.get(2).VOLUME == 5
+        assert len(store) == 2 and 1 in store
+
+    def test_fields(self):
+        """Changes outside the watched fields are stored but not reported"""
+        store = QuoteStore(fields=["lastTradePrice"])
+        store.apply([quote(1)])
+        assert store.apply([dict(quote(1), volume=5)]) == []
+        assert store.get(1).VOLUME == 5
+        changes = store.apply([dict(quote(1), volume=6, lastTradePrice=1.0)])
+        assert changes[0][1] == ("LASTTRADEPRICE",)
+
+    def test_subscribers(self, server):
+        """Subscribers get the changes of every poll"""
+        store = QuoteStore()
+        seen = []
+        store.subscribe(seen.append)
+        sym = Symbol(refresh_token="abc")
+        store.poll(sym, [1, 2, 3])
+        store.poll(sym, [1, 2, 3])
+        assert len(seen) == 1
+        assert [q.SYMBOLID for q, _ in seen[0]] == [1, 2, 3]
+        assert [q.SYMBOLID for q in store.quotes([3, 1, 7])] == [3, 1]
+
+        store.unsubscribe(seen.append)
+        store.clear()
+        assert len(store.poll(sym, [1])) == 1
+        assert len(seen) == 1
@@ -0,0 +1,102 @@
+import asyncio
+import pytest
+from questradeist import Symbol
+from questradeist.retry import RetryPolicy
+from questradeist.types import Quote
+
+pytest.importorskip("aiohttp")
+
+
+async def take(stream, n: int):
+    quotes = []
+    async for q in stream:
+        quotes.append(q)
+        if len(quotes) == n:
+            break
+    return quotes
+
+
+class TestStream():
+
+    def test_updates(self, server, stream):
+        """Partial updates are merged into the full state of each symbol"""
+        qs = Symbol(refresh_token="abc").stream([1, 2])
+
+        async def run():
+            quotes = await take(qs, 6)
+            await qs.close()
+            return quotes
+
+        quotes = asyncio.run(run())
+        assert isinstance(quotes[0], Quote)
+        assert [q.SYMBOLID for q in quotes] == [1, 2, 1, 2, 1, 2]
+        assert quotes[0].LASTTRADEPRICE == pytest.approx(10.1)
+        assert quotes[4].LASTTRADEPRICE == pytest.approx(10.12)
+        assert quotes[4].BIDPRICE == quotes[0].BIDPRICE
+        assert quotes[4].VOLUME == 1002
+        assert [q.VOLUME for q in qs.snapshot()] == [1002, 1002]
+        assert stream.tokens == ["access-abc"]
+
+    def test_callbacks(self, server, stream):
+        """Callbacks get every quote while the stream runs"""
+        qs = Symbol(refresh_token="abc").stream([5])
+        seen = []
+
+        @qs.on_quote
+        def record(q):
+            seen.append(q.LASTTRADEPRICE)
+            if len(seen) == 3:
+                asyncio.ensure_future(qs.close())
+
+        asyncio.run(asyncio.wait_for(qs.run(), 5))
+        assert seen[:3] == pytest.approx([10.5, 10.51, 10.52])
+
+    def test_reconnect(self, server, stream):
+        """A dropped connection is reopened, keeping the merged state"""
+        qs = Symbol(refresh_token="abc").stream([1], retry=RetryPolicy(attempts=3, backoff=0.01))
+
+        async def run():
+            await take(qs, 2)
+            await asyncio.get_running_loop().run_in_executor(None, stream.drop)
+            quotes = await take(qs, 3)
+            await qs.close()
+            return quotes
+
+        asyncio.run(asyncio.wait_for(run(), 5))
+        assert qs.connects == 2
+        assert stream.connections == 2
+
+    def test_token_refresh(self, server, stream):
+        """A rejected access token is refreshed before reconnecting"""
+        stream.reject.add("access-abc")
+        sym = Symbol(refresh_token="abc")
+        qs = sym.stream([1])
+
+        async def run():
+            quotes = await take(qs, 1)
+            await qs.close()
+            return quotes
+
+        quotes = asyncio.run(asyncio.wait_for(run(), 5))
+        assert quotes[0].SYMBOLID == 1
+        assert stream.tokens == ["access-abc", "access-refresh-abc"]
+        assert sym.access_token == "access-refresh-abc"
+
+    def test_async_symbol(self, server, stream):
+        """AsyncSymbol objects stream too"""
+        from questradeist.aio import AsyncSymbol, AsyncTransport
+
+        async def run():
+            async with AsyncSymbol(refresh_token="abc", async_transport=AsyncTransport()) as sym:
+                qs = sym.stream([3])
+                quotes = await take(qs, 2)
+                await qs.close()
+                return quotes
+
+        assert [q.SYMBOLID for q in asyncio.run(run())] == [3, 3]
+
+    def test_unavailable(self, server):
+        """Failing to get a streaming port raises OSError"""
+        qs = Symbol(refresh_token="abc").stream([1])
+        with pytest.raises(OSError):
+            asyncio.run(take(qs, 1))
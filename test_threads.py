@@ -0,0 +1,51 @@
+import threading
+import time
+from questradeist import Account, Symbol
+from questradeist.transport import PooledTransport
+
+
+class TestThreads():
+
+    def test_shared_client(self, server):
+        """Many threads share one client while its tokens expire and refresh underneath them,
+        onto a different API server every time"""
+        server.strict = True
+        server.token_ttl = 0.4
+        hosts = ["localhost", "127.0.0.1"]
+        server.api_server = lambda: server.url.replace("127.0.0.1", hosts[server.logins % 2])
+        transport = PooledTransport(pool_maxsize=8, pool_block=True)
+        sym = Symbol(refresh_token="abc", transport=transport)
+        sym.credentials.margin = 0.1
+        acct = Account(credentials=sym.credentials, transport=transport)
+
+        errors, calls = [], []
+        stop = time.time() + 1.5
+
+        def poll(n):
+            try:
+                while time.time() < stop:
+                    ids = [n, n + 100]
+                    assert [q.SYMBOLID for q in sym.quotes(ids)] == ids
+                    assert [s.SYMBOLID for s in sym.get(ids=ids)] == ids
+                    assert len(acct.positions(10000001)) == 5
+                    calls.append(n)
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=poll, args=(n,)) for n in range(32)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        transport.close()
+
+        assert errors == []
+        assert len(calls) > 32
+        creds = sym.credentials
+        assert creds.refreshes >= 2
+        # every refresh token was spent once: the fake server refuses reuse
+        assert server.logins == creds.refreshes + 1
+        # no token was sent to any server but its own
+        assert server.misdirected == 0
+        # logins are sent outside the pooled transport, which keeps a pool per server
+        assert server.connections <= 8 * len(hosts) + server.logins
@@ -0,0 +1,42 @@
+from questradeist.account import Account
+from questradeist.symbol import Symbol
+from questradeist.transport import PooledTransport, Transport, default_transport
+
+
+class TestTransport():
+
+    def test_default_transport_is_shared(self, server):
+        """Symbol and Account objects share the process-wide pooled transport"""
+        sym = Symbol(refresh_token="abc")
+        acct = Account(refresh_token="abc")
+        assert sym.transport is acct.transport
+        assert sym.transport is default_transport()
+        assert isinstance(sym.transport, PooledTransport)
+
+    def test_pooled_transport_keeps_connections_alive(self, server):
+        """Many calls over a pooled transport reuse one connection"""
+        transport = PooledTransport()
+        sym = Symbol(refresh_token="abc", transport=transport)
+        before = server.connections
+        for i in range(20):
+            quotes = sym.quotes([i + 1])
+            assert quotes[0].SYMBOLID == i + 1
+        assert server.connections - before == 1
+        transport.close()
+
+    def test_per_call_transport(self, server):
+        """The plain transport opens a new connection for every call"""
+        sym = Symbol(refresh_token="abc", transport=Transport())
+        before = server.connections
+        for i in range(5):
+            sym.quotes([i + 1])
+        assert server.connections - before == 5
+
+    def test_uncompressed(self, server):
+        """Compression can be disabled"""
+        transport = PooledTransport(compress=False)
+        sym = Symbol(refresh_token="abc", transport=transport)
+        assert sym.time() == {"time": "2020-01-02T12:00:00.000000-05:00"}
+        r = transport.get(server.url + "v1/time")
+        assert "Content-Encoding" not in r.headers
+        transport.close()
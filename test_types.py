@@ -0,0 +1,79 @@
+import logging
+from questradeist.types import (AccountActivity, AccountExecution, AccountPosition, Auth, Candle, CurrencyBalance, Order,
+                                QuestradeType, Quote)
+
+
+class TestTypes():
+
+    def test_slots(self):
+        """Known fields are held in slots, not an instance __dict__"""
+        c = Candle(d={"start": "2020-01-02T00:00:00.000000-05:00", "open": 1.5, "VWAP": 2.0})
+        assert c.START == "2020-01-02T00:00:00.000000-05:00"
+        assert c.OPEN == 1.5
+        assert c.VWAP == 2.0
+        assert c.__dict__ == {}
+        assert set(Candle.__slots__) == set(c.fields)
+        for qtype in QuestradeType.__subclasses__():
+            assert qtype.__slots__ == tuple(qtype.fields.fget(None))
+
+    def test_missing_and_unknown_fields(self):
+        """Missing fields raise AttributeError, unknown fields are still set"""
+        c = Candle(d={"open": 1.0, "brandNew": True})
+        assert c.BRANDNEW is True
+        try:
+            c.CLOSE
+            assert False
+        except AttributeError:
+            pass
+
+    def test_floats(self):
+        """Price fields are floats, even when JSON sends a whole number"""
+        q = Quote(d={"symbolId": 7, "lastTradePrice": 10, "bidSize": 100, "askPrice": None})
+        assert isinstance(q.LASTTRADEPRICE, float)
+        assert isinstance(q.SYMBOLID, int)
+        assert isinstance(q.BIDSIZE, int)
+        assert q.ASKPRICE is None
+
+    def test_account_floats(self):
+        """Prices and amounts of account types are floats too, while ids and quantities aren't"""
+        e = AccountExecution.from_list([{"id": 1, "quantity": 100, "price": 10, "totalCost": 1000, "commission": 0,
+                                         "executionFee": 0, "secFee": 0, "canadianExecutionFee": 0, "orderPlacementCommission": 0}])[0]
+        for name in AccountExecution.FLOATS:
+            assert isinstance(getattr(e, name), float)
+        assert isinstance(e.ID, int) and isinstance(e.QUANTITY, int)
+
+        p = AccountPosition(d={"symbolId": 7, "openQuantity": 10, "currentPrice": 12, "averageEntryPrice": 11, "totalCost": 110, "openPnl": None})
+        assert isinstance(p.CURRENTPRICE, float) and isinstance(p.TOTALCOST, float) and isinstance(p.OPENQUANTITY, int)
+        assert p.OPENPNL is None
+        b = CurrencyBalance(d={"currency": "CAD", "cash": 1000, "totalEquity": 5000})
+        assert isinstance(b.CASH, float) and isinstance(b.TOTALEQUITY, float)
+        a = AccountActivity(d={"quantity": 5, "price": 20, "netAmount": -100})
+        assert isinstance(a.PRICE, float) and isinstance(a.NETAMOUNT, float) and isinstance(a.QUANTITY, int)
+        o = Order(d={"id": 3, "limitPrice": 15, "stopPrice": None})
+        assert isinstance(o.LIMITPRICE, float) and o.STOPPRICE is None
+
+    def test_auth_extras(self):
+        """Values set outside the field list keep working"""
+        a = Auth()
+        a.ACCESS_TOKEN = "token"
+        a.EXPIRES = 10
+        assert a.ACCESS_TOKEN == "token"
+        assert a.EXPIRES == 10
+
+    def test_order_fields(self):
+        """Order fields are listed separately"""
+        assert "REJECTIONREASON" in Order.__slots__
+        assert "CHAINID" in Order.__slots__
+
+    def test_from_list(self, caplog):
+        """Bulk construction matches the constructor, and checks the schema once per response"""
+        rows = [{"start": "s%d" % i, "open": i, "brandNew": i} for i in range(100)]
+        rows.append({"open": 7, "start": "reordered"})
+        with caplog.at_level(logging.WARNING, logger="questrade-logger"):
+            candles = Candle.from_list(rows)
+        assert len(caplog.records) == 1
+        assert [c.START for c in candles] == [r["start"] for r in rows]
+        assert candles[3].OPEN == 3.0 and isinstance(candles[3].OPEN, float)
+        assert candles[3].BRANDNEW == 3
+        assert candles[-1].OPEN == 7.0
+        assert repr(candles[0]) == repr(Candle(d=rows[0]))